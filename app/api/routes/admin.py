@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.core.security import verify_admin_key
-from app.db.models import AuditLog
+from app.db.models import AuditLog, RetentionRun
 from app.db.session import get_db
-from app.schemas.policy import ApproveKBRequest, PolicyUpdateRequest, ReindexRequest, RetentionRunRequest
+from app.schemas.policy import (
+    ApproveKBRequest,
+    PolicyUpdateRequest,
+    ReindexCancelRequest,
+    ReindexRequest,
+    RetentionRunRequest,
+)
 from app.services.kb_service import KBService
 from app.services.policy_service import PolicyService
-from app.services.retention_service import RetentionService
+from app.services.reindex_jobs import ReindexJobConflict, ReindexJobService, run_reindex_job, serialize_job
+from app.services.retention_service import RetentionRunConflict, RetentionService, run_retention_run, serialize_run
 
 router = APIRouter(prefix="/v1/admin", tags=["admin"], dependencies=[Depends(verify_admin_key)])
 
@@ -26,9 +33,37 @@ def upsert_policy(payload: PolicyUpdateRequest, db: Session = Depends(get_db)) -
     return {"status": "ok", "policy_key": payload.policy_key}
 
 
-@router.post("/kb/reindex")
-def reindex_kb(payload: ReindexRequest, db: Session = Depends(get_db)) -> dict:
-    return KBService(db).reindex(payload.urls, payload.updated_by)
+@router.post("/kb/reindex", status_code=202)
+def reindex_kb(payload: ReindexRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)) -> dict:
+    try:
+        job = ReindexJobService(db).submit(payload.urls, payload.force, payload.updated_by)
+    except ReindexJobConflict as exc:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "A reindex job is already active", "job_id": exc.active_job_id},
+        ) from None
+    background_tasks.add_task(run_reindex_job, job.id)
+    return {**serialize_job(job), "poll_url": f"/v1/admin/kb/jobs/{job.id}"}
+
+
+@router.get("/kb/jobs/{job_id}")
+def get_reindex_job(job_id: str, db: Session = Depends(get_db)) -> dict:
+    job = ReindexJobService(db).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+
+@router.post("/kb/jobs/{job_id}/cancel")
+def cancel_reindex_job(
+    job_id: str,
+    payload: ReindexCancelRequest | None = None,
+    db: Session = Depends(get_db),
+) -> dict:
+    job = ReindexJobService(db).cancel(job_id, (payload or ReindexCancelRequest()).updated_by)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
 
 
 @router.post("/kb/approve")
@@ -38,5 +73,30 @@ def approve_kb(payload: ApproveKBRequest, db: Session = Depends(get_db)) -> dict
 
 
 @router.post("/privacy/retention-run")
-def run_retention(payload: RetentionRunRequest, db: Session = Depends(get_db)) -> dict:
-    return RetentionService(db).run_cleanup(updated_by=payload.updated_by, dry_run=payload.dry_run)
+def run_retention(
+    payload: RetentionRunRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    db: Session = Depends(get_db),
+) -> dict:
+    service = RetentionService(db)
+    if payload.dry_run:
+        return service.run_cleanup(updated_by=payload.updated_by, dry_run=True)
+    try:
+        run, resumed = service.claim(payload.updated_by)
+    except RetentionRunConflict as exc:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "A retention run is already active", "run_id": exc.active_run_id},
+        ) from None
+    background_tasks.add_task(run_retention_run, run.id, resumed)
+    response.status_code = 202
+    return {**serialize_run(run), "resumed": resumed, "poll_url": f"/v1/admin/privacy/retention-runs/{run.id}"}
+
+
+@router.get("/privacy/retention-runs/{run_id}")
+def get_retention_run(run_id: str, db: Session = Depends(get_db)) -> dict:
+    run = db.get(RetentionRun, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Retention run not found")
+    return serialize_run(run)
@@ -1,20 +1,22 @@
 import hashlib
 import re
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import ConversationMessage, ConversationSession, LeadCapture
-from app.db.session import get_db
+from app.db.models import ConversationSession, LeadCapture
+from app.db.session import get_async_db
 from app.schemas.chat import (
     ChatMessageRequest,
     ChatMessageResponse,
     CreateSessionRequest,
     SessionResponse,
 )
-from app.services.orchestration import AgentOrchestrator
+from app.services.orchestration import run_agent_turn
 from app.services.privacy_service import PrivacyService
+from app.services.turn_unit_of_work import TurnUnitOfWork
 
 router = APIRouter(prefix="/v1/chat", tags=["chat"])
 
@@ -24,7 +26,7 @@ def _hash_phone(phone: str) -> str:
 
 
 @router.post("/session", response_model=SessionResponse)
-def create_session(payload: CreateSessionRequest, db: Session = Depends(get_db)) -> SessionResponse:
+async def create_session(payload: CreateSessionRequest, db: AsyncSession = Depends(get_async_db)) -> SessionResponse:
     phone_hash = _hash_phone(payload.phone_number) if payload.phone_number else None
     session = ConversationSession(
         channel=payload.channel,
@@ -32,8 +34,7 @@ def create_session(payload: CreateSessionRequest, db: Session = Depends(get_db))
         phone_hash=phone_hash,
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
     return SessionResponse(
         session_id=session.id,
         channel=session.channel,
@@ -43,47 +44,33 @@ def create_session(payload: CreateSessionRequest, db: Session = Depends(get_db))
 
 
 @router.post("/message", response_model=ChatMessageResponse)
-def send_message(payload: ChatMessageRequest, db: Session = Depends(get_db)) -> ChatMessageResponse:
-    session = db.scalar(select(ConversationSession).where(ConversationSession.id == payload.session_id))
+async def send_message(
+    payload: ChatMessageRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+) -> ChatMessageResponse:
+    session = await db.scalar(select(ConversationSession).where(ConversationSession.id == payload.session_id))
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    turn = TurnUnitOfWork(db, background_tasks)
+    await turn.release_connection()
+
     if payload.consent_to_contact is not None:
         session.consent_to_contact = payload.consent_to_contact
-        db.commit()
+    turn.stage_session(session)
 
     privacy_service = PrivacyService()
     screened = privacy_service.screen_inbound(payload.text, payload.channel)
+    turn.stage_user_message(session.id, payload.channel, screened.redacted_text)
 
-    db.add(
-        ConversationMessage(
-            session_id=session.id,
-            channel=payload.channel,
-            role="user",
-            text=screened.redacted_text,
-        )
-    )
-    db.commit()
-
-    result = AgentOrchestrator(db).run(session_id=session.id, channel=payload.channel, query=payload.text)
-
-    db.add(
-        ConversationMessage(
-            session_id=session.id,
-            channel=payload.channel,
-            role="assistant",
-            text=result.response_text,
-            intent=result.intent,
-            confidence=result.confidence,
-            escalated=result.escalated,
-            references_json=result.references,
-        )
-    )
+    result = await run_in_threadpool(run_agent_turn, session.id, payload.channel, payload.text)
+    turn.stage_agent_result(session.id, payload.channel, result)
 
     # Minimal lead capture: only after consent and appointment-related intent.
     if session.consent_to_contact and result.intent == "appointment_request":
         phone_match = re.search(r"(\+?1?[\s\-.]?)?\(?\d{3}\)?[\s\-.]?\d{3}[\s\-.]?\d{4}", payload.text)
-        db.add(
+        turn.stage_lead(
             LeadCapture(
                 session_id=session.id,
                 phone=phone_match.group(0) if phone_match else None,
@@ -92,7 +79,7 @@ def send_message(payload: ChatMessageRequest, db: Session = Depends(get_db)) ->
                 status="new",
             )
         )
-    db.commit()
+    await turn.commit()
 
     return ChatMessageResponse(
         session_id=session.id,
@@ -1,21 +1,26 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import verify_escalation_key
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.schemas.escalation import EscalationRequest, EscalationResponse
-from app.services.escalation_service import EscalationService
+from app.services.escalation_service import EscalationNotifier, build_ticket
 
 router = APIRouter(prefix="/v1", tags=["escalation"], dependencies=[Depends(verify_escalation_key)])
 
 
 @router.post("/escalations", response_model=EscalationResponse)
-def create_escalation(payload: EscalationRequest, db: Session = Depends(get_db)) -> EscalationResponse:
-    ticket = EscalationService(db).create_ticket(
+async def create_escalation(payload: EscalationRequest, db: AsyncSession = Depends(get_async_db)) -> EscalationResponse:
+    ticket = build_ticket(
         session_id=payload.session_id,
         channel=payload.channel,
         reason=payload.reason,
         conversation_excerpt=payload.conversation_excerpt,
         priority=payload.priority,
     )
+    db.add(ticket)
+    await db.commit()
+    # SMTP is blocking; send from the threadpool once the ticket is stored.
+    await run_in_threadpool(EscalationNotifier().notify, ticket)
     return EscalationResponse(ticket_id=ticket.id, status=ticket.status)
@@ -1,29 +1,42 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.db.models import ConversationMessage, ConversationSession, EscalationTicket, LeadCapture
-from app.db.session import get_db
-from app.schemas.common import HealthResponse
+from app.core.metrics import render_latest
+from app.db.session import get_async_read_db, get_read_router
+from app.schemas.common import HealthResponse, ReadinessResponse
+from app.services.metric_counters import read_counters
+from app.services.retrieval_cache import get_retrieval_cache
 
 router = APIRouter(prefix="/v1", tags=["health"])
 
 
 @router.get("/health", response_model=HealthResponse)
-def health() -> HealthResponse:
+async def health() -> HealthResponse:
     settings = get_settings()
     return HealthResponse(status="ok", app_env=settings.app_env)
 
 
+@router.get("/ready", response_model=ReadinessResponse)
+async def ready(request: Request, response: Response) -> ReadinessResponse:
+    # Liveness is /v1/health; this stays 503 until startup warmup has finished.
+    warmup = request.app.state.warmup
+    if not warmup.ready:
+        response.status_code = 503
+    return ReadinessResponse(**warmup.report())
+
+
 @router.get("/metrics")
-def metrics(db: Session = Depends(get_db)) -> dict:
+async def metrics(db: AsyncSession = Depends(get_async_read_db)) -> dict:
+    # Incrementally maintained counters (a handful of rows), not COUNT(*) over history.
     return {
-        "sessions_total": db.scalar(select(func.count()).select_from(ConversationSession)) or 0,
-        "messages_total": db.scalar(select(func.count()).select_from(ConversationMessage)) or 0,
-        "escalations_open": db.scalar(
-            select(func.count()).select_from(EscalationTicket).where(EscalationTicket.status == "open")
-        )
-        or 0,
-        "lead_captures_total": db.scalar(select(func.count()).select_from(LeadCapture)) or 0,
+        **await read_counters(db),
+        "retrieval_cache": get_retrieval_cache().stats(),
+        "db": get_read_router().stats(),
     }
+
+
+@router.get("/metrics/prometheus")
+async def prometheus_metrics() -> Response:
+    content, media_type = render_latest()
+    return Response(content=content, media_type=media_type)
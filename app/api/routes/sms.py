@@ -1,15 +1,18 @@
 import hashlib
+import uuid
 
-from fastapi import APIRouter, Depends, Form, Header, Request, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import ConversationMessage, ConversationSession
-from app.db.session import get_db
+from app.db.models import ConversationSession
+from app.db.session import get_async_db
 from app.integrations.twilio_security import validate_twilio_request
 from app.integrations.twilio_xml import twiml_message
-from app.services.orchestration import AgentOrchestrator
+from app.services.orchestration import run_agent_turn
 from app.services.privacy_service import PrivacyService
+from app.services.turn_unit_of_work import TurnUnitOfWork
 
 router = APIRouter(prefix="/v1/sms", tags=["sms"])
 
@@ -19,9 +22,10 @@ def _hash_phone(phone: str) -> str:
 
 
 @router.post("/webhook/twilio")
-def twilio_sms_webhook(
+async def twilio_sms_webhook(
     request: Request,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     from_number: str = Form(alias="From"),
     body: str = Form(alias="Body"),
     twilio_signature: str | None = Header(default=None, alias="X-Twilio-Signature"),
@@ -35,32 +39,17 @@ def twilio_sms_webhook(
     phone_hash = _hash_phone(from_number)
     privacy_service = PrivacyService()
     screened = privacy_service.screen_inbound(body, "sms")
-    session = db.scalar(select(ConversationSession).where(ConversationSession.phone_hash == phone_hash))
+    session = await db.scalar(select(ConversationSession).where(ConversationSession.phone_hash == phone_hash))
+    turn = TurnUnitOfWork(db, background_tasks)
+    await turn.release_connection()
     if not session:
-        session = ConversationSession(channel="sms", phone_hash=phone_hash)
-        db.add(session)
-        db.commit()
-        db.refresh(session)
-
-    db.add(
-        ConversationMessage(session_id=session.id, channel="sms", role="user", text=screened.redacted_text)
-    )
-    db.commit()
-
-    result = AgentOrchestrator(db).run(session_id=session.id, channel="sms", query=body)
-
-    db.add(
-        ConversationMessage(
-            session_id=session.id,
-            channel="sms",
-            role="assistant",
-            text=result.response_text,
-            intent=result.intent,
-            confidence=result.confidence,
-            escalated=result.escalated,
-            references_json=result.references,
-        )
-    )
-    db.commit()
+        # Id assigned up front so the agent can use it before the row is flushed with the rest of the turn.
+        session = ConversationSession(id=str(uuid.uuid4()), channel="sms", phone_hash=phone_hash)
+    turn.stage_session(session)
+    turn.stage_user_message(session.id, "sms", screened.redacted_text)
+
+    result = await run_in_threadpool(run_agent_turn, session.id, "sms", body)
+    turn.stage_agent_result(session.id, "sms", result)
+    await turn.commit()
 
     return Response(content=twiml_message(result.response_text), media_type="application/xml")
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.integrations.twilio_security import validate_twilio_request
 from app.integrations.twilio_xml import twiml_say_and_hangup
-from app.services.policy_service import PolicyService
+from app.services.policy_snapshot import get_policy_snapshot
 
 router = APIRouter(prefix="/v1/voice", tags=["voice"])
 
@@ -23,9 +23,9 @@ def twilio_voice_webhook(
         signature=twilio_signature,
     )
 
-    policies = PolicyService(db).get_active_policies()
-    is_open = PolicyService(db).is_open_now(policies)
-    if is_open:
+    snapshot = get_policy_snapshot(db)
+    policies = snapshot.policies
+    if snapshot.is_open_now():
         text = (
             f"Thanks for calling Upstate Hearing and Balance. "
             f"Please call our front desk at {policies.get('phone', '(864) 770-8822')} for immediate assistance."
@@ -9,14 +9,33 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
     app_env: str = "development"
+    # Create tables and seed defaults on boot; unset means on outside production (see app.jobs.migrate).
+    auto_migrate: bool | None = None
+    # Readiness (/v1/ready) waits for this startup warmup; comma-separated queries are pre-searched.
+    warmup_enabled: bool = True
+    warmup_pool_connections: int = 2
+    warmup_queries: str = ""
+    warmup_retry_max_seconds: float = 30.0
     log_level: str = "INFO"
     database_url: str = "sqlite:///./upstate_agent.db"
+    # Threads shared by every run_in_threadpool call in a worker. Each in-flight agent turn holds one
+    # for its whole model latency, so this caps concurrent turns per worker (anyio's default is 40).
+    threadpool_size: int = 40
+    # Request-path asyncio engine; derived from DATABASE_URL (asyncpg / aiosqlite) when empty.
+    async_database_url: str = ""
+    # Comma-separated read replicas for read-only queries; empty routes everything to DATABASE_URL.
+    database_replica_urls: str = ""
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_seconds: float = 10.0
     cors_origins: str = "http://localhost:3000,http://127.0.0.1:3000,http://localhost:8000,http://127.0.0.1:8000"
 
     openai_api_key: str | None = None
     default_model: str = "gpt-4.1-mini"
     fallback_model: str = "gpt-4.1"
     embedding_model: str = "text-embedding-3-small"
+    embedding_storage_dtype: str = "float16"
+    embedding_dimensions: int = 1536
+    embedding_short_dimensions: int = 256
 
     admin_api_key: str = "change-me"
     admin_api_keys: str = ""
@@ -34,6 +53,15 @@ class Settings(BaseSettings):
     )
     retention_days_messages: int = 30
     retention_days_escalations: int = 90
+    retention_days_audit_logs: int = 0
+    retention_days_leads: int = 90
+    retention_batch_size: int = 1000
+    retention_batch_sleep_seconds: float = 0.05
+    retention_stale_seconds: int = 900
+    metrics_counter_shards: int = 8
+    policy_version_poll_seconds: float = 5.0
+    db_partition_months_ahead: int = 3
+    db_partition_expiry: str = "drop"
 
     twilio_account_sid: str | None = None
     twilio_auth_token: str | None = None
@@ -52,7 +80,7 @@ class Settings(BaseSettings):
 
     rate_limit_enabled: bool = True
     rate_limit_requests_per_minute: int = 300
-    rate_limit_exempt_paths: str = "/,/v1/health,/v1/metrics,/docs,/openapi.json,/chat-test"
+    rate_limit_exempt_paths: str = "/,/v1/health,/v1/ready,/v1/metrics,/v1/metrics/prometheus,/docs,/openapi.json,/chat-test"
     redis_url: str | None = None
 
     kb_source_urls: str = (
@@ -62,6 +90,38 @@ class Settings(BaseSettings):
         "https://www.upstatehearingandbalance.com/insurance-financing"
     )
     manual_policy_approval: bool = True
+    kb_fetch_concurrency: int = 4
+    kb_fetch_timeout_seconds: float = 15.0
+    kb_parse_processes: int = 0
+    kb_crawl_mode: str = "list"  # list | discover (sitemap + same-host links from KB_SOURCE_URLS)
+    kb_crawl_max_depth: int = 2
+    kb_crawl_max_pages: int = 200
+    kb_crawl_respect_robots: bool = True
+    kb_crawl_user_agent: str = "UpstateAgentKB/1.0"
+    kb_reindex_stale_seconds: int = 900
+    kb_gc_grace_seconds: int = 3600
+    # How often a worker re-reads the active KB version, to pick up publishes by other workers and CLI reindexes.
+    kb_version_poll_seconds: float = 5.0
+    kb_gc_batch_size: int = 500
+    kb_html_extractor: str = "auto"  # auto (lxml when installed) | lxml | soup
+    kb_chunking: str = "content"  # content (content-defined boundaries) | fixed (800-char windows)
+    kb_chunk_min_chars: int = 300
+    kb_chunk_max_chars: int = 800
+    kb_boilerplate_enabled: bool = True
+    kb_boilerplate_min_pages: int = 3
+    kb_boilerplate_ratio: float = 0.5
+
+    retrieval_backend: str = "auto"
+    vector_rerank_candidates: int = 50
+    ivf_lists: int = 0
+    ivf_probes: int = 8
+    ivf_min_rows: int = 20000
+    vector_index_dir: str = ".kb_index"
+    retrieval_cache_enabled: bool = True
+    retrieval_cache_max_entries: int = 1024
+    retrieval_cache_ttl_seconds: int = 900
+    context_token_budget: int = 1200
+    context_dedupe_threshold: float = 0.8
 
     timezone: str = "America/New_York"
 
@@ -88,6 +148,14 @@ class Settings(BaseSettings):
     def kb_source_urls_list(self) -> list[str]:
         return [item.strip() for item in self.kb_source_urls.split(",") if item.strip()]
 
+    @property
+    def warmup_queries_list(self) -> list[str]:
+        return [item.strip() for item in self.warmup_queries.split(",") if item.strip()]
+
+    @property
+    def database_replica_urls_list(self) -> list[str]:
+        return [item.strip() for item in self.database_replica_urls.split(",") if item.strip()]
+
     @property
     def cors_origins_list(self) -> list[str]:
         if self.app_env == "production":
@@ -107,6 +175,10 @@ class Settings(BaseSettings):
             return keys
         return [self.admin_api_key]
 
+    @property
+    def auto_migrate_enabled(self) -> bool:
+        return self.app_env != "production" if self.auto_migrate is None else self.auto_migrate
+
     def validate_production_safety(self) -> None:
         if self.app_env != "production":
             return
@@ -0,0 +1,99 @@
+"""
+Prometheus instruments, served by `/v1/metrics/prometheus`.
+
+With more than one worker process, set `PROMETHEUS_MULTIPROC_DIR` to an empty, writable directory
+before the workers start: every process then writes its samples there and a scrape of any worker
+aggregates all of them. In-flight gauges of a worker that died are dropped at the next scrape.
+Without it the endpoint reports the answering process only.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# Seconds; wide enough for both sub-millisecond queries and slow model calls.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "upstate_http_request_duration_seconds",
+    "HTTP request latency by route template and status code.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "upstate_http_requests_in_flight",
+    "HTTP requests currently being served.",
+    multiprocess_mode="livesum",
+)
+DEPENDENCY_SECONDS = Histogram(
+    "upstate_dependency_duration_seconds",
+    "Latency of calls to external dependencies (openai, embeddings, db, smtp) by outcome.",
+    ["target", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "upstate_dependency_calls_in_flight",
+    "Dependency calls currently outstanding.",
+    ["target"],
+    multiprocess_mode="livesum",
+)
+CACHE_EVENTS = Counter("upstate_cache_events_total", "Cache lookups by cache and result (hit/miss).", ["cache", "event"])
+FALLBACKS = Counter("upstate_fallbacks_total", "Degraded paths taken, by kind.", ["kind"])
+
+
+def record_dependency(target: str, seconds: float, outcome: str = "ok") -> None:
+    DEPENDENCY_SECONDS.labels(target, outcome).observe(seconds)
+
+
+@contextmanager
+def track_dependency(target: str):
+    """Time the enclosed call; an exception is recorded as outcome="error" and re-raised."""
+    in_flight = DEPENDENCY_IN_FLIGHT.labels(target)
+    in_flight.inc()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        in_flight.dec()
+        record_dependency(target, time.perf_counter() - started, outcome)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, owned by another user
+        pass
+    return True
+
+
+def mark_dead_workers(path: str) -> list[int]:
+    """
+    Remove the live-gauge files of worker processes that have exited. Uvicorn has no worker-exit
+    hook, and without this a worker that died mid-request keeps its in-flight count in the sum.
+    """
+    dead = set()
+    for file in Path(path).glob("gauge_live*_*.db"):
+        pid = file.stem.rsplit("_", 1)[-1]
+        if pid.isdigit() and int(pid) not in dead and not _process_alive(int(pid)):
+            dead.add(int(pid))
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, path)
+    return sorted(dead)
+
+
+def render_latest() -> tuple[bytes, str]:
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        mark_dead_workers(path)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -8,14 +8,25 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 
 from app.core.config import get_settings
+from app.core.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS, UNMATCHED_ROUTE
 
 
 class RequestContextMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         request_id = request.headers.get("x-request-id", str(uuid.uuid4()))
         start = time.perf_counter()
-        response = await call_next(request)
-        duration_ms = (time.perf_counter() - start) * 1000
+        status = 500
+        HTTP_IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - start
+            # Route template, not the raw path, so ids in URLs do not multiply the series.
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(request.method, getattr(route, "path", UNMATCHED_ROUTE), str(status)).observe(elapsed)
+        duration_ms = elapsed * 1000
         response.headers["x-request-id"] = request_id
         response.headers["x-process-time-ms"] = f"{duration_ms:.2f}"
         return response
@@ -0,0 +1,21 @@
+import logging
+from functools import lru_cache
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_redis():
+    """Shared Redis client, or None when `REDIS_URL` is unset or the client cannot be built."""
+    redis_url = get_settings().redis_url
+    if not redis_url:
+        return None
+    try:
+        from redis import Redis
+
+        return Redis.from_url(redis_url, decode_responses=True)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("redis unavailable, using in-process state: %s", exc)
+        return None
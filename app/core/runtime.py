@@ -0,0 +1,25 @@
+def reset_runtime_caches() -> None:
+    """
+    Drop the process-wide settings, engines, Redis client and in-memory caches so the next use
+    rebuilds them from the current environment. For tests and benchmarks that switch databases.
+    """
+    # Imported here: app.core sits below the db and services layers.
+    from app.core.config import get_settings
+    from app.core.redis_client import get_redis
+    from app.db.session import get_async_engine, get_async_session_factory, get_engine, get_read_router, get_session_factory
+    from app.services.kb_versions import get_active_version_cache
+    from app.services.policy_snapshot import get_policy_snapshot_cache
+    from app.services.retrieval_cache import get_retrieval_cache
+    from app.services.vector_index import get_vector_index_cache
+
+    get_settings.cache_clear()
+    get_engine.cache_clear()
+    get_session_factory.cache_clear()
+    get_async_engine.cache_clear()
+    get_async_session_factory.cache_clear()
+    get_read_router.cache_clear()
+    get_policy_snapshot_cache.cache_clear()
+    get_redis.cache_clear()
+    get_retrieval_cache.cache_clear()
+    get_active_version_cache.cache_clear()
+    get_vector_index_cache.cache_clear()
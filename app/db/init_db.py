@@ -4,7 +4,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.models import Base, BusinessPolicy
-from app.db.session import get_engine
+from app.services.metric_counters import counters_seeded, reconcile_counters
 
 DEFAULT_POLICIES = {
     "business_hours": "Monday-Friday 9:00 AM-4:00 PM ET. Appointments available by request outside these hours.",
@@ -16,15 +16,13 @@ DEFAULT_POLICIES = {
 
 
 def init_db(session: Session) -> None:
-    Base.metadata.create_all(bind=get_engine())
+    """Create missing tables, seed default policies and the metric counters. Idempotent."""
+    Base.metadata.create_all(bind=session.get_bind())
+    active_keys = set(
+        session.scalars(select(BusinessPolicy.policy_key).where(BusinessPolicy.effective_to.is_(None))).all()
+    )
     for key, value in DEFAULT_POLICIES.items():
-        existing = session.scalar(
-            select(BusinessPolicy).where(
-                BusinessPolicy.policy_key == key,
-                BusinessPolicy.effective_to.is_(None),
-            )
-        )
-        if existing:
+        if key in active_keys:
             continue
         session.add(
             BusinessPolicy(
@@ -35,3 +33,5 @@ def init_db(session: Session) -> None:
             )
         )
     session.commit()
+    if not counters_seeded(session):
+        reconcile_counters(session)
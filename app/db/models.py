@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, ForeignKey, Integer, LargeBinary, String, Text, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.types import JSON
 
@@ -17,7 +17,9 @@ class ConversationSession(Base):
     channel: Mapped[str] = mapped_column(String(32), default="web")
     consent_to_contact: Mapped[bool] = mapped_column(Boolean, default=False)
     phone_hash: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True
+    )
 
 
 class ConversationMessage(Base):
@@ -32,7 +34,9 @@ class ConversationMessage(Base):
     confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
     escalated: Mapped[bool] = mapped_column(Boolean, default=False)
     references_json: Mapped[list | None] = mapped_column(JSON, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True
+    )
 
 
 class BusinessPolicy(Base):
@@ -56,10 +60,115 @@ class KBChunk(Base):
     title: Mapped[str] = mapped_column(String(512), default="")
     content: Mapped[str] = mapped_column(Text)
     metadata_json: Mapped[dict] = mapped_column(JSON, default=dict)
-    embedding_json: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    page_type: Mapped[str] = mapped_column(String(32), default="general", index=True)
+    # Legacy JSON float list; superseded by embedding_blob (see app/jobs/migrate_embeddings.py).
+    embedding_json: Mapped[list | None] = mapped_column(JSON(none_as_null=True), nullable=True, deferred=True)
+    embedding_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    embedding_short_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    embedding_dtype: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    embedding_scale: Mapped[float | None] = mapped_column(Float, nullable=True)
     approved: Mapped[bool] = mapped_column(Boolean, default=True)
     version: Mapped[str] = mapped_column(String(64), index=True)
+    # Visibility interval over kb_versions ids: the chunk belongs to every version V with
+    # introduced_version_id <= V < retired_version_id (NULL retired means still current).
+    introduced_version_id: Mapped[int] = mapped_column(Integer, default=0, server_default="0", index=True)
+    retired_version_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    # Last build that produced this chunk, including builds that kept it unchanged.
+    built_version_id: Mapped[int] = mapped_column(Integer, default=0, server_default="0", index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class KBVersion(Base):
+    __tablename__ = "kb_versions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    label: Mapped[str] = mapped_column(String(64), index=True)
+    status: Mapped[str] = mapped_column(String(16), default="building", index=True)  # building|active|superseded|failed
+    crawl_id: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    summary_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    activated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    superseded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class KBActiveVersion(Base):
+    """Single-row pointer to the KB version retrieval reads; flipped in the publishing transaction."""
+
+    __tablename__ = "kb_active_version"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True, default="kb")
+    version_id: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class KBSourcePage(Base):
+    __tablename__ = "kb_source_pages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    url: Mapped[str] = mapped_column(String(512), unique=True, index=True)
+    etag: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    http_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_fetched_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_changed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Outgoing same-host links from the last full fetch, so discover crawls can expand 304 pages.
+    links_json: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    # [simhash, text] per block of the last full fetch, used to spot site-wide boilerplate.
+    blocks_json: Mapped[list | None] = mapped_column(JSON, nullable=True)
+
+
+class KBCrawlFrontier(Base):
+    __tablename__ = "kb_crawl_frontier"
+    __table_args__ = (UniqueConstraint("crawl_id", "url", name="uq_kb_crawl_frontier_crawl_url"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    crawl_id: Mapped[str] = mapped_column(String(32), index=True)
+    url: Mapped[str] = mapped_column(String(512))
+    depth: Mapped[int] = mapped_column(Integer, default=0)
+    priority: Mapped[int] = mapped_column(Integer, default=1)
+    lastmod: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), default="pending", index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class KBReindexJob(Base):
+    __tablename__ = "kb_reindex_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    status: Mapped[str] = mapped_column(String(16), default="queued", index=True)
+    # Set to KB_REINDEX_LOCK_KEY while queued/running; the unique constraint admits one active job per KB.
+    lock_key: Mapped[str | None] = mapped_column(String(32), unique=True, nullable=True)
+    requested_by: Mapped[str] = mapped_column(String(128), default="admin")
+    urls_json: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    force: Mapped[bool] = mapped_column(Boolean, default=False)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
+    progress_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    result_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class RetentionRun(Base):
+    __tablename__ = "retention_runs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    status: Mapped[str] = mapped_column(String(16), default="running", index=True)
+    # Set to RETENTION_LOCK_KEY while running; the unique constraint admits one active run.
+    lock_key: Mapped[str | None] = mapped_column(String(32), unique=True, nullable=True)
+    requested_by: Mapped[str] = mapped_column(String(128), default="admin")
+    cutoffs_json: Mapped[dict] = mapped_column(JSON)
+    # Per table: last deleted key and whether the table is finished, committed with each batch.
+    checkpoint_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    stats_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
 class LeadCapture(Base):
@@ -73,7 +182,9 @@ class LeadCapture(Base):
     reason: Mapped[str | None] = mapped_column(Text, nullable=True)
     consent: Mapped[bool] = mapped_column(Boolean, default=False)
     status: Mapped[str] = mapped_column(String(32), default="new")
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True
+    )
 
 
 class EscalationTicket(Base):
@@ -87,7 +198,9 @@ class EscalationTicket(Base):
     conversation_excerpt: Mapped[str] = mapped_column(Text)
     assigned_queue: Mapped[str] = mapped_column(String(64), default="frontdesk")
     status: Mapped[str] = mapped_column(String(32), default="open")
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True
+    )
     resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
@@ -108,4 +221,18 @@ class AuditLog(Base):
     actor: Mapped[str] = mapped_column(String(128), default="system")
     action: Mapped[str] = mapped_column(String(128))
     payload_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True
+    )
+
+
+class MetricCounter(Base):
+    """Row counts for /v1/metrics, moved in the same transaction as the rows they count."""
+
+    __tablename__ = "metric_counters"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Increments land on a random shard so concurrent turns do not queue on a single row lock.
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True, default=0)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
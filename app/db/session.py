@@ -1,16 +1,61 @@
-from functools import lru_cache
+import logging
+import time
+from collections.abc import AsyncIterator
+from functools import cached_property, lru_cache
+from itertools import count
+from threading import Lock
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.core.config import get_settings
+from app.core.metrics import DEPENDENCY_IN_FLIGHT, FALLBACKS, record_dependency
+from app.services.metric_counters import install_counter_tracking
 
+logger = logging.getLogger(__name__)
 
-@lru_cache(maxsize=1)
-def get_engine():
-    settings = get_settings()
-    database_url = settings.database_url
+# Sync driver -> asyncio driver for the same database.
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+# Seconds behind the primary; 0 when the replica has replayed everything it received (an idle
+# primary would otherwise look like growing lag) or when the server is not in recovery at all.
+POSTGRES_REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def _query_started(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+    DEPENDENCY_IN_FLIGHT.labels("db").inc()
+
+
+def _query_finished(conn, outcome: str) -> None:
+    started = conn.info.get("query_started")
+    if started:
+        DEPENDENCY_IN_FLIGHT.labels("db").dec()
+        record_dependency("db", time.perf_counter() - started.pop(), outcome)
+
+
+def _query_failed(context) -> None:
+    if context.connection is not None:
+        _query_finished(context.connection, "error")
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Per-statement latency for the `db` dependency; async engines pass their `sync_engine`."""
+    event.listen(engine, "before_cursor_execute", _query_started)
+    event.listen(engine, "after_cursor_execute", lambda conn, *_: _query_finished(conn, "ok"))
+    event.listen(engine, "handle_error", _query_failed)
+
+
+def _create_engine(database_url: str) -> Engine:
     connect_args = {}
     engine_kwargs = {"pool_pre_ping": True}
 
@@ -19,11 +64,28 @@ def get_engine():
         if ":memory:" in database_url:
             engine_kwargs["poolclass"] = StaticPool
 
-    return create_engine(database_url, connect_args=connect_args, **engine_kwargs)
+    engine = create_engine(database_url, connect_args=connect_args, **engine_kwargs)
+    instrument_engine(engine)
+    return engine
+
+
+def _create_async_engine(database_url: str) -> AsyncEngine:
+    engine_kwargs = {"pool_pre_ping": True}
+    if database_url.startswith("sqlite") and ":memory:" in database_url:
+        engine_kwargs["poolclass"] = StaticPool
+    engine = create_async_engine(database_url, **engine_kwargs)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_engine():
+    return _create_engine(get_settings().database_url)
 
 
 @lru_cache(maxsize=1)
 def get_session_factory():
+    install_counter_tracking()
     return sessionmaker(bind=get_engine(), autocommit=False, autoflush=False, class_=Session)
 
 
@@ -33,3 +95,199 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for {backend} databases")
+    if url.drivername == ASYNC_DRIVERS[backend]:
+        return database_url
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+@lru_cache(maxsize=1)
+def get_async_engine():
+    """Asyncio engine on the same database (asyncpg / aiosqlite) for the request path."""
+    settings = get_settings()
+    return _create_async_engine(settings.async_database_url or async_database_url(settings.database_url))
+
+
+@lru_cache(maxsize=1)
+def get_async_session_factory():
+    install_counter_tracking()
+    # Objects stay readable after commit; an expired attribute would need a lazy load, which asyncio forbids.
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+def pool_stats(engine: Engine | AsyncEngine) -> dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+class ReplicaTarget:
+    """One read replica: engines created on first use plus its last measured replication lag."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.lag_seconds: float | None = None
+        self.healthy = True
+        self.checked_at = 0.0
+        self.routed = 0
+
+    @cached_property
+    def engine(self) -> Engine:
+        return _create_engine(self.url)
+
+    @cached_property
+    def async_engine(self) -> AsyncEngine:
+        return _create_async_engine(async_database_url(self.url))
+
+    def record_lag(self, lag_seconds: float | None, error: Exception | None = None) -> None:
+        self.checked_at = time.monotonic()
+        self.healthy = error is None
+        self.lag_seconds = lag_seconds
+        if error is not None:
+            logger.warning("replica %s unavailable: %s", self.name, error.__class__.__name__)
+
+
+class ReadRouter:
+    """
+    Picks the engine for read-only work: replicas in round-robin order, skipping any that are
+    unreachable or more than `replica_max_lag_seconds` behind, with the primary as the fallback.
+    Lag is re-measured at most every `replica_lag_check_seconds` per replica. Writes, and reads
+    that must see a write from the same request, use the primary engines directly.
+    """
+
+    def __init__(self, urls: list[str], max_lag_seconds: float, check_interval_seconds: float) -> None:
+        self.targets = [ReplicaTarget(url) for url in urls]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.primary_reads = 0
+        self.fallbacks = 0
+        self._cursor = count()
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.targets)
+
+    def _rotation(self) -> list[ReplicaTarget]:
+        start = next(self._cursor) % len(self.targets)
+        return self.targets[start:] + self.targets[:start]
+
+    def _due(self, target: ReplicaTarget) -> bool:
+        return time.monotonic() - target.checked_at >= self.check_interval_seconds
+
+    def _usable(self, target: ReplicaTarget) -> bool:
+        return target.healthy and (target.lag_seconds or 0.0) <= self.max_lag_seconds
+
+    def _measure(self, target: ReplicaTarget) -> None:
+        try:
+            with target.engine.connect() as connection:
+                lag = connection.scalar(text(POSTGRES_REPLICA_LAG_SQL)) if connection.dialect.name == "postgresql" else 0.0
+            target.record_lag(float(lag or 0.0))
+        except Exception as exc:  # noqa: BLE001
+            target.record_lag(None, exc)
+
+    async def _ameasure(self, target: ReplicaTarget) -> None:
+        try:
+            async with target.async_engine.connect() as connection:
+                lag = await connection.scalar(text(POSTGRES_REPLICA_LAG_SQL)) if connection.dialect.name == "postgresql" else 0.0
+            target.record_lag(float(lag or 0.0))
+        except Exception as exc:  # noqa: BLE001
+            target.record_lag(None, exc)
+
+    def _routed(self, target: ReplicaTarget | None) -> None:
+        with self._lock:
+            if target is not None:
+                target.routed += 1
+            else:
+                self.primary_reads += 1
+                if self.enabled:
+                    self.fallbacks += 1
+                    FALLBACKS.labels("replica_to_primary").inc()
+
+    def read_engine(self) -> Engine:
+        for target in self._rotation() if self.enabled else []:
+            if self._due(target):
+                self._measure(target)
+            if self._usable(target):
+                self._routed(target)
+                return target.engine
+        self._routed(None)
+        return get_engine()
+
+    async def read_async_engine(self) -> AsyncEngine:
+        for target in self._rotation() if self.enabled else []:
+            if self._due(target):
+                await self._ameasure(target)
+            if self._usable(target):
+                self._routed(target)
+                return target.async_engine
+        self._routed(None)
+        return get_async_engine()
+
+    def stats(self) -> dict:
+        replicas = {}
+        for target in self.targets:
+            replicas[target.name] = {
+                "healthy": target.healthy,
+                "lag_seconds": None if target.lag_seconds is None else round(target.lag_seconds, 3),
+                "routed_reads": target.routed,
+                # Engines are created on first routed read; report pools only once they exist.
+                "sync_pool": pool_stats(target.engine) if "engine" in target.__dict__ else None,
+                "async_pool": pool_stats(target.async_engine) if "async_engine" in target.__dict__ else None,
+            }
+        return {
+            "primary": {
+                "reads": self.primary_reads,
+                "sync_pool": pool_stats(get_engine()),
+                "async_pool": pool_stats(get_async_engine()),
+            },
+            "replicas": replicas,
+            "replica_fallbacks": self.fallbacks,
+        }
+
+    def dispose(self) -> None:
+        for target in self.targets:
+            if "engine" in target.__dict__:
+                target.engine.dispose()
+
+    async def dispose_async(self) -> None:
+        for target in self.targets:
+            if "async_engine" in target.__dict__:
+                await target.async_engine.dispose()
+
+
+@lru_cache(maxsize=1)
+def get_read_router() -> ReadRouter:
+    settings = get_settings()
+    return ReadRouter(
+        settings.database_replica_urls_list,
+        max_lag_seconds=settings.replica_max_lag_seconds,
+        check_interval_seconds=settings.replica_lag_check_seconds,
+    )
+
+
+def get_read_session() -> Session:
+    """Session for read-only work, bound to a replica when one is configured and current enough."""
+    return get_session_factory()(bind=get_read_router().read_engine())
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    engine = await get_read_router().read_async_engine()
+    async with get_async_session_factory()(bind=engine) as db:
+        yield db
@@ -3,6 +3,7 @@ import smtplib
 from email.message import EmailMessage
 
 from app.core.config import get_settings
+from app.core.metrics import track_dependency
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +25,7 @@ class EmailClient:
         message.set_content(body)
 
         try:
-            with smtplib.SMTP(self.settings.smtp_host, self.settings.smtp_port) as server:
+            with track_dependency("smtp"), smtplib.SMTP(self.settings.smtp_host, self.settings.smtp_port) as server:
                 if self.settings.smtp_use_tls:
                     server.starttls()
                 if self.settings.smtp_username and self.settings.smtp_password:
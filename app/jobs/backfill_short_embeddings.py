@@ -0,0 +1,67 @@
+from sqlalchemy import select, text
+from sqlalchemy.orm import undefer
+
+from app.core.config import get_settings
+from app.db.models import AuditLog, KBChunk
+from app.db.session import get_session_factory
+from app.services.embedding_codec import SHORT_EMBEDDING_DTYPE, decode_embedding, encode_embedding, shorten_embedding
+from app.services.kb_writer import check_vector_dimensions
+from app.services.retrieval_cache import get_retrieval_cache
+
+
+def run_backfill_short_embeddings(batch_size: int = 200, force: bool = False, updated_by: str = "system") -> dict:
+    """Derive truncated, renormalized short vectors from stored full embeddings (no embedding API calls)."""
+    settings = get_settings()
+    short_dims = settings.embedding_short_dimensions
+    if short_dims <= 0:
+        return {"backfilled": 0, "short_dimensions": short_dims}
+
+    session = get_session_factory()()
+    is_postgres = session.bind is not None and session.bind.dialect.name == "postgresql"
+    backfilled = 0
+    last_id = 0
+    try:
+        check_vector_dimensions(session)
+        while True:
+            statement = (
+                select(KBChunk)
+                .options(undefer(KBChunk.embedding_blob))
+                .where(KBChunk.id > last_id, KBChunk.embedding_blob.is_not(None))
+                .order_by(KBChunk.id)
+                .limit(batch_size)
+            )
+            if not force:
+                statement = statement.where(KBChunk.embedding_short_blob.is_(None))
+            rows = session.scalars(statement).all()
+            if not rows:
+                break
+            vector_updates = []
+            for row in rows:
+                last_id = row.id
+                full = decode_embedding(row.embedding_blob, row.embedding_dtype, row.embedding_scale)
+                if full is None or full.size <= short_dims:
+                    continue
+                short = shorten_embedding(full, short_dims)
+                row.embedding_short_blob = encode_embedding(short, SHORT_EMBEDDING_DTYPE).data
+                vector_updates.append(
+                    {"id": row.id, "embedding": "[" + ",".join(f"{value:.10f}" for value in short.tolist()) + "]"}
+                )
+                backfilled += 1
+            if is_postgres and vector_updates:
+                session.execute(
+                    text("UPDATE kb_chunks SET embedding_short = CAST(:embedding AS vector) WHERE id = :id"),
+                    vector_updates,
+                )
+            session.commit()
+
+        summary = {"backfilled": backfilled, "short_dimensions": short_dims}
+        session.add(AuditLog(actor=updated_by, action="kb_short_embedding_backfill", payload_json=summary))
+        session.commit()
+        get_retrieval_cache().invalidate()
+        return summary
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    print(run_backfill_short_embeddings())
@@ -3,14 +3,14 @@ from datetime import datetime, timedelta, timezone
 from sqlalchemy import select
 
 from app.db.models import EscalationTicket, LeadCapture
-from app.db.session import get_session_factory
+from app.db.session import get_read_session
 from app.integrations.email_client import EmailClient
 
 
 def run_daily_digest() -> dict:
     now = datetime.now(timezone.utc)
     since = now - timedelta(days=1)
-    session = get_session_factory()()
+    session = get_read_session()
     email = EmailClient()
 
     try:
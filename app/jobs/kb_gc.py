@@ -0,0 +1,19 @@
+from app.db.models import AuditLog
+from app.db.session import get_session_factory
+from app.services.kb_versions import KBVersionService
+
+
+def run_kb_gc(grace_seconds: int | None = None, updated_by: str = "system") -> dict:
+    """Delete chunks of superseded KB versions that are past the grace period."""
+    session = get_session_factory()()
+    try:
+        summary = KBVersionService(session).collect_garbage(grace_seconds=grace_seconds)
+        session.add(AuditLog(actor=updated_by, action="kb_gc", payload_json=summary))
+        session.commit()
+        return summary
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    print(run_kb_gc())
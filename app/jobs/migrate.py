@@ -0,0 +1,23 @@
+from app.db.init_db import init_db
+from app.db.session import get_session_factory
+from app.services.kb_writer import check_vector_dimensions
+
+
+def run_migrate() -> dict:
+    """
+    Create tables, seed defaults and check the pgvector column dimensions against the settings.
+    Run once per deploy, before the new app version starts; the app itself only creates tables on
+    boot when AUTO_MIGRATE is on (the default outside production). SQL files in db/migrations/
+    are still applied separately.
+    """
+    session = get_session_factory()()
+    try:
+        init_db(session)
+        check_vector_dimensions(session)
+        return {"status": "ok"}
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    print(run_migrate())
@@ -0,0 +1,53 @@
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from app.core.config import get_settings
+from app.db.models import AuditLog, KBChunk
+from app.db.session import get_session_factory
+from app.services.embedding_codec import encode_embedding
+
+
+def run_migrate_embeddings(batch_size: int = 200, updated_by: str = "system") -> dict:
+    """Convert legacy `embedding_json` rows to `embedding_blob`, one committed batch at a time."""
+    settings = get_settings()
+    dtype = settings.embedding_storage_dtype
+    session = get_session_factory()()
+    converted = 0
+    json_bytes = 0
+    blob_bytes = 0
+    last_id = 0
+    try:
+        while True:
+            rows = session.scalars(
+                select(KBChunk)
+                .options(undefer(KBChunk.embedding_json))
+                .where(KBChunk.id > last_id, KBChunk.embedding_json.is_not(None))
+                .order_by(KBChunk.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                last_id = row.id
+                values = row.embedding_json or []
+                if values:
+                    encoded = encode_embedding(values, dtype)
+                    row.embedding_blob = encoded.data
+                    row.embedding_dtype = encoded.dtype
+                    row.embedding_scale = encoded.scale
+                    json_bytes += len(str(values))
+                    blob_bytes += len(encoded.data)
+                    converted += 1
+                row.embedding_json = None
+            session.commit()
+
+        summary = {"converted": converted, "dtype": dtype, "json_bytes": json_bytes, "blob_bytes": blob_bytes}
+        session.add(AuditLog(actor=updated_by, action="kb_embedding_migration", payload_json=summary))
+        session.commit()
+        return summary
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    print(run_migrate_embeddings())
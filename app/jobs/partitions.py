@@ -0,0 +1,15 @@
+from app.db.session import get_session_factory
+from app.services.partitions import PartitionService
+
+
+def run_partition_maintenance(months_ahead: int | None = None) -> dict:
+    """Create upcoming monthly partitions; a no-op until 009_partition_messages_audit.sql has run."""
+    session = get_session_factory()()
+    try:
+        return {"created": PartitionService(session).ensure_future(months_ahead=months_ahead)}
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    print(run_partition_maintenance())
@@ -0,0 +1,15 @@
+from app.db.session import get_session_factory
+from app.services.metric_counters import reconcile_counters
+
+
+def run_reconcile_counters() -> dict:
+    """Recount the rows behind /v1/metrics and correct any counter drift."""
+    session = get_session_factory()()
+    try:
+        return reconcile_counters(session)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    print(run_reconcile_counters())
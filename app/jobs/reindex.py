@@ -1,13 +1,18 @@
 from app.db.session import get_session_factory
-from app.services.kb_service import KBService
+from app.services.reindex_jobs import ReindexJobConflict, ReindexJobService, run_reindex_job
 
 
-def run_reindex(updated_by: str = "system") -> dict:
+def run_reindex(updated_by: str = "system", force: bool = False) -> dict:
+    """Submit and run a reindex job in this process, under the same lock as API-submitted jobs."""
     session = get_session_factory()()
     try:
-        return KBService(session).reindex(urls=None, updated_by=updated_by)
+        job = ReindexJobService(session).submit(urls=None, force=force, requested_by=updated_by)
+        job_id = job.id
+    except ReindexJobConflict as exc:
+        return {"status": "conflict", "active_job_id": exc.active_job_id}
     finally:
         session.close()
+    return run_reindex_job(job_id)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,15 @@
+from app.db.session import get_session_factory
+from app.services.retention_service import RetentionService
+
+
+def run_retention(dry_run: bool = False, updated_by: str = "system") -> dict:
+    """Scheduled retention; resumes an interrupted run instead of starting over."""
+    session = get_session_factory()()
+    try:
+        return RetentionService(session).run_cleanup(updated_by=updated_by, dry_run=dry_run)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    print(run_retention())
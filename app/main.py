@@ -1,6 +1,8 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
@@ -11,17 +13,38 @@ from app.core.config import get_settings
 from app.core.logging import configure_logging
 from app.core.middleware import RateLimitMiddleware, RequestContextMiddleware
 from app.db.init_db import init_db
-from app.db.session import get_session_factory
+from app.db.session import get_async_engine, get_read_router, get_session_factory
+from app.services.warmup import Warmup
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI):
-    session = get_session_factory()()
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    # Agent turns run in the threadpool end to end (graph, model and embedding calls, retrieval).
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(settings.threadpool_size, 1)
+    if settings.auto_migrate_enabled:
+        session = get_session_factory()()
+        try:
+            init_db(session)
+        finally:
+            session.close()
+    # Serve liveness at once; /v1/ready turns 200 when the warmup task finishes.
+    warmup = app.state.warmup
+    task = None
+    if settings.warmup_enabled:
+        task = asyncio.create_task(warmup.run())
+    else:
+        warmup.skip()
     try:
-        init_db(session)
         yield
     finally:
-        session.close()
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        # Pooled asyncio connections belong to this event loop.
+        await get_async_engine().dispose()
+        await get_read_router().dispose_async()
 
 
 def create_app() -> FastAPI:
@@ -30,6 +53,7 @@ def create_app() -> FastAPI:
     configure_logging(settings.log_level)
 
     app = FastAPI(title="Upstate Agent API", version="0.1.0", lifespan=lifespan)
+    app.state.warmup = Warmup()
 
     app.add_middleware(
         CORSMiddleware,
@@ -4,3 +4,11 @@ from pydantic import BaseModel
 class HealthResponse(BaseModel):
     status: str
     app_env: str
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    steps_ms: dict[str, float]
+    primed_queries: int
+    retries: int = 0
+    error: str | None = None
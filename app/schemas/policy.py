@@ -9,6 +9,11 @@ class PolicyUpdateRequest(BaseModel):
 
 class ReindexRequest(BaseModel):
     urls: list[str] | None = None
+    force: bool = False
+    updated_by: str = "admin"
+
+
+class ReindexCancelRequest(BaseModel):
     updated_by: str = "admin"
 
 
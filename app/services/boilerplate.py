@@ -0,0 +1,99 @@
+import hashlib
+import math
+import re
+from collections import defaultdict
+
+SIMHASH_BITS = 64
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def normalize_block(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word 3-shingles; blocks under three words hash exactly. Changing one word of
+    a short footer moves a handful of bits, hence the detector's default `max_distance` of 8.
+    """
+    words = normalize_block(text).split()
+    if len(words) < 3:
+        return _hash64(" ".join(words))
+    weights = [0] * SIMHASH_BITS
+    for index in range(len(words) - 2):
+        value = _hash64(" ".join(words[index : index + 3]))
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class _BandIndex:
+    """
+    Splits fingerprints into `max_distance + 1` disjoint bands: two fingerprints within `max_distance`
+    bits of each other agree exactly on at least one band, so lookups only compare bucket mates.
+    """
+
+    def __init__(self, max_distance: int) -> None:
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self._mask = (1 << self.band_bits) - 1
+        self._buckets: dict[tuple[int, int], set[int]] = defaultdict(set)
+
+    def _keys(self, fingerprint: int):
+        for band in range(self.bands):
+            yield band, fingerprint >> (band * self.band_bits) & self._mask
+
+    def add(self, fingerprint: int) -> None:
+        for key in self._keys(fingerprint):
+            self._buckets[key].add(fingerprint)
+
+    def near(self, fingerprint: int, max_distance: int) -> set[int]:
+        candidates: set[int] = set()
+        for key in self._keys(fingerprint):
+            candidates |= self._buckets.get(key, set())
+        return {candidate for candidate in candidates if hamming(candidate, fingerprint) <= max_distance}
+
+
+class BoilerplateDetector:
+    """
+    Flags text blocks (header, navigation, footer, contact strip) that recur, exactly or nearly,
+    on at least `max(min_pages, ratio * pages)` pages of a site.
+    """
+
+    def __init__(self, min_pages: int = 3, ratio: float = 0.5, max_distance: int = 8) -> None:
+        self.min_pages = min_pages
+        self.ratio = ratio
+        self.max_distance = max_distance
+        self._flagged = _BandIndex(max_distance)
+        self.flagged_count = 0
+
+    def fit(self, pages: dict[str, list[int]]) -> "BoilerplateDetector":
+        """`pages` maps each page URL to the SimHash fingerprints of its blocks."""
+        threshold = max(self.min_pages, math.ceil(self.ratio * len(pages)))
+        if len(pages) < threshold:
+            return self
+        pages_by_fingerprint: dict[int, set[str]] = defaultdict(set)
+        for url, fingerprints in pages.items():
+            for fingerprint in fingerprints:
+                pages_by_fingerprint[fingerprint].add(url)
+        index = _BandIndex(self.max_distance)
+        for fingerprint in pages_by_fingerprint:
+            index.add(fingerprint)
+        for fingerprint in pages_by_fingerprint:
+            seen_on: set[str] = set()
+            for neighbour in index.near(fingerprint, self.max_distance):
+                seen_on |= pages_by_fingerprint[neighbour]
+            if len(seen_on) >= threshold:
+                self._flagged.add(fingerprint)
+                self.flagged_count += 1
+        return self
+
+    def is_boilerplate(self, fingerprint: int) -> bool:
+        return bool(self.flagged_count and self._flagged.near(fingerprint, self.max_distance))
@@ -0,0 +1,106 @@
+import hashlib
+import re
+
+from app.core.config import get_settings
+from app.services.html_extract import Section, section_blocks
+
+# Sentence ends inside a block; block (line) breaks always separate units.
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
+
+def _unit_hash(unit: str) -> int:
+    return int.from_bytes(hashlib.blake2b(unit.lower().encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def split_units(text: str) -> list[str]:
+    """Sentences of each block, whitespace-normalized, in page order."""
+    units = []
+    for block in text.split("\n"):
+        for sentence in _SENTENCE_END.split(block):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                units.append(sentence)
+    return units
+
+
+def _split_long(unit: str, max_chars: int) -> list[str]:
+    pieces, current = [], ""
+    for word in unit.split(" "):
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    # Words longer than max_chars are hard-cut.
+    return [piece[start : start + max_chars] for piece in pieces for start in range(0, len(piece), max_chars)]
+
+
+def content_defined_chunks(text: str, min_chars: int = 300, max_chars: int = 800, anchor_divisor: int = 4) -> list[str]:
+    return _chunk_units([(unit, False) for unit in split_units(text)], min_chars, max_chars, anchor_divisor)
+
+
+def _chunk_units(units: list[tuple[str, bool]], min_chars: int, max_chars: int, anchor_divisor: int) -> list[str]:
+    """
+    Chunks whose boundaries depend only on nearby content. `units` are (sentence, is_heading) pairs.
+    Text is cut before a heading or after a sentence whose hash is 0 mod `anchor_divisor`, once the
+    chunk holds `min_chars`, and before a sentence that would push it past `max_chars`. An edit only
+    moves boundaries up to the next anchor, so the chunks after it come out byte-identical and keep
+    their content-derived ids.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for unit, is_heading in units:
+        if current and is_heading and size >= min_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        for piece in _split_long(unit, max_chars) if len(unit) > max_chars else [unit]:
+            if current and size + 1 + len(piece) > max_chars:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + (1 if size else 0)
+            if size >= min_chars and not is_heading and _unit_hash(piece) % anchor_divisor == 0:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def fixed_chunks(text: str, size: int = 800, overlap: int = 120) -> list[str]:
+    text = re.sub(r"\s+", " ", text)
+    if len(text) <= size:
+        return [text]
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        chunks.append(text[start:end])
+        if end == len(text):
+            break
+        start = end - overlap
+    return chunks
+
+
+def chunk_page(text: str) -> list[str]:
+    """Chunk plain page text with the configured strategy (`KB_CHUNKING`)."""
+    settings = get_settings()
+    if settings.kb_chunking.strip().lower() == "fixed":
+        return fixed_chunks(text, size=settings.kb_chunk_max_chars)
+    return content_defined_chunks(text, min_chars=settings.kb_chunk_min_chars, max_chars=settings.kb_chunk_max_chars)
+
+
+def chunk_sections(sections: list[Section]) -> list[str]:
+    """Chunk heading-delimited sections: a heading starts a new chunk unless the current one is still short."""
+    settings = get_settings()
+    if settings.kb_chunking.strip().lower() == "fixed":
+        text = "\n".join(section_blocks(sections))
+        return fixed_chunks(text, size=settings.kb_chunk_max_chars) if text else []
+    units: list[tuple[str, bool]] = []
+    for heading, lines in sections:
+        if heading:
+            units.append((heading, True))
+        units.extend((unit, False) for unit in split_units("\n".join(lines)))
+    return _chunk_units(units, settings.kb_chunk_min_chars, settings.kb_chunk_max_chars, anchor_divisor=4)
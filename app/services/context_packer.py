@@ -0,0 +1,130 @@
+import math
+import re
+
+from app.core.config import get_settings
+
+CHARS_PER_TOKEN = 4
+MIN_OVERLAP_CHARS = 20
+
+
+class ContextPacker:
+    """
+    Turns raw retrieval hits into prompt context: adjacent chunks of the same page are stitched
+    back together, near-duplicate passages are dropped, and passages are added by score until
+    the token budget is spent.
+    """
+
+    def __init__(
+        self,
+        token_budget: int | None = None,
+        dedupe_threshold: float | None = None,
+        max_overlap_chars: int = 200,
+    ) -> None:
+        settings = get_settings()
+        self.token_budget = token_budget if token_budget is not None else settings.context_token_budget
+        self.dedupe_threshold = dedupe_threshold if dedupe_threshold is not None else settings.context_dedupe_threshold
+        self.max_overlap_chars = max_overlap_chars
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    def pack(self, hits: list[dict]) -> list[dict]:
+        passages = self._merge_adjacent(hits)
+        passages.sort(key=lambda item: item["score"], reverse=True)
+        passages = self._drop_near_duplicates(passages)
+
+        packed: list[dict] = []
+        remaining = max(self.token_budget, 0)
+        for passage in passages:
+            if remaining <= 0:
+                break
+            text = passage["snippet"]
+            cost = self.estimate_tokens(text)
+            if cost > remaining:
+                text = self._truncate(text, remaining * CHARS_PER_TOKEN)
+                if not text:
+                    continue
+                cost = self.estimate_tokens(text)
+            packed.append({**passage, "snippet": text})
+            remaining -= cost
+        return packed
+
+    def _merge_adjacent(self, hits: list[dict]) -> list[dict]:
+        by_source: dict[str, list[dict]] = {}
+        for hit in hits:
+            by_source.setdefault(hit["source_url"], []).append(hit)
+
+        merged: list[dict] = []
+        for source_url, group in by_source.items():
+            group.sort(key=lambda item: (item.get("chunk_index") is None, item.get("chunk_index") or 0))
+            current: dict | None = None
+            for hit in group:
+                text = hit.get("content") or hit.get("snippet", "")
+                index = hit.get("chunk_index")
+                if (
+                    current is not None
+                    and index is not None
+                    and current["last_index"] is not None
+                    and index == current["last_index"] + 1
+                ):
+                    current["snippet"] = self._stitch(current["snippet"], text)
+                    current["score"] = max(current["score"], float(hit.get("score", 0.0)))
+                    current["last_index"] = index
+                    continue
+                if current is not None:
+                    merged.append(current)
+                current = {
+                    "source_url": source_url,
+                    "title": hit.get("title", ""),
+                    "snippet": text,
+                    "score": float(hit.get("score", 0.0)),
+                    "last_index": index,
+                }
+            if current is not None:
+                merged.append(current)
+
+        for passage in merged:
+            passage.pop("last_index", None)
+        return merged
+
+    def _stitch(self, left: str, right: str) -> str:
+        # Chunks overlap by a fixed window; find the longest suffix of `left` that prefixes `right`.
+        limit = min(len(left), len(right), self.max_overlap_chars)
+        for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+            if left.endswith(right[:size]):
+                return left + right[size:]
+        return f"{left} {right}"
+
+    def _drop_near_duplicates(self, passages: list[dict]) -> list[dict]:
+        kept: list[tuple[set[tuple[str, ...]], dict]] = []
+        for passage in passages:
+            shingles = self._shingles(passage["snippet"])
+            if any(self._containment(shingles, other) >= self.dedupe_threshold for other, _ in kept):
+                continue
+            kept.append((shingles, passage))
+        return [passage for _, passage in kept]
+
+    @staticmethod
+    def _shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+        tokens = re.findall(r"[a-z0-9]+", text.lower())
+        if len(tokens) < size:
+            return {tuple(tokens)} if tokens else set()
+        return {tuple(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+    @staticmethod
+    def _containment(a: set, b: set) -> float:
+        # Overlap relative to the smaller passage, so a snippet wholly inside a merged passage counts as a duplicate.
+        if not a or not b:
+            return 0.0
+        return len(a & b) / min(len(a), len(b))
+
+    @staticmethod
+    def _truncate(text: str, max_chars: int) -> str:
+        if max_chars <= 0:
+            return ""
+        if len(text) <= max_chars:
+            return text
+        cut = text[:max_chars]
+        space = cut.rfind(" ")
+        return cut[:space] if space > 0 else cut
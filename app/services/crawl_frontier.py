@@ -0,0 +1,179 @@
+import logging
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import KBCrawlFrontier, KBSourcePage
+from app.services.crawler import Crawler, FetchedPage, canonicalize_url, is_crawlable_link
+
+logger = logging.getLogger(__name__)
+
+# Lower sorts first: sitemap entries whose lastmod is newer than our last recorded change,
+# then seeds and discovered links, then sitemap entries that report no change since.
+PRIORITY_CHANGED = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_UNCHANGED = 2
+
+
+class CrawlFrontier:
+    """
+    Persisted breadth-first frontier for discover-mode crawls. Seeds come from KB_SOURCE_URLS plus
+    each host's sitemap; fetched pages add their same-host links up to `max_depth`, capped at
+    `max_pages` URLs per crawl. Rows stay `pending` until their page is processed, so a crawl that
+    is interrupted resumes from the remaining rows instead of refetching completed pages.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        crawler: Crawler,
+        max_depth: int | None = None,
+        max_pages: int | None = None,
+        respect_robots: bool | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.db = db
+        self.crawler = crawler
+        self.max_depth = settings.kb_crawl_max_depth if max_depth is None else max_depth
+        self.max_pages = settings.kb_crawl_max_pages if max_pages is None else max_pages
+        self.respect_robots = settings.kb_crawl_respect_robots if respect_robots is None else respect_robots
+        self.crawl_id: str | None = None
+        self.resumed = False
+        self.allowed_hosts: set[str] = set()
+        self.counts = {"discovered": 0, "sitemap": 0, "robots_blocked": 0, "over_budget": 0}
+        self._size = 0
+
+    def start(self, seeds: list[str], resumable: set[str] | None = None) -> str:
+        """
+        Resume the unfinished crawl if one exists (and, when `resumable` is given, its id is in it),
+        otherwise seed a new one.
+        """
+        canonical_seeds = [url for url in (canonicalize_url(seed) for seed in seeds) if url]
+        self.allowed_hosts = {urlsplit(url).netloc for url in canonical_seeds}
+        unfinished = self.db.scalar(
+            select(KBCrawlFrontier.crawl_id).where(KBCrawlFrontier.status == "pending").order_by(KBCrawlFrontier.id).limit(1)
+        )
+        if unfinished and (resumable is None or unfinished in resumable):
+            self.crawl_id = unfinished
+            self.resumed = True
+            self._size = self.db.scalar(
+                select(func.count()).select_from(KBCrawlFrontier).where(KBCrawlFrontier.crawl_id == unfinished)
+            )
+            logger.info("resuming kb crawl %s with %s urls in frontier", unfinished, self._size)
+            return unfinished
+
+        crawl_id = uuid.uuid4().hex
+        self.crawl_id = crawl_id
+        self.db.execute(delete(KBCrawlFrontier).where(KBCrawlFrontier.crawl_id != crawl_id))
+        self._enqueue([(url, None) for url in canonical_seeds], depth=0)
+        last_changed = {
+            url: changed
+            for url, changed in self.db.execute(select(KBSourcePage.url, KBSourcePage.last_changed_at)).all()
+        }
+        # Every host's entries are ranked together, so lastmod decides which pages fit the budget.
+        entries = []
+        for origin in dict.fromkeys(f"{urlsplit(url).scheme}://{urlsplit(url).netloc}" for url in canonical_seeds):
+            entries.extend(self.crawler.sitemap_entries(origin + "/"))
+        self.counts["sitemap"] += len(entries)
+        self._enqueue(entries, depth=0, last_changed=last_changed)
+        self.db.commit()
+        return crawl_id
+
+    def batches(self, size: int) -> Iterator[list[KBCrawlFrontier]]:
+        """Yield pending rows in priority order until none remain; callers mark each row via `complete`."""
+        while True:
+            batch = self.db.scalars(
+                select(KBCrawlFrontier)
+                .where(KBCrawlFrontier.crawl_id == self.crawl_id, KBCrawlFrontier.status == "pending")
+                .order_by(KBCrawlFrontier.priority, KBCrawlFrontier.depth, KBCrawlFrontier.id)
+                .limit(size)
+            ).all()
+            if not batch:
+                return
+            yield batch
+
+    def complete(self, row: KBCrawlFrontier, page: FetchedPage, links: list[str]) -> None:
+        row.status = "error" if page.status == "error" else "done"
+        row.updated_at = datetime.now(timezone.utc)
+        if row.status == "done" and row.depth < self.max_depth:
+            self._enqueue([(link, None) for link in links], depth=row.depth + 1)
+
+    def urls(self) -> set[str]:
+        return set(self.db.scalars(select(KBCrawlFrontier.url).where(KBCrawlFrontier.crawl_id == self.crawl_id)).all())
+
+    def stats(self) -> dict:
+        by_status = dict(
+            self.db.execute(
+                select(KBCrawlFrontier.status, func.count())
+                .where(KBCrawlFrontier.crawl_id == self.crawl_id)
+                .group_by(KBCrawlFrontier.status)
+            ).all()
+        )
+        return {"crawl_id": self.crawl_id, "resumed": self.resumed, **self.counts, "frontier": by_status}
+
+    def _enqueue(
+        self,
+        entries: list[tuple[str, str | None]],
+        depth: int,
+        last_changed: dict[str, datetime | None] | None = None,
+    ) -> None:
+        candidates = {}
+        for url, lastmod in entries:
+            canonical = canonicalize_url(url)
+            if canonical and any(is_crawlable_link(canonical, host) for host in self.allowed_hosts):
+                candidates.setdefault(canonical, lastmod)
+        if not candidates:
+            return
+        known = set(
+            self.db.scalars(
+                select(KBCrawlFrontier.url).where(
+                    KBCrawlFrontier.crawl_id == self.crawl_id, KBCrawlFrontier.url.in_(list(candidates))
+                )
+            ).all()
+        )
+        ranked = sorted(
+            ((url, lastmod, _priority(lastmod, (last_changed or {}).get(url))) for url, lastmod in candidates.items()),
+            key=lambda item: item[2],
+        )
+        for url, lastmod, priority in ranked:
+            if url in known:
+                continue
+            if self._size >= self.max_pages:
+                self.counts["over_budget"] += 1
+                continue
+            if self.respect_robots and not self.crawler.allowed(url):
+                self.counts["robots_blocked"] += 1
+                continue
+            self.db.add(
+                KBCrawlFrontier(
+                    crawl_id=self.crawl_id,
+                    url=url,
+                    depth=depth,
+                    priority=priority,
+                    lastmod=lastmod,
+                )
+            )
+            self._size += 1
+            self.counts["discovered"] += 1
+        self.db.flush()
+
+
+def _priority(lastmod: str | None, last_changed: datetime | None) -> int:
+    if not lastmod:
+        return PRIORITY_DEFAULT
+    try:
+        modified = datetime.fromisoformat(lastmod.replace("Z", "+00:00"))
+    except ValueError:
+        return PRIORITY_DEFAULT
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    if last_changed is None:
+        return PRIORITY_CHANGED
+    if last_changed.tzinfo is None:
+        last_changed = last_changed.replace(tzinfo=timezone.utc)
+    return PRIORITY_CHANGED if modified > last_changed else PRIORITY_UNCHANGED
@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from app.core.config import get_settings
+from app.services.chunking import chunk_sections
+from app.services.html_extract import ExtractedPage, Section, get_extractor, section_blocks
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+NON_HTML_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".zip", ".mp3", ".mp4", ".mov", ".doc", ".docx", ".xls", ".xlsx", ".xml", ".txt",
+)
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    status: str  # "fetched", "not_modified" or "error"
+    http_status: int | None = None
+    title: str = ""
+    chunks: list[str] = field(default_factory=list)
+    content_hash: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    links: list[str] = field(default_factory=list)
+    sections: list[Section] = field(default_factory=list)
+    error: str | None = None
+    fetch_ms: float = 0.0
+    parse_ms: float = 0.0
+
+    @property
+    def blocks(self) -> list[str]:
+        return section_blocks(self.sections)
+
+
+def canonicalize_url(url: str, base: str | None = None) -> str | None:
+    """
+    Normalize a crawlable URL so variants dedupe: absolute, lowercase scheme/host, default port,
+    query string and fragment dropped, no trailing slash except at the root. None for non-HTTP links.
+    """
+    absolute = urljoin(base, url.strip()) if base else url.strip()
+    parts = urlsplit(absolute)
+    scheme = parts.scheme.lower()
+    if scheme not in {"http", "https"} or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return urlunsplit((scheme, host, path, "", ""))
+
+
+def is_crawlable_link(url: str, allowed_host: str) -> bool:
+    parts = urlsplit(url)
+    return parts.netloc == allowed_host and not parts.path.lower().endswith(NON_HTML_EXTENSIONS)
+
+
+def extract_page(html: str, base_url: str | None = None) -> ExtractedPage:
+    """Main-content sections via the configured backend (`KB_HTML_EXTRACTOR`); links canonicalized against `base_url`."""
+    page = get_extractor(get_settings().kb_html_extractor).extract(html)
+    links = []
+    if base_url:
+        links = [canonical for href in page.links if (canonical := canonicalize_url(href, base=base_url))]
+    page.links = list(dict.fromkeys(links))
+    return page
+
+
+def parse_and_chunk(html: str, base_url: str | None = None) -> tuple:
+    """
+    Worker-pool entry point (must stay module-level so process pools can pickle it).
+    Returns (title, chunks, content_hash, links, sections, parse_ms).
+    """
+    start = time.perf_counter()
+    page = extract_page(html, base_url)
+    text = page.text
+    chunks = chunk_sections(page.sections) if text else []
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return page.title, chunks, content_hash, page.links, page.sections, (time.perf_counter() - start) * 1000
+
+
+class Crawler:
+    """
+    Fetches pages on a bounded thread pool with conditional GETs (If-None-Match / If-Modified-Since)
+    and hands 200 responses to a parse pool, yielding pages as they finish. Fetching and parsing
+    overlap; embedding does not: the reindex collects a whole batch first so boilerplate can be
+    judged across its pages, then embeds and writes the batch page by page.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        timeout: float | None = None,
+        parse_processes: int | None = None,
+    ) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        settings = get_settings()
+        self.concurrency = max(1, concurrency or settings.kb_fetch_concurrency)
+        self.timeout = timeout or settings.kb_fetch_timeout_seconds
+        self.parse_processes = settings.kb_parse_processes if parse_processes is None else parse_processes
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = settings.kb_crawl_user_agent
+        self.user_agent = settings.kb_crawl_user_agent
+        self._robots: dict[str, RobotFileParser | None] = {}
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, url: str, headers: dict[str, str]) -> "requests.Response":
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def _fetch(self, url: str, validators: tuple[str | None, str | None]) -> tuple[FetchedPage, str | None]:
+        etag, last_modified = validators
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self._request(url, headers)
+            fetch_ms = (time.perf_counter() - start) * 1000
+            if response.status_code == 304:
+                return FetchedPage(url=url, status="not_modified", http_status=304, fetch_ms=fetch_ms), None
+            response.raise_for_status()
+        except Exception as exc:  # noqa: BLE001
+            page = FetchedPage(
+                url=url,
+                status="error",
+                http_status=response.status_code if response is not None else None,
+                error=str(exc),
+                fetch_ms=(time.perf_counter() - start) * 1000,
+            )
+            return page, None
+        page = FetchedPage(
+            url=url,
+            status="fetched",
+            http_status=response.status_code,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            fetch_ms=fetch_ms,
+        )
+        return page, response.text
+
+    def _parse_pool(self) -> Executor:
+        if self.parse_processes > 0:
+            return ProcessPoolExecutor(max_workers=self.parse_processes)
+        return ThreadPoolExecutor(max_workers=max(1, self.concurrency // 2), thread_name_prefix="kb-parse")
+
+    def crawl(
+        self,
+        urls: list[str],
+        validators: dict[str, tuple[str | None, str | None]] | None = None,
+    ) -> Iterator[FetchedPage]:
+        validators = validators or {}
+        with (
+            ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="kb-fetch") as fetch_pool,
+            self._parse_pool() as parse_pool,
+        ):
+            fetches = {fetch_pool.submit(self._fetch, url, validators.get(url, (None, None))) for url in urls}
+            parses: dict[Future, FetchedPage] = {}
+            pending: set[Future] = set(fetches)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetches:
+                        page, html = future.result()
+                        if html is None:
+                            yield page
+                            continue
+                        parse_future = parse_pool.submit(parse_and_chunk, html, page.url)
+                        parses[parse_future] = page
+                        pending.add(parse_future)
+                        continue
+                    page = parses.pop(future)
+                    try:
+                        page.title, page.chunks, page.content_hash, page.links, page.sections, page.parse_ms = future.result()
+                    except Exception as exc:  # noqa: BLE001
+                        page.status = "error"
+                        page.error = f"parse failed: {exc}"
+                    yield page
+
+    def robots_for(self, url: str) -> RobotFileParser | None:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._robots:
+            parser: RobotFileParser | None = None
+            try:
+                response = self._request(f"{origin}/robots.txt", {})
+                if response.status_code == 200:
+                    parser = RobotFileParser()
+                    parser.parse(response.text.splitlines())
+            except Exception as exc:  # noqa: BLE001
+                logger.info("robots.txt unavailable for %s: %s", origin, exc)
+            self._robots[origin] = parser
+        return self._robots[origin]
+
+    def allowed(self, url: str) -> bool:
+        parser = self.robots_for(url)
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    def sitemap_entries(self, seed_url: str, limit: int | None = None) -> list[tuple[str, str | None]]:
+        """
+        (canonical url, lastmod) pairs from robots.txt `Sitemap:` lines or /sitemap.xml, index files
+        included, in document order. `limit` stops reading early; None reads every entry.
+        """
+        parts = urlsplit(seed_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        robots = self.robots_for(seed_url)
+        queue = list((robots.site_maps() if robots else None) or [f"{origin}/sitemap.xml"])
+        seen_sitemaps: set[str] = set()
+        entries: dict[str, str | None] = {}
+        while queue and (limit is None or len(entries) < limit) and len(seen_sitemaps) < 20:
+            sitemap_url = queue.pop(0)
+            if sitemap_url in seen_sitemaps:
+                continue
+            seen_sitemaps.add(sitemap_url)
+            try:
+                response = self._request(sitemap_url, {})
+                response.raise_for_status()
+                root = ET.fromstring(response.content)
+            except Exception as exc:  # noqa: BLE001
+                logger.info("sitemap unavailable at %s: %s", sitemap_url, exc)
+                continue
+            is_index = root.tag.endswith("sitemapindex")
+            for node in root:
+                loc = next((child.text for child in node if child.tag.endswith("loc") and child.text), None)
+                if not loc:
+                    continue
+                if is_index:
+                    queue.append(loc.strip())
+                    continue
+                canonical = canonicalize_url(loc)
+                if canonical:
+                    lastmod = next((child.text for child in node if child.tag.endswith("lastmod") and child.text), None)
+                    entries.setdefault(canonical, lastmod.strip() if lastmod else None)
+                if limit is not None and len(entries) >= limit:
+                    break
+        return list(entries.items())
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+# Shortened (Matryoshka) vectors are always stored as float16; they are small and only used for the first pass.
+SHORT_EMBEDDING_DTYPE = "float16"
+
+
+@dataclass
+class EncodedEmbedding:
+    data: bytes
+    dtype: str
+    scale: float | None
+    dimensions: int
+
+
+def encode_embedding(values, dtype: str = "float16") -> EncodedEmbedding:
+    """
+    Pack an embedding into little-endian bytes.
+    `int8` uses symmetric scalar quantization: value ~= int8 * scale.
+    """
+    import numpy as np
+
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    vector = np.asarray(values, dtype=np.float32)
+    if dtype == "int8":
+        peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype("<i1")
+        return EncodedEmbedding(data=quantized.tobytes(), dtype=dtype, scale=scale, dimensions=int(vector.size))
+    packed = vector.astype("<f4" if dtype == "float32" else "<f2")
+    return EncodedEmbedding(data=packed.tobytes(), dtype=dtype, scale=None, dimensions=int(vector.size))
+
+
+def embedding_view(data: bytes, dtype: str) -> "np.ndarray":
+    """Zero-copy read-only view over stored bytes in their storage dtype."""
+    import numpy as np
+
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    storage = {"float32": "<f4", "float16": "<f2", "int8": "<i1"}[dtype]
+    return np.frombuffer(data, dtype=storage)
+
+
+def decode_embedding(data: bytes | None, dtype: str | None, scale: float | None = None) -> "np.ndarray | None":
+    """Float view of a stored embedding; only float32 storage is returned without a copy."""
+    import numpy as np
+
+    if not data or not dtype:
+        return None
+    view = embedding_view(data, dtype)
+    if dtype == "float32":
+        return view
+    if dtype == "int8":
+        return view.astype(np.float32) * np.float32(scale if scale else 1.0)
+    return view.astype(np.float32)
+
+
+def shorten_embedding(values, dimensions: int) -> "np.ndarray":
+    """Matryoshka truncation: keep the leading `dimensions` components and renormalize to unit length."""
+    import numpy as np
+
+    vector = np.asarray(values, dtype=np.float32)[:dimensions]
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
@@ -1,3 +1,5 @@
+import uuid
+
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
@@ -6,45 +8,26 @@ from app.integrations.email_client import EmailClient
 from app.services.privacy_service import PrivacyService
 
 
-class EscalationService:
-    def __init__(self, db: Session) -> None:
-        self.db = db
+class EscalationNotifier:
+    """Sends the escalation email for a committed ticket; needs no database session."""
+
+    def __init__(self) -> None:
         self.email = EmailClient()
         self.settings = get_settings()
         self.privacy = PrivacyService()
 
-    def create_ticket(
-        self,
-        session_id: str,
-        channel: str,
-        reason: str,
-        conversation_excerpt: str,
-        priority: str = "medium",
-    ) -> EscalationTicket:
-        sanitized_excerpt = self.privacy.redact_text(conversation_excerpt or "")
-        ticket = EscalationTicket(
-            session_id=session_id,
-            channel=channel,
-            reason=reason,
-            conversation_excerpt=sanitized_excerpt,
-            priority=priority,
-        )
-        self.db.add(ticket)
-        self.db.commit()
-        self.db.refresh(ticket)
-
+    def notify(self, ticket: EscalationTicket) -> None:
         self.email.send(
-            subject=f"[Escalation] {priority.upper()} - {reason}",
+            subject=f"[Escalation] {ticket.priority.upper()} - {ticket.reason}",
             body=self._build_email_body(
                 ticket_id=ticket.id,
-                session_id=session_id,
-                channel=channel,
-                reason=reason,
-                conversation_excerpt=sanitized_excerpt,
-                priority=priority,
+                session_id=ticket.session_id,
+                channel=ticket.channel,
+                reason=ticket.reason,
+                conversation_excerpt=ticket.conversation_excerpt,
+                priority=ticket.priority,
             ),
         )
-        return ticket
 
     def _build_email_body(
         self,
@@ -73,3 +56,56 @@ class EscalationService:
         excerpt = redacted[: max(self.settings.escalation_email_excerpt_max_chars, 1)]
         base.extend(["", "Excerpt (redacted):", excerpt])
         return "\n".join(base)
+
+
+class EscalationService:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.notifier = EscalationNotifier()
+
+    def create_ticket(
+        self,
+        session_id: str,
+        channel: str,
+        reason: str,
+        conversation_excerpt: str,
+        priority: str = "medium",
+    ) -> EscalationTicket:
+        ticket = self.build_ticket(session_id, channel, reason, conversation_excerpt, priority)
+        self.db.add(ticket)
+        self.db.commit()
+        self.db.refresh(ticket)
+        self.notifier.notify(ticket)
+        return ticket
+
+    def build_ticket(
+        self,
+        session_id: str,
+        channel: str,
+        reason: str,
+        conversation_excerpt: str,
+        priority: str = "medium",
+    ) -> EscalationTicket:
+        return build_ticket(session_id, channel, reason, conversation_excerpt, priority)
+
+
+def build_ticket(
+    session_id: str,
+    channel: str,
+    reason: str,
+    conversation_excerpt: str,
+    priority: str = "medium",
+) -> EscalationTicket:
+    """
+    Unsaved ticket with a redacted excerpt. Callers that manage their own transaction add it and
+    send it with `EscalationNotifier.notify` after commit.
+    """
+    return EscalationTicket(
+        id=str(uuid.uuid4()),
+        session_id=session_id,
+        channel=channel,
+        reason=reason,
+        conversation_excerpt=PrivacyService().redact_text(conversation_excerpt or ""),
+        priority=priority,
+        status="open",
+    )
@@ -0,0 +1,180 @@
+import importlib.util
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+# Removed with their subtree: never page content.
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "nav", "footer", "aside", "form", "button"}
+SKIP_ROLES = {"navigation", "contentinfo", "banner", "search"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+CONTENT_TAGS = {"main", "article"}
+# Elements that start a new line of text; everything else flows inline.
+BLOCK_TAGS = HEADING_TAGS | {
+    "address", "article", "blockquote", "body", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "header", "hr", "li", "main", "ol", "p", "pre", "section", "table", "tbody", "thead", "tr", "ul",
+}
+
+Section = tuple[str, list[str]]
+
+
+def section_blocks(sections: list[Section]) -> list[str]:
+    """Headings and text lines in page order."""
+    return [line for heading, lines in sections for line in ([heading] if heading else []) + lines]
+
+
+@dataclass
+class ExtractedPage:
+    title: str = ""
+    links: list[str] = field(default_factory=list)  # raw hrefs, in document order
+    # (heading, lines) in page order; the first section's heading is "" for text before any heading.
+    sections: list[Section] = field(default_factory=list)
+
+    @property
+    def blocks(self) -> list[str]:
+        return section_blocks(self.sections)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.blocks)
+
+
+class _SectionBuilder:
+    """Turns start/text/end events into heading-delimited sections of whitespace-normalized lines."""
+
+    def __init__(self) -> None:
+        self.sections: list[Section] = [("", [])]
+        self._words: list[str] = []
+        self._heading_depth = 0
+
+    def start(self, tag: str) -> None:
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in HEADING_TAGS:
+            self._heading_depth += 1
+
+    def text(self, value: str | None) -> None:
+        if value:
+            self._words.extend(value.split())
+
+    def end(self, tag: str) -> None:
+        if tag in HEADING_TAGS and self._heading_depth:
+            self._heading_depth -= 1
+            heading = " ".join(self._words)
+            self._words = []
+            if heading:
+                self.sections.append((heading, []))
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._words and not self._heading_depth:
+            self.sections[-1][1].append(" ".join(self._words))
+            self._words = []
+
+    def finish(self) -> list[Section]:
+        self._flush()
+        return [(heading, lines) for heading, lines in self.sections if heading or lines]
+
+
+def _skip(tag: str, attributes, in_content: bool) -> bool:
+    if tag in SKIP_TAGS or (attributes.get("role") or "").lower() in SKIP_ROLES or attributes.get("aria-hidden") == "true":
+        return True
+    # A page-level <header> is the site banner; one inside <main>/<article> holds the content's title.
+    return tag == "header" and not in_content
+
+
+class SoupExtractor:
+    """Pure-Python fallback on BeautifulSoup's html.parser."""
+
+    name = "soup"
+
+    def extract(self, html: str) -> ExtractedPage:
+        # Imported on first parse: only reindex jobs extract HTML, so app startup never pays for bs4.
+        from bs4 import BeautifulSoup, NavigableString, Tag
+        from bs4.element import PreformattedString
+
+        soup = BeautifulSoup(html, "html.parser")
+        title = " ".join(soup.title.get_text().split()) if soup.title else ""
+        hrefs = [anchor["href"] for anchor in soup.find_all("a", href=True)]
+        root = soup.find("main") or soup.find("article") or soup.body or soup
+        builder = _SectionBuilder()
+        # Iterative walk so deeply nested markup cannot hit the recursion limit.
+        stack: list[tuple[str, object, bool]] = [("node", root, root.name in CONTENT_TAGS)]
+        while stack:
+            kind, node, in_content = stack.pop()
+            if kind == "end":
+                builder.end(node)
+            elif isinstance(node, NavigableString):
+                if not isinstance(node, PreformattedString):
+                    builder.text(str(node))
+            elif isinstance(node, Tag) and not _skip(node.name, node.attrs, in_content):
+                builder.start(node.name)
+                child_in_content = in_content or node.name in CONTENT_TAGS
+                stack.append(("end", node.name, in_content))
+                stack.extend(("node", child, child_in_content) for child in reversed(node.contents))
+        return ExtractedPage(title=title, links=hrefs, sections=builder.finish())
+
+
+class LxmlExtractor:
+    """libxml2-backed parser; several times faster than html.parser on large pages."""
+
+    name = "lxml"
+
+    def extract(self, html: str) -> ExtractedPage:
+        from lxml import etree
+        from lxml import html as lxml_html
+
+        if not html.strip():
+            return ExtractedPage()
+        try:
+            document = lxml_html.document_fromstring(html)
+        except ValueError:
+            # str input that still carries an XML encoding declaration.
+            document = lxml_html.document_fromstring(html.encode("utf-8"))
+        title = " ".join((document.findtext(".//title") or "").split())
+        hrefs = [str(href) for href in document.xpath("//a/@href")]
+        root = document.find(".//main")
+        if root is None:
+            root = document.find(".//article")
+        content_depth = 0 if root is None else 1
+        if root is None:
+            root = document.find("body") if document.find("body") is not None else document
+        builder = _SectionBuilder()
+        skipped = set()
+        walker = etree.iterwalk(root, events=("start", "end"))
+        for event, element in walker:
+            tag = element.tag if isinstance(element.tag, str) else None  # comments and PIs have no str tag
+            if event == "start":
+                if tag is None or _skip(tag, element.attrib, content_depth > 0):
+                    skipped.add(element)
+                    walker.skip_subtree()
+                    continue
+                content_depth += tag in CONTENT_TAGS
+                builder.start(tag)
+                builder.text(element.text)
+                continue
+            if element not in skipped:
+                builder.end(tag)
+                content_depth -= tag in CONTENT_TAGS
+            if element is not root:
+                builder.text(element.tail)
+        return ExtractedPage(title=title, links=hrefs, sections=builder.finish())
+
+
+EXTRACTORS: dict[str, Callable[[], SoupExtractor | LxmlExtractor]] = {"soup": SoupExtractor, "lxml": LxmlExtractor}
+
+
+def lxml_available() -> bool:
+    # Optional: pip install "upstate-agent[html]". Checked without importing it.
+    return importlib.util.find_spec("lxml") is not None
+
+
+def get_extractor(name: str = "auto") -> SoupExtractor | LxmlExtractor:
+    """`auto` picks lxml when it is installed and falls back to BeautifulSoup's html.parser."""
+    name = (name or "auto").strip().lower()
+    if name == "auto":
+        name = "lxml" if lxml_available() else "soup"
+    if name == "lxml" and not lxml_available():
+        raise RuntimeError("KB_HTML_EXTRACTOR=lxml but lxml is not installed")
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor: {name}")
+    return EXTRACTORS[name]()
@@ -1,15 +1,32 @@
 import hashlib
-import re
+import time
+from collections import defaultdict
+from collections.abc import Callable
 from datetime import datetime, timezone
+from urllib.parse import urlsplit
 
-import requests
-from bs4 import BeautifulSoup
-from sqlalchemy import select, text
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
-from app.db.models import AuditLog, KBChunk
+from app.db.models import AuditLog, KBChunk, KBSourcePage, KBVersion
+from app.services.boilerplate import BoilerplateDetector, hamming, simhash
+from app.services.chunking import chunk_page, chunk_sections
+from app.services.crawl_frontier import CrawlFrontier
+from app.services.crawler import Crawler, FetchedPage
+from app.services.embedding_codec import SHORT_EMBEDDING_DTYPE, encode_embedding, shorten_embedding
+from app.services.html_extract import section_blocks
+from app.services.kb_versions import KBVersionService
+from app.services.kb_writer import KBChunkWriter
 from app.services.llm_service import LLMService
+from app.services.retrieval_cache import get_retrieval_cache
+
+MAX_REPORTED_ERRORS = 50
+MAX_REPORTED_PAGES = 50
+# While a batch is still being fetched and parsed, progress (the job heartbeat) is reported this often.
+FETCH_HEARTBEAT_SECONDS = 10.0
+# Synthetic per-origin page that holds the boilerplate stripped from every crawled page.
+SHARED_BLOCKS_FRAGMENT = "#site-wide"
 
 
 class KBService:
@@ -18,36 +35,332 @@ class KBService:
         self.settings = get_settings()
         self.llm = LLMService()
 
-    def reindex(self, urls: list[str] | None, updated_by: str) -> dict:
+    def reindex(
+        self,
+        urls: list[str] | None,
+        updated_by: str,
+        force: bool = False,
+        progress: Callable[[dict], None] | None = None,
+    ) -> dict:
+        """
+        Crawl, embed and upsert the KB sources. `progress` is called with a snapshot after every page,
+        periodically while pages are being fetched, and once more before publishing; it may raise to
+        abort the run (reindex jobs use this for cancellation).
+        """
         urls_to_use = urls or self.settings.kb_source_urls_list
-        version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
-        upserted = 0
+        discover = not urls and self.settings.kb_crawl_mode.strip().lower() == "discover"
+        label = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        started = time.perf_counter()
+        crawler = Crawler()
+        writer = KBChunkWriter(self.db)
+        versions = KBVersionService(self.db)
+        frontier = CrawlFrontier(self.db, crawler) if discover else None
+        run = {
+            "progress": progress,
+            "reported_at": time.monotonic(),
+            "urls_fetched": 0,
+            "urls_done": 0,
+            "errors": [],
+            "upserted": 0,
+            "pages": {"fetched": 0, "not_modified": 0, "unchanged": 0, "errors": 0},
+            "timings": {"fetch_ms": 0.0, "parse_ms": 0.0, "embed_write_ms": 0.0},
+            "boilerplate": {"blocks_dropped": 0, "chunks_saved": 0, "shared_chunks": 0},
+            "trimmed_chunks": {},
+            "churn": {"added": 0, "kept": 0, "removed": 0},
+            "churn_pages": {},
+        }
+
+        if frontier is not None:
+            # Only resume a crawl whose unpublished build can still be published.
+            frontier.start(urls_to_use, resumable=versions.resumable_crawl_ids())
+        build = versions.begin_build(label, crawl_id=frontier.crawl_id if frontier else None)
+        try:
+            if frontier is None:
+                self._crawl_batch(crawler, writer, urls_to_use, build, force, run)
+                crawled_urls = set(urls_to_use)
+            else:
+                for batch in frontier.batches(size=crawler.concurrency * 4):
+                    rows = {row.url: row for row in batch}
+                    for page, record in self._crawl_batch(crawler, writer, list(rows), build, force, run):
+                        frontier.complete(rows[page.url], page, page.links or record.links_json or [])
+                    # Checkpoint per batch: completed pages and newly discovered links survive an interruption.
+                    self.db.commit()
+                crawled_urls = frontier.urls()
+            if self.settings.kb_boilerplate_enabled:
+                crawled_urls |= self._index_shared_blocks(crawled_urls, build, writer, force, run)
+            # Last chance for the job to stop this build before it goes live.
+            self._report(run)
+        except Exception as exc:
+            self.db.rollback()
+            versions.fail(build, f"{exc.__class__.__name__}: {exc}")
+            raise
 
-        for url in urls_to_use:
-            text, title = self._fetch_url(url)
-            if not text:
+        published = versions.publish(build, crawled_urls=crawled_urls, full_build=urls is None)
+        summary = {
+            "version": build.label,
+            "version_id": build.id,
+            "upserted_chunks": run["upserted"],
+            "retired_chunks": published["retired_chunks"],
+            "pages": run["pages"],
+            "errors": run["errors"],
+            "timings_ms": {key: round(value, 1) for key, value in run["timings"].items()},
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "writes": writer.stats(),
+            "churn": {**run["churn"], "pages": run["churn_pages"]},
+        }
+        if self.settings.kb_boilerplate_enabled:
+            boilerplate = run["boilerplate"]
+            summary["boilerplate"] = {
+                **boilerplate,
+                "embedding_calls_saved": max(boilerplate["chunks_saved"] - boilerplate["shared_chunks"], 0),
+            }
+        if published["removed_urls"]:
+            summary["removed_urls"] = published["removed_urls"]
+        if frontier is not None:
+            summary["crawl"] = frontier.stats()
+        build.summary_json = summary
+        payload = {"mode": "discover" if discover else "list", "urls": urls_to_use, **summary}
+        self.db.add(AuditLog(actor=updated_by, action="kb_reindex", payload_json=payload))
+        self.db.commit()
+        summary["gc"] = versions.collect_garbage()
+        return summary
+
+    def _crawl_batch(
+        self,
+        crawler: Crawler,
+        writer: KBChunkWriter,
+        urls: list[str],
+        build: KBVersion,
+        force: bool,
+        run: dict,
+    ) -> list[tuple[FetchedPage, KBSourcePage]]:
+        pages = {row.url: row for row in self.db.scalars(select(KBSourcePage).where(KBSourcePage.url.in_(urls))).all()}
+        validators = {} if force else {url: (row.etag, row.last_modified) for url, row in pages.items()}
+        processed = []
+        # The batch is parsed before anything is embedded so boilerplate can be judged across its pages.
+        for page in crawler.crawl(urls, validators):
+            record = pages.get(page.url)
+            if record is None:
+                record = KBSourcePage(url=page.url)
+                self.db.add(record)
+                pages[page.url] = record
+            processed.append((page, record))
+            run["urls_fetched"] += 1
+            # Nothing is indexed until the batch is parsed; keep the job heartbeat fresh meanwhile.
+            self._report(run, throttle=True)
+        if self.settings.kb_boilerplate_enabled:
+            self._strip_boilerplate(processed, run)
+
+        for page, record in processed:
+            self._apply_page(page, record, writer, build, force, run)
+            # Per-page commit: a cancelled or failed run keeps the pages it finished, and job progress
+            # writes from another session never queue behind this transaction.
+            self.db.commit()
+            run["urls_done"] += 1
+            if page.error and len(run["errors"]) < MAX_REPORTED_ERRORS:
+                run["errors"].append({"url": page.url, "error": page.error[:300]})
+            self._report(run)
+        return processed
+
+    def _apply_page(
+        self,
+        page: FetchedPage,
+        record: KBSourcePage,
+        writer: KBChunkWriter,
+        build: KBVersion,
+        force: bool,
+        run: dict,
+    ) -> None:
+        counts, timings = run["pages"], run["timings"]
+        timings["fetch_ms"] += page.fetch_ms
+        timings["parse_ms"] += page.parse_ms
+        record.last_fetched_at = datetime.now(timezone.utc)
+        record.http_status = page.http_status
+        record.last_error = page.error
+
+        if page.status == "not_modified":
+            counts["not_modified"] += 1
+            return
+        if page.status == "error" or not page.chunks:
+            counts["errors"] += 1
+            return
+        record.links_json = page.links
+        if not force and record.content_hash == page.content_hash:
+            # Server ignored the validators but the extracted text is identical; skip embedding.
+            counts["unchanged"] += 1
+            record.etag, record.last_modified = page.etag, page.last_modified
+            return
+
+        counts["fetched"] += 1
+        write_started = time.perf_counter()
+        churn = self._index_page(page, build, writer, force)
+        timings["embed_write_ms"] += (time.perf_counter() - write_started) * 1000
+        run["upserted"] += churn["added"]
+        for key, value in churn.items():
+            run["churn"][key] += value
+        if len(run["churn_pages"]) < MAX_REPORTED_PAGES:
+            run["churn_pages"][page.url] = churn
+        run["boilerplate"]["chunks_saved"] += run["trimmed_chunks"].pop(page.url, 0)
+        # Validators are stored only once the page's chunks are written, so a failed run refetches.
+        record.etag, record.last_modified = page.etag, page.last_modified
+        record.content_hash = page.content_hash
+        record.last_changed_at = record.last_fetched_at
+
+    def _strip_boilerplate(self, processed: list[tuple[FetchedPage, KBSourcePage]], run: dict) -> None:
+        """Drop blocks repeated across the site from freshly parsed pages and re-chunk what remains."""
+        parsed = [(page, record) for page, record in processed if page.status == "fetched" and page.blocks]
+        if not parsed:
+            return
+        for page, record in parsed:
+            record.blocks_json = [[simhash(block), block] for block in page.blocks]
+        detectors = self._boilerplate_detectors({record.url: record.blocks_json for _, record in parsed})
+        for page, record in parsed:
+            detector = detectors[urlsplit(page.url).netloc]
+            flags = iter([detector.is_boilerplate(fingerprint) for fingerprint, _ in record.blocks_json])
+            sections = []
+            for heading, lines in page.sections:
+                # A dropped heading leaves its lines in place, under no heading.
+                kept_heading = heading if heading and not next(flags) else ""
+                sections.append((kept_heading, [line for line in lines if not next(flags)]))
+            kept = section_blocks(sections)
+            if len(kept) == len(page.blocks):
+                continue
+            chunks = chunk_sections(sections) if kept else []
+            run["boilerplate"]["blocks_dropped"] += len(page.blocks) - len(kept)
+            run["trimmed_chunks"][page.url] = max(len(page.chunks) - len(chunks), 0)
+            page.chunks = chunks
+            page.content_hash = hashlib.sha256("\n".join(kept).encode("utf-8")).hexdigest()
+
+    def _boilerplate_detectors(self, current: dict[str, list] | None = None) -> dict[str, BoilerplateDetector]:
+        """One detector per host, fit on the stored blocks of every known page plus `current` overrides."""
+        fingerprints: dict[str, dict[str, list[int]]] = defaultdict(dict)
+        stored = self.db.execute(
+            select(KBSourcePage.url, KBSourcePage.blocks_json).where(KBSourcePage.blocks_json.is_not(None))
+        ).all()
+        for url, blocks in [*stored, *(current or {}).items()]:
+            fingerprints[urlsplit(url).netloc][url] = [fingerprint for fingerprint, _ in blocks]
+        return defaultdict(
+            self._new_boilerplate_detector,
+            {host: self._new_boilerplate_detector().fit(pages) for host, pages in fingerprints.items()},
+        )
+
+    def _new_boilerplate_detector(self) -> BoilerplateDetector:
+        return BoilerplateDetector(
+            min_pages=self.settings.kb_boilerplate_min_pages,
+            ratio=self.settings.kb_boilerplate_ratio,
+        )
+
+    def _index_shared_blocks(self, crawled_urls: set[str], build: KBVersion, writer: KBChunkWriter, force: bool, run: dict) -> set[str]:
+        """
+        Store each host's boilerplate once, as a synthetic `<origin>/#site-wide` page, re-embedding it
+        only when the shared text changes. Returns the shared URLs that hold content.
+        """
+        detectors = self._boilerplate_detectors()
+        pages = self.db.execute(
+            select(KBSourcePage.url, KBSourcePage.blocks_json)
+            .where(KBSourcePage.blocks_json.is_not(None))
+            .order_by(KBSourcePage.url)
+        ).all()
+        origins = {f"{urlsplit(url).scheme}://{urlsplit(url).netloc}" for url in crawled_urls}
+        shared_urls = set()
+        for origin in sorted(origins):
+            host = urlsplit(origin).netloc
+            detector = detectors[host]
+            blocks: list[str] = []
+            chosen: list[int] = []
+            for url, page_blocks in pages:
+                if urlsplit(url).netloc != host:
+                    continue
+                for fingerprint, block in page_blocks:
+                    if not detector.is_boilerplate(fingerprint):
+                        continue
+                    # Keep one copy of each block; near-identical variants collapse onto the first seen.
+                    if any(hamming(fingerprint, seen) <= detector.max_distance for seen in chosen):
+                        continue
+                    chosen.append(fingerprint)
+                    blocks.append(block)
+            text = "\n".join(blocks)
+            shared_url = f"{origin}/{SHARED_BLOCKS_FRAGMENT}"
+            record = self.db.scalar(select(KBSourcePage).where(KBSourcePage.url == shared_url))
+            if record is None:
+                record = KBSourcePage(url=shared_url)
+                self.db.add(record)
+            content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if text:
+                shared_urls.add(shared_url)
+            if record.content_hash == content_hash and not force:
                 continue
-            page_type = self._classify_page_type(url)
-            approved = not (self.settings.manual_policy_approval and page_type == "policy")
-            for idx, chunk in enumerate(self._chunk_text(text)):
-                chunk_id = self._chunk_id(url, idx, chunk)
-                embedding = self.llm.embed_text(chunk)
-                upserted += self._upsert_chunk(
+            record.content_hash = content_hash
+            record.last_changed_at = datetime.now(timezone.utc)
+            if text:
+                page = FetchedPage(url=shared_url, status="fetched", title="Site-wide content", chunks=chunk_page(text))
+                run["boilerplate"]["shared_chunks"] += self._index_page(page, build, writer, force)["added"]
+            self.db.commit()
+        return shared_urls
+
+    def _report(self, run: dict, throttle: bool = False) -> None:
+        if run["progress"] is None:
+            return
+        now = time.monotonic()
+        if throttle and now - run["reported_at"] < FETCH_HEARTBEAT_SECONDS:
+            return
+        run["reported_at"] = now
+        run["progress"](self._progress_snapshot(run))
+
+    @staticmethod
+    def _progress_snapshot(run: dict) -> dict:
+        return {
+            "urls_fetched": run["urls_fetched"],
+            "urls_done": run["urls_done"],
+            "chunks_embedded": run["upserted"],
+            "pages": dict(run["pages"]),
+            "errors": list(run["errors"]),
+            "timings_ms": {key: round(value, 1) for key, value in run["timings"].items()},
+        }
+
+    def _index_page(self, page: FetchedPage, build: KBVersion, writer: KBChunkWriter, force: bool = False) -> dict:
+        """
+        Write `page`'s chunks into `build`. Chunks the active version already holds with identical text
+        keep their row and embedding and are only stamped with the build; `force` re-embeds everything.
+        Returns the page's churn: chunks added, kept and removed.
+        """
+        page_type = self._classify_page_type(page.url)
+        approved = not (self.settings.manual_policy_approval and page_type == "policy")
+        live = {
+            row.chunk_id: row.id
+            for row in self.db.execute(
+                select(KBChunk.id, KBChunk.chunk_id).where(
+                    KBChunk.source_url == page.url, KBChunk.retired_version_id.is_(None)
+                )
+            )
+        }
+        kept = []
+        chunk_ids = self._chunk_ids(page.url, page.chunks)
+        for idx, (chunk_id, chunk) in enumerate(zip(chunk_ids, page.chunks, strict=True)):
+            metadata = {"topic": page_type, "page_type": page_type, "chunk_index": idx, "last_seen": build.label}
+            if chunk_id in live and not force:
+                kept.append(
+                    {"id": live[chunk_id], "title": page.title, "built_version_id": build.id, "metadata_json": metadata}
+                )
+                continue
+            writer.stage(
+                self._chunk_row(
                     chunk_id=chunk_id,
-                    source_url=url,
-                    title=title,
+                    source_url=page.url,
+                    title=page.title,
                     content=chunk,
-                    metadata={"topic": page_type, "page_type": page_type, "last_seen": version},
-                    embedding=embedding,
+                    page_type=page_type,
+                    metadata=metadata,
+                    embedding=self.llm.embed_text(chunk),
                     approved=approved,
-                    version=version,
+                    build=build,
                 )
-
-        self.db.add(
-            AuditLog(actor=updated_by, action="kb_reindex", payload_json={"urls": urls_to_use, "version": version})
-        )
-        self.db.commit()
-        return {"version": version, "upserted_chunks": upserted}
+            )
+        if kept:
+            self.db.execute(update(KBChunk), kept)
+        # One upsert per page keeps a failed page from leaving half its chunks behind.
+        added = writer.flush()
+        return {"added": added, "kept": len(kept), "removed": len(set(live) - set(chunk_ids))}
 
     def approve_chunks(self, chunk_ids: list[str], approved: bool, updated_by: str) -> int:
         rows = self.db.scalars(select(KBChunk).where(KBChunk.chunk_id.in_(chunk_ids))).all()
@@ -61,39 +374,21 @@ class KBService:
             )
         )
         self.db.commit()
+        get_retrieval_cache().invalidate()
         return len(rows)
 
-    def _fetch_url(self, url: str) -> tuple[str, str]:
-        try:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-        except Exception:  # noqa: BLE001
-            return "", ""
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        title = (soup.title.string or "").strip() if soup.title else ""
-        for tag in soup(["script", "style", "noscript"]):
-            tag.extract()
-        text = "\n".join(part.strip() for part in soup.stripped_strings if part.strip())
-        return text, title
-
-    def _chunk_text(self, text: str, size: int = 800, overlap: int = 120) -> list[str]:
-        text = re.sub(r"\s+", " ", text)
-        if len(text) <= size:
-            return [text]
-        chunks = []
-        start = 0
-        while start < len(text):
-            end = min(start + size, len(text))
-            chunks.append(text[start:end])
-            if end == len(text):
-                break
-            start = end - overlap
-        return chunks
-
-    def _chunk_id(self, url: str, idx: int, chunk: str) -> str:
-        raw = f"{url}:{idx}:{chunk[:80]}"
-        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    def _chunk_ids(self, url: str, chunks: list[str]) -> list[str]:
+        # Ids depend only on the page and the chunk's text, never its position, so an edit elsewhere on
+        # the page leaves them alone. Repeats of the same text on one page are told apart by occurrence.
+        seen: dict[str, int] = {}
+        ids = []
+        for chunk in chunks:
+            digest = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+            occurrence = seen.get(digest, 0)
+            seen[digest] = occurrence + 1
+            raw = f"{url}:{digest}" if occurrence == 0 else f"{url}:{digest}:{occurrence}"
+            ids.append(hashlib.sha256(raw.encode("utf-8")).hexdigest())
+        return ids
 
     def _classify_page_type(self, url: str) -> str:
         lowered = url.lower()
@@ -103,67 +398,49 @@ class KBService:
             return "services"
         return "general"
 
-    def _upsert_chunk(
+    def _chunk_row(
         self,
         chunk_id: str,
         source_url: str,
         title: str,
         content: str,
+        page_type: str,
         metadata: dict,
         embedding: list[float] | None,
         approved: bool,
-        version: str,
-    ) -> int:
-        vector_literal = self._to_pgvector_literal(embedding)
-        existing = self.db.scalar(select(KBChunk).where(KBChunk.chunk_id == chunk_id))
-        if existing:
-            existing.content = content
-            existing.metadata_json = metadata
-            existing.embedding_json = embedding
-            existing.approved = approved
-            existing.version = version
-            self.db.flush()
-            self._write_vector_column(chunk_id=chunk_id, vector_literal=vector_literal)
-            return 1
+        build: KBVersion,
+    ) -> dict:
+        encoded = encode_embedding(embedding, self.settings.embedding_storage_dtype) if embedding else None
+        short = self._short_embedding(embedding)
+        return {
+            "chunk_id": chunk_id,
+            "source_url": source_url,
+            "title": title,
+            "content": content,
+            "page_type": page_type,
+            "metadata_json": metadata,
+            "embedding_json": None,
+            "embedding_blob": encoded.data if encoded else None,
+            "embedding_dtype": encoded.dtype if encoded else None,
+            "embedding_scale": encoded.scale if encoded else None,
+            "embedding_short_blob": encode_embedding(short, SHORT_EMBEDDING_DTYPE).data if short is not None else None,
+            "approved": approved,
+            "version": build.label,
+            "introduced_version_id": build.id,
+            "built_version_id": build.id,
+            "retired_version_id": None,
+            "embedding": self._to_pgvector_literal(embedding),
+            "embedding_short": self._to_pgvector_literal(short.tolist()) if short is not None else None,
+        }
 
-        self.db.add(
-            KBChunk(
-                chunk_id=chunk_id,
-                source_url=source_url,
-                title=title,
-                content=content,
-                metadata_json=metadata,
-                embedding_json=embedding,
-                approved=approved,
-                version=version,
-            )
-        )
-        self.db.flush()
-        self._write_vector_column(chunk_id=chunk_id, vector_literal=vector_literal)
-        return 1
+    def _short_embedding(self, embedding: list[float] | None):
+        short_dims = self.settings.embedding_short_dimensions
+        if not embedding or short_dims <= 0 or short_dims >= len(embedding):
+            return None
+        return shorten_embedding(embedding, short_dims)
 
     @staticmethod
     def _to_pgvector_literal(embedding: list[float] | None) -> str | None:
         if not embedding:
             return None
         return "[" + ",".join(f"{value:.10f}" for value in embedding) + "]"
-
-    def _write_vector_column(self, chunk_id: str, vector_literal: str | None) -> None:
-        if not vector_literal:
-            return
-        if not self.db.bind or self.db.bind.dialect.name != "postgresql":
-            return
-        try:
-            self.db.execute(
-                text(
-                    """
-                    UPDATE kb_chunks
-                    SET embedding = CAST(:embedding AS vector)
-                    WHERE chunk_id = :chunk_id
-                    """
-                ),
-                {"embedding": vector_literal, "chunk_id": chunk_id},
-            )
-        except Exception:  # noqa: BLE001
-            # Keep ingestion resilient; retrieval will fall back to lexical mode if vector write fails.
-            return
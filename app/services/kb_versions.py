@@ -0,0 +1,220 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from threading import Lock
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import KBActiveVersion, KBChunk, KBSourcePage, KBVersion
+from app.services.retrieval_cache import get_retrieval_cache
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_POINTER = "kb"
+UNPUBLISHED_STATUSES = ("building", "failed")
+GONE_HTTP_STATUSES = (404, 410)
+
+# Raw-SQL form of `visible_in`, bound with :kb_version.
+VISIBLE_SQL = "introduced_version_id <= :kb_version AND (retired_version_id IS NULL OR retired_version_id > :kb_version)"
+
+
+def visible_in(version_id: int):
+    return and_(
+        KBChunk.introduced_version_id <= version_id,
+        or_(KBChunk.retired_version_id.is_(None), KBChunk.retired_version_id > version_id),
+    )
+
+
+def _chunked(values: list, size: int = 500):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class KBVersionService:
+    """
+    Blue/green KB publishing. A reindex builds version N: new chunks are written with
+    introduced_version_id=N, which the active version (< N) cannot see. `publish` retires the chunks
+    N replaces and flips the active pointer in one transaction, so retrieval switches atomically.
+    Chunks retired by a version that has been active longer than the grace period are deleted by
+    `collect_garbage`.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.settings = get_settings()
+
+    def active_version_id(self) -> int:
+        pointer = self.db.get(KBActiveVersion, ACTIVE_POINTER)
+        return pointer.version_id if pointer else 0
+
+    def resumable_crawl_ids(self) -> set[str]:
+        """Crawls of unpublished builds newer than the active version; their chunks can still be published."""
+        return set(
+            self.db.scalars(
+                select(KBVersion.crawl_id).where(
+                    KBVersion.status.in_(UNPUBLISHED_STATUSES),
+                    KBVersion.crawl_id.is_not(None),
+                    KBVersion.id > self.active_version_id(),
+                )
+            ).all()
+        )
+
+    def begin_build(self, label: str, crawl_id: str | None = None) -> KBVersion:
+        if crawl_id:
+            resumed = self.db.scalar(
+                select(KBVersion).where(
+                    KBVersion.crawl_id == crawl_id,
+                    KBVersion.status.in_(UNPUBLISHED_STATUSES),
+                    KBVersion.id > self.active_version_id(),
+                )
+            )
+            if resumed is not None:
+                resumed.status = "building"
+                self.db.commit()
+                return resumed
+        self._discard_unpublished()
+        build = KBVersion(label=label, status="building", crawl_id=crawl_id)
+        self.db.add(build)
+        self.db.commit()
+        return build
+
+    def fail(self, build: KBVersion, error: str) -> None:
+        build.status = "failed"
+        build.summary_json = {"error": error[:1000]}
+        self.db.commit()
+
+    def publish(self, build: KBVersion, crawled_urls: set[str], full_build: bool) -> dict:
+        """Retire what `build` replaces and make it the active version, all in one commit."""
+        rebuilt = set(
+            self.db.scalars(select(KBChunk.source_url).where(KBChunk.built_version_id == build.id).distinct()).all()
+        )
+        retired = 0
+        for urls in _chunked(sorted(rebuilt)):
+            # Chunks of rebuilt pages that this build did not produce again.
+            retired += self._retire(build.id, KBChunk.source_url.in_(urls), KBChunk.built_version_id != build.id)
+
+        gone = set(
+            self.db.scalars(
+                select(KBSourcePage.url).where(
+                    KBSourcePage.url.in_(list(crawled_urls)), KBSourcePage.http_status.in_(GONE_HTTP_STATUSES)
+                )
+            ).all()
+        )
+        if full_build:
+            current_urls = set(
+                self.db.scalars(select(KBChunk.source_url).where(KBChunk.retired_version_id.is_(None)).distinct()).all()
+            )
+            gone |= current_urls - crawled_urls
+        for urls in _chunked(sorted(gone)):
+            retired += self._retire(build.id, KBChunk.source_url.in_(urls))
+
+        now = datetime.now(timezone.utc)
+        self.db.execute(
+            update(KBVersion)
+            .where(KBVersion.status == "active")
+            .values(status="superseded", superseded_at=now)
+        )
+        build.status = "active"
+        build.activated_at = now
+        pointer = self.db.get(KBActiveVersion, ACTIVE_POINTER)
+        if pointer is None:
+            pointer = KBActiveVersion(name=ACTIVE_POINTER)
+            self.db.add(pointer)
+        pointer.version_id = build.id
+        pointer.updated_at = now
+        self.db.commit()
+        get_retrieval_cache().invalidate()
+        return {"version_id": build.id, "retired_chunks": retired, "removed_urls": sorted(gone)}
+
+    def collect_garbage(self, grace_seconds: int | None = None, batch_size: int | None = None) -> dict:
+        """Batch-delete chunks retired by a version that went live more than `grace_seconds` ago."""
+        grace = self.settings.kb_gc_grace_seconds if grace_seconds is None else grace_seconds
+        batch_size = batch_size or self.settings.kb_gc_batch_size
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+        through = self.db.scalar(
+            select(func.max(KBVersion.id)).where(
+                KBVersion.activated_at.is_not(None), KBVersion.activated_at <= cutoff
+            )
+        )
+        if not through:
+            return {"deleted_chunks": 0, "batches": 0, "through_version": None}
+        deleted, batches = self._delete_batched(KBChunk.retired_version_id <= through, batch_size)
+        return {"deleted_chunks": deleted, "batches": batches, "through_version": through}
+
+    def _retire(self, version_id: int, *criteria) -> int:
+        result = self.db.execute(
+            update(KBChunk)
+            .where(KBChunk.retired_version_id.is_(None), *criteria)
+            .values(retired_version_id=version_id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+
+    def _discard_unpublished(self) -> None:
+        """Drop chunks of abandoned builds so they can never surface in a later version."""
+        stale = self.db.scalars(select(KBVersion).where(KBVersion.status.in_(UNPUBLISHED_STATUSES))).all()
+        if not stale:
+            return
+        stale_ids = [version.id for version in stale]
+        urls = self.db.scalars(
+            select(KBChunk.source_url).where(KBChunk.introduced_version_id.in_(stale_ids)).distinct()
+        ).all()
+        for batch in _chunked(list(urls)):
+            # Validators were saved as these pages were written; clear them so the next build refetches.
+            self.db.execute(
+                update(KBSourcePage)
+                .where(KBSourcePage.url.in_(batch))
+                .values(etag=None, last_modified=None, content_hash=None)
+            )
+        self._delete_batched(KBChunk.introduced_version_id.in_(stale_ids), self.settings.kb_gc_batch_size)
+        for version in stale:
+            version.status = "discarded"
+        self.db.commit()
+        logger.info("discarded %s unpublished kb builds", len(stale_ids))
+
+    def _delete_batched(self, criterion, batch_size: int) -> tuple[int, int]:
+        deleted = batches = 0
+        while True:
+            ids = self.db.scalars(select(KBChunk.id).where(criterion).order_by(KBChunk.id).limit(batch_size)).all()
+            if not ids:
+                return deleted, batches
+            self.db.execute(delete(KBChunk).where(KBChunk.id.in_(ids)).execution_options(synchronize_session=False))
+            self.db.commit()
+            deleted += len(ids)
+            batches += 1
+
+
+class ActiveVersionCache:
+    """
+    Active version id memoized between pointer reads. A publish in this process (or any process,
+    with Redis) bumps the KB cache version and forces a re-read; otherwise the pointer is re-read at
+    most every `kb_version_poll_seconds`, which is how other workers and CLI reindexes are seen.
+    """
+
+    def __init__(self, poll_seconds: float) -> None:
+        self.poll_seconds = poll_seconds
+        self._lock = Lock()
+        self._kb_version: int | None = None
+        self._version_id = 0
+        self._checked_at = 0.0
+
+    def get(self, db: Session, kb_version: int | None = None) -> int:
+        """`kb_version` is the caller's current read of the KB cache version, if it has one."""
+        if kb_version is None:
+            kb_version = get_retrieval_cache().version.current()
+        with self._lock:
+            if self._kb_version == kb_version and time.monotonic() - self._checked_at < self.poll_seconds:
+                return self._version_id
+        version_id = KBVersionService(db).active_version_id()
+        with self._lock:
+            self._kb_version, self._version_id = kb_version, version_id
+            self._checked_at = time.monotonic()
+        return version_id
+
+
+@lru_cache(maxsize=1)
+def get_active_version_cache() -> ActiveVersionCache:
+    return ActiveVersionCache(get_settings().kb_version_poll_seconds)
@@ -0,0 +1,184 @@
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, MetaData, Table, case, cast, delete, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.types import UserDefinedType
+
+from app.core.config import Settings, get_settings
+from app.db.models import KBChunk
+
+logger = logging.getLogger(__name__)
+
+# Columns a re-upserted chunk keeps from its first insert.
+_PRESERVED_COLUMNS = {"id", "chunk_id", "created_at", "introduced_version_id", "retired_version_id"}
+# pgvector stores a column's declared dimension as its type modifier.
+PGVECTOR_DIMENSIONS_SQL = """
+SELECT attname, atttypmod FROM pg_attribute
+WHERE attrelid = to_regclass('kb_chunks') AND attname IN ('embedding', 'embedding_short') AND NOT attisdropped
+"""
+
+
+def vector_dimension_mismatches(declared: dict[str, int], settings: Settings) -> list[str]:
+    expected = {
+        "embedding": ("EMBEDDING_DIMENSIONS", settings.embedding_dimensions),
+        "embedding_short": ("EMBEDDING_SHORT_DIMENSIONS", settings.embedding_short_dimensions),
+    }
+    problems = []
+    for column, dims in sorted(declared.items()):
+        setting, wanted = expected[column]
+        if dims > 0 and wanted > 0 and dims != wanted:
+            problems.append(f"kb_chunks.{column} is vector({dims}) but {setting}={wanted}")
+    return problems
+
+
+def check_vector_dimensions(db: Session) -> None:
+    """
+    Fail loudly when the pgvector columns disagree with the configured dimensions. Otherwise every
+    write and search on the mismatched column errors inside a savepoint and quietly falls back.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    declared = {name: int(typmod) for name, typmod in db.execute(text(PGVECTOR_DIMENSIONS_SQL)).all()}
+    problems = vector_dimension_mismatches(declared, get_settings())
+    if problems:
+        raise ValueError(
+            "; ".join(problems) + ". Change the setting, or ALTER the column type (USING NULL) and reindex "
+            "(see db/migrations/004_kb_embedding_short.sql)."
+        )
+
+
+class _PGVector(UserDefinedType):
+    """pgvector column bound from its text literal ("[0.1,...]"), cast in the INSERT itself."""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw) -> str:
+        return "vector"
+
+    def bind_expression(self, bindvalue):
+        return cast(bindvalue, self)
+
+
+def _chunk_table(vector_columns: tuple[str, ...]) -> Table:
+    if not vector_columns:
+        return KBChunk.__table__
+    columns = [column._copy() for column in KBChunk.__table__.columns]
+    columns += [Column(name, _PGVector(), nullable=True) for name in vector_columns]
+    return Table(KBChunk.__tablename__, MetaData(), *columns)
+
+
+class KBChunkWriter:
+    """
+    Stages chunk rows and writes them with one multi-row upsert per flush instead of a SELECT,
+    ORM insert/update and vector UPDATE per chunk. Postgres uses INSERT ... ON CONFLICT (chunk_id)
+    DO UPDATE with the pgvector columns bound in the same statement; SQLite uses its own
+    ON CONFLICT upsert. Falls back to dropping vector columns that have not been migrated yet.
+    """
+
+    VECTOR_COLUMNS = ("embedding", "embedding_short")
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.dialect = db.bind.dialect.name if db.bind else ""
+        self._vector_columns: tuple[str, ...] | None = None if self.dialect == "postgresql" else ()
+        self._rows: list[dict] = []
+        self.statements = 0
+        self.rows_written = 0
+        self.batches = 0
+        self.write_ms = 0.0
+
+    def stage(self, row: dict) -> None:
+        """`row` holds KBChunk column values plus optional `embedding`/`embedding_short` pgvector literals."""
+        self._rows.append(row)
+
+    def flush(self) -> int:
+        if not self._rows:
+            return 0
+        rows, self._rows = self._dedupe(self._rows), []
+        started = time.perf_counter()
+        if self.dialect == "postgresql":
+            self._upsert_postgres(rows)
+        elif self.dialect == "sqlite":
+            self._execute(self._upsert_statement(sqlite.insert, ()), self._columns(rows, ()))
+        else:
+            self._execute(delete(KBChunk).where(KBChunk.chunk_id.in_([row["chunk_id"] for row in rows])), None)
+            self._execute(insert(KBChunk), self._columns(rows, ()))
+        self.write_ms += (time.perf_counter() - started) * 1000
+        self.rows_written += len(rows)
+        self.batches += 1
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.rows_written,
+            "batches": self.batches,
+            "statements": self.statements,
+            "write_ms": round(self.write_ms, 1),
+            "vector_columns": list(self._vector_columns or ()),
+        }
+
+    def _upsert_postgres(self, rows: list[dict]) -> None:
+        if self._vector_columns is not None:
+            self._execute(self._upsert_statement(postgresql.insert, self._vector_columns), self._columns(rows, self._vector_columns))
+            return
+        check_vector_dimensions(self.db)
+        # First batch: find out which pgvector columns exist by trying the widest statement first.
+        variants = [self.VECTOR_COLUMNS, self.VECTOR_COLUMNS[:1], ()]
+        for vector_columns in variants:
+            try:
+                with self.db.begin_nested():
+                    self._execute(
+                        self._upsert_statement(postgresql.insert, vector_columns), self._columns(rows, vector_columns)
+                    )
+                self._vector_columns = vector_columns
+                return
+            except Exception as exc:  # noqa: BLE001
+                if not vector_columns:
+                    raise
+                logger.warning("kb upsert without %s: %s", vector_columns[-1], exc.__class__.__name__)
+
+    @staticmethod
+    def _upsert_statement(dialect_insert, vector_columns: tuple[str, ...]):
+        table = _chunk_table(vector_columns)
+        statement = dialect_insert(table)
+        updates = {
+            column.name: statement.excluded[column.name]
+            for column in table.columns
+            if column.name not in _PRESERVED_COLUMNS
+        }
+        # A chunk the active version still serves keeps its interval; one that an earlier version
+        # retired comes back as new in the version being built.
+        updates["introduced_version_id"] = case(
+            (table.c.retired_version_id.is_(None), table.c.introduced_version_id),
+            else_=statement.excluded.introduced_version_id,
+        )
+        updates["retired_version_id"] = None
+        return statement.on_conflict_do_update(index_elements=["chunk_id"], set_=updates)
+
+    @staticmethod
+    def _columns(rows: list[dict], vector_columns: tuple[str, ...]) -> list[dict]:
+        now = datetime.now(timezone.utc)
+        keep = {column.name for column in KBChunk.__table__.columns} | set(vector_columns)
+        output = []
+        for row in rows:
+            values = {key: value for key, value in row.items() if key in keep}
+            values.setdefault("created_at", now)
+            for name in vector_columns:
+                values.setdefault(name, None)
+            output.append(values)
+        return output
+
+    @staticmethod
+    def _dedupe(rows: list[dict]) -> list[dict]:
+        # ON CONFLICT cannot touch the same row twice in one statement; last staged version wins.
+        return list({row["chunk_id"]: row for row in rows}.values())
+
+    def _execute(self, statement, params: list[dict] | None) -> None:
+        if params is None:
+            self.db.execute(statement)
+        else:
+            self.db.execute(statement, params)
+        self.statements += 1
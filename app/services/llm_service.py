@@ -2,9 +2,8 @@ import json
 import logging
 import re
 
-from openai import OpenAI
-
 from app.core.config import get_settings
+from app.core.metrics import FALLBACKS, track_dependency
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +22,12 @@ INTENTS = [
 class LLMService:
     def __init__(self) -> None:
         self.settings = get_settings()
-        self.client = OpenAI(api_key=self.settings.openai_api_key) if self.settings.openai_api_key else None
+        self.client = None
+        if self.settings.openai_api_key:
+            # The SDK takes a third of a second to import; defer it until a client is actually built.
+            from openai import OpenAI
+
+            self.client = OpenAI(api_key=self.settings.openai_api_key)
 
     def _heuristic_intent(self, text: str) -> tuple[str, float]:
         q = text.lower()
@@ -54,7 +58,8 @@ class LLMService:
             f"Text: {text}"
         )
         try:
-            result = self.client.responses.create(model=self.settings.default_model, input=prompt)
+            with track_dependency("openai"):
+                result = self.client.responses.create(model=self.settings.default_model, input=prompt)
             output_text = result.output_text.strip()
             payload = json.loads(output_text)
             intent = payload.get("intent", heuristic_intent)
@@ -64,6 +69,7 @@ class LLMService:
             return intent, max(0.0, min(confidence, 1.0))
         except Exception as exc:  # noqa: BLE001
             logger.warning("intent classification fallback: %s", exc)
+            FALLBACKS.labels("intent_heuristic").inc()
             return heuristic_intent, heuristic_conf
 
     def generate_response(
@@ -73,6 +79,7 @@ class LLMService:
         references: list[dict],
         policies: dict[str, str],
         channel: str = "web",
+        context: list[dict] | None = None,
     ) -> str:
         if intent == "appointment_request":
             if channel == "sms":
@@ -94,8 +101,9 @@ class LLMService:
         if not self.client:
             return self._fallback_response(query, intent, references, policies)
 
+        # Packed context (see ContextPacker) replaces the raw citation snippets in the prompt when provided.
         refs_text = "\n".join(
-            f"- {ref['title']} ({ref['source_url']}): {ref['snippet']}" for ref in references
+            f"- {ref['title']} ({ref['source_url']}): {ref['snippet']}" for ref in (context or references)
         )
         system_prompt = (
             "You are an operational customer support assistant for a hearing and balance clinic. "
@@ -109,27 +117,35 @@ class LLMService:
             f"User query: {query}"
         )
         try:
-            result = self.client.responses.create(
-                model=self.settings.default_model,
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-            )
+            with track_dependency("openai"):
+                result = self.client.responses.create(
+                    model=self.settings.default_model,
+                    input=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                )
             text = result.output_text.strip()
             return text or self._fallback_response(query, intent, references, policies)
         except Exception as exc:  # noqa: BLE001
             logger.warning("response generation fallback: %s", exc)
+            FALLBACKS.labels("response_template").inc()
             return self._fallback_response(query, intent, references, policies)
 
     def embed_text(self, text: str) -> list[float] | None:
         if not self.client:
             return None
         try:
-            response = self.client.embeddings.create(model=self.settings.embedding_model, input=text)
+            kwargs = {}
+            # text-embedding-3 models natively support shortened (Matryoshka) outputs.
+            if self.settings.embedding_model.startswith("text-embedding-3"):
+                kwargs["dimensions"] = self.settings.embedding_dimensions
+            with track_dependency("embeddings"):
+                response = self.client.embeddings.create(model=self.settings.embedding_model, input=text, **kwargs)
             return response.data[0].embedding
         except Exception as exc:  # noqa: BLE001
             logger.warning("embedding fallback: %s", exc)
+            FALLBACKS.labels("embedding").inc()
             return None
 
     def _fallback_response(
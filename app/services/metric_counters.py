@@ -0,0 +1,129 @@
+import logging
+import random
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import ConversationMessage, ConversationSession, EscalationTicket, LeadCapture, MetricCounter
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_TOTAL = "sessions_total"
+MESSAGES_TOTAL = "messages_total"
+ESCALATIONS_OPEN = "escalations_open"
+LEAD_CAPTURES_TOTAL = "lead_captures_total"
+
+# Models counted one-for-one per row; open escalations are tracked by status separately.
+ROW_COUNTERS = {
+    ConversationSession: SESSIONS_TOTAL,
+    ConversationMessage: MESSAGES_TOTAL,
+    LeadCapture: LEAD_CAPTURES_TOTAL,
+}
+COUNTERS = (SESSIONS_TOTAL, MESSAGES_TOTAL, ESCALATIONS_OPEN, LEAD_CAPTURES_TOTAL)
+
+
+def _is_open(ticket: EscalationTicket) -> bool:
+    return (ticket.status or "open") == "open"
+
+
+def flush_deltas(session: Session) -> Counter:
+    """Counter changes implied by the objects a flush is about to write."""
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if type(obj) in ROW_COUNTERS:
+            deltas[ROW_COUNTERS[type(obj)]] += 1
+        elif isinstance(obj, EscalationTicket) and _is_open(obj):
+            deltas[ESCALATIONS_OPEN] += 1
+    for obj in session.deleted:
+        if type(obj) in ROW_COUNTERS:
+            deltas[ROW_COUNTERS[type(obj)]] -= 1
+        elif isinstance(obj, EscalationTicket):
+            history = inspect(obj).attrs.status.history
+            was = history.deleted[0] if history.deleted else obj.status
+            if was == "open":
+                deltas[ESCALATIONS_OPEN] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, EscalationTicket):
+            continue
+        history = inspect(obj).attrs.status.history
+        if history.has_changes():
+            deltas[ESCALATIONS_OPEN] += ("open" in history.added) - ("open" in history.deleted)
+    return deltas
+
+
+def increment(connection: Connection, deltas: dict[str, int], shard: int | None = None, include_zero: bool = False) -> None:
+    """Upsert-add `deltas` onto one shard row per counter (random shard unless given)."""
+    if shard is None:
+        shard = random.randrange(max(get_settings().metrics_counter_shards, 1))
+    insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    now = datetime.now(timezone.utc)
+    for name, delta in sorted(deltas.items()):
+        if not delta and not include_zero:
+            continue
+        stmt = insert(MetricCounter).values(name=name, shard=shard, value=delta, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MetricCounter.name, MetricCounter.shard],
+            set_={"value": MetricCounter.value + stmt.excluded.value, "updated_at": now},
+        )
+        connection.execute(stmt)
+
+
+def _after_flush(session: Session, _flush_context) -> None:
+    deltas = flush_deltas(session)
+    if any(deltas.values()):
+        increment(session.connection(), deltas)
+
+
+def install_counter_tracking() -> None:
+    """Keep the counters in step with every ORM flush, in the flushing transaction."""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+
+
+async def read_counters(db: AsyncSession) -> dict[str, int]:
+    rows = await db.execute(select(MetricCounter.name, func.sum(MetricCounter.value)).group_by(MetricCounter.name))
+    values = {name: int(total or 0) for name, total in rows.all()}
+    return {name: values.get(name, 0) for name in COUNTERS}
+
+
+def _counted(db: Session) -> dict[str, int]:
+    return {
+        SESSIONS_TOTAL: db.scalar(select(func.count()).select_from(ConversationSession)) or 0,
+        MESSAGES_TOTAL: db.scalar(select(func.count()).select_from(ConversationMessage)) or 0,
+        ESCALATIONS_OPEN: db.scalar(
+            select(func.count()).select_from(EscalationTicket).where(EscalationTicket.status == "open")
+        )
+        or 0,
+        LEAD_CAPTURES_TOTAL: db.scalar(select(func.count()).select_from(LeadCapture)) or 0,
+    }
+
+
+def reconcile_counters(db: Session) -> dict:
+    """
+    Recount the rows and add the difference onto shard 0. Counts and counter sums are read from
+    one snapshot (counters move in the same transaction as their rows), and the correction is an
+    increment, so turns committed meanwhile are not lost.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    counted = _counted(db)
+    rows = db.execute(select(MetricCounter.name, func.sum(MetricCounter.value)).group_by(MetricCounter.name)).all()
+    stored = {name: int(total or 0) for name, total in rows}
+    db.rollback()
+
+    drift = {name: counted[name] - stored.get(name, 0) for name in COUNTERS}
+    increment(db.connection(), drift, shard=0, include_zero=True)
+    db.commit()
+    if any(drift.values()):
+        logger.warning("metric counter drift corrected: %s", {name: value for name, value in drift.items() if value})
+    return {name: {"counted": counted[name], "stored": stored.get(name, 0), "drift": drift[name]} for name in COUNTERS}
+
+
+def counters_seeded(db: Session) -> bool:
+    return db.scalar(select(MetricCounter.name).limit(1)) is not None
@@ -1,12 +1,16 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import TypedDict
 
-from langgraph.graph import END, START, StateGraph
 from sqlalchemy.orm import Session
 
+from app.db.models import EscalationTicket
+from app.db.session import get_read_session
+from app.services.context_packer import ContextPacker
 from app.services.escalation_service import EscalationService
 from app.services.llm_service import LLMService
 from app.services.policy_service import PolicyService
+from app.services.policy_snapshot import get_policy_snapshot
 from app.services.privacy_service import PrivacyService
 from app.services.retrieval_service import RetrievalService
 
@@ -19,10 +23,12 @@ class AgentState(TypedDict, total=False):
     confidence: float
     deterministic_response: str | None
     references: list[dict]
+    context: list[dict]
     response_text: str
     escalated: bool
     escalation_reason: str | None
     escalation_excerpt: str | None
+    escalation_ticket: EscalationTicket | None
 
 
 @dataclass
@@ -33,6 +39,73 @@ class AgentResult:
     escalated: bool
     escalation_reason: str | None
     references: list[dict]
+    # Built but not added to any session; the caller stores it and sends its notification after commit.
+    escalation_ticket: EscalationTicket | None = None
+
+
+def _node(method: str):
+    # Nodes find the turn's orchestrator in the run config, so one compiled graph serves every turn.
+    # `config` stays unannotated: langgraph only passes it to an untyped or RunnableConfig parameter.
+    def run(state, config):
+        return getattr(config["configurable"]["orchestrator"], method)(state)
+
+    return run
+
+
+@lru_cache(maxsize=1)
+def get_agent_graph():
+    """
+    The agent graph, compiled once per process. langgraph (and the langchain/langsmith stack behind
+    it) is only imported here, on the first turn or at startup warmup.
+    """
+    from langgraph.graph import END, START, StateGraph
+
+    graph = StateGraph(AgentState)
+    graph.add_node("compliance", _node("_compliance"))
+    graph.add_node("deterministic", _node("_deterministic"))
+    graph.add_node("intent", _node("_intent"))
+    graph.add_node("retrieve", _node("_retrieve"))
+    graph.add_node("draft", _node("_draft"))
+    graph.add_node("guardrail", _node("_guardrail"))
+    graph.add_node("escalate", _node("_escalate"))
+    graph.add_node("finalize", _node("_finalize"))
+
+    graph.add_edge(START, "compliance")
+    graph.add_conditional_edges(
+        "compliance",
+        AgentOrchestrator._route_after_compliance,
+        {"deterministic": "deterministic", "escalate": "escalate"},
+    )
+    graph.add_conditional_edges(
+        "deterministic",
+        AgentOrchestrator._route_after_deterministic,
+        {"finalize": "finalize", "intent": "intent"},
+    )
+    graph.add_edge("intent", "retrieve")
+    graph.add_edge("retrieve", "draft")
+    graph.add_edge("draft", "guardrail")
+    graph.add_conditional_edges(
+        "guardrail",
+        AgentOrchestrator._route_after_guardrail,
+        {"finalize": "finalize", "escalate": "escalate"},
+    )
+    graph.add_edge("escalate", "finalize")
+    graph.add_edge("finalize", END)
+
+    return graph.compile()
+
+
+def run_agent_turn(session_id: str, channel: str, query: str) -> AgentResult:
+    """
+    One graph run on its own read session (a replica when configured). The graph, LLM client and
+    retrieval are blocking, so async routes call this through `run_in_threadpool`. The turn writes
+    nothing: an escalation comes back unsaved on the result for the caller's transaction.
+    """
+    db = get_read_session()
+    try:
+        return AgentOrchestrator(db).run(session_id=session_id, channel=channel, query=query)
+    finally:
+        db.close()
 
 
 class AgentOrchestrator:
@@ -43,46 +116,17 @@ class AgentOrchestrator:
         self.llm_service = LLMService()
         self.escalation_service = EscalationService(db)
         self.privacy_service = PrivacyService()
-        self.policies = self.policy_service.get_active_policies()
-        self.graph = self._build_graph()
-
-    def _build_graph(self):
-        graph = StateGraph(AgentState)
-        graph.add_node("compliance", self._compliance)
-        graph.add_node("deterministic", self._deterministic)
-        graph.add_node("intent", self._intent)
-        graph.add_node("retrieve", self._retrieve)
-        graph.add_node("draft", self._draft)
-        graph.add_node("guardrail", self._guardrail)
-        graph.add_node("escalate", self._escalate)
-        graph.add_node("finalize", self._finalize)
-
-        graph.add_edge(START, "compliance")
-        graph.add_conditional_edges(
-            "compliance",
-            self._route_after_compliance,
-            {"deterministic": "deterministic", "escalate": "escalate"},
-        )
-        graph.add_conditional_edges(
-            "deterministic",
-            self._route_after_deterministic,
-            {"finalize": "finalize", "intent": "intent"},
-        )
-        graph.add_edge("intent", "retrieve")
-        graph.add_edge("retrieve", "draft")
-        graph.add_edge("draft", "guardrail")
-        graph.add_conditional_edges(
-            "guardrail",
-            self._route_after_guardrail,
-            {"finalize": "finalize", "escalate": "escalate"},
-        )
-        graph.add_edge("escalate", "finalize")
-        graph.add_edge("finalize", END)
-
-        return graph.compile()
+        self.context_packer = ContextPacker()
+        # Compiled once per policy version and shared across turns: no policy queries per turn. Read
+        # from the primary even when `db` is a replica, so an announced update is never missed.
+        self.policy_snapshot = get_policy_snapshot()
+        self.policies = self.policy_snapshot.policies
 
     def run(self, session_id: str, channel: str, query: str) -> AgentResult:
-        state = self.graph.invoke({"session_id": session_id, "channel": channel, "query": query})
+        state = get_agent_graph().invoke(
+            {"session_id": session_id, "channel": channel, "query": query},
+            config={"configurable": {"orchestrator": self}},
+        )
         return AgentResult(
             intent=state.get("intent", "other_unknown"),
             confidence=float(state.get("confidence", 0.0)),
@@ -90,6 +134,7 @@ class AgentOrchestrator:
             escalated=bool(state.get("escalated", False)),
             escalation_reason=state.get("escalation_reason"),
             references=state.get("references", []),
+            escalation_ticket=state.get("escalation_ticket"),
         )
 
     def _deterministic(self, state: AgentState) -> AgentState:
@@ -139,8 +184,13 @@ class AgentOrchestrator:
     def _retrieve(self, state: AgentState) -> AgentState:
         if state.get("intent") in {"hours_location_contact", "clinical_risk_or_emergency"}:
             return {"references": []}
-        refs = self.retrieval_service.search(state["query"], top_k=5)
-        return {"references": refs}
+        hits = self.retrieval_service.search(state["query"], top_k=5, intent=state.get("intent"))
+        # Citations stay compact; the drafter gets stitched, deduplicated, budgeted passages instead.
+        refs = [
+            {"source_url": hit["source_url"], "title": hit["title"], "snippet": hit["snippet"], "score": hit["score"]}
+            for hit in hits
+        ]
+        return {"references": refs, "context": self.context_packer.pack(hits)}
 
     def _draft(self, state: AgentState) -> AgentState:
         if state.get("deterministic_response"):
@@ -151,6 +201,7 @@ class AgentOrchestrator:
             references=state.get("references", []),
             policies=self.policies,
             channel=state.get("channel", "web"),
+            context=state.get("context"),
         )
         return {"response_text": text}
 
@@ -200,7 +251,7 @@ class AgentOrchestrator:
                 "escalation_reason": "low_confidence",
             }
 
-        if not self.policy_service.is_open_now(self.policies):
+        if not self.policy_snapshot.is_open_now():
             callback_hint = (
                 " We're currently outside business hours, but I can collect your details "
                 "for callback during office hours."
@@ -212,7 +263,7 @@ class AgentOrchestrator:
     def _escalate(self, state: AgentState) -> AgentState:
         reason = state.get("escalation_reason") or "manual_review"
         priority = "high" if reason == "clinical_risk_or_emergency" else "medium"
-        ticket = self.escalation_service.create_ticket(
+        ticket = self.escalation_service.build_ticket(
             session_id=state["session_id"],
             channel=state["channel"],
             reason=reason,
@@ -226,6 +277,7 @@ class AgentOrchestrator:
         return {
             "escalated": True,
             "response_text": f"{response} (Ticket {ticket.id})",
+            "escalation_ticket": ticket,
         }
 
     def _finalize(self, state: AgentState) -> AgentState:
@@ -0,0 +1,195 @@
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Tables that `009_partition_messages_audit.sql` converts to monthly range partitions on created_at.
+PARTITIONED_TABLES = ("conversation_messages", "audit_logs")
+EXPIRY_MODES = ("drop", "detach")
+
+_PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: date | datetime) -> date:
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc) if value.tzinfo else value
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+def partition_bound(month: date) -> str:
+    # Bounds are written in UTC so they do not depend on the session TimeZone.
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+@dataclass(frozen=True)
+class MonthPartition:
+    table: str
+    start: date
+
+    @property
+    def name(self) -> str:
+        return f"{self.table}_p{self.start:%Y_%m}"
+
+    @property
+    def end(self) -> date:
+        return add_months(self.start, 1)
+
+    def create_sql(self) -> str:
+        return (
+            f'CREATE TABLE IF NOT EXISTS "{self.name}" PARTITION OF "{self.table}" '
+            f"FOR VALUES FROM ('{partition_bound(self.start)}') TO ('{partition_bound(self.end)}')"
+        )
+
+    def range_sql(self) -> str:
+        return f"created_at >= '{partition_bound(self.start)}' AND created_at < '{partition_bound(self.end)}'"
+
+    def expired(self, cutoff: datetime) -> bool:
+        """True when every row the partition can hold is older than `cutoff`."""
+        end = datetime(self.end.year, self.end.month, 1, tzinfo=timezone.utc)
+        return end <= cutoff
+
+
+def parse_partition(table: str, name: str) -> MonthPartition | None:
+    if not name.startswith(f"{table}_p"):
+        return None
+    match = _PARTITION_NAME.search(name)
+    if not match:
+        return None
+    return MonthPartition(table, date(int(match.group(1)), int(match.group(2)), 1))
+
+
+def months_to_create(table: str, existing: list[MonthPartition], today: date, months_ahead: int) -> list[MonthPartition]:
+    """Missing partitions from the current month through `months_ahead` months out."""
+    have = {partition.start for partition in existing}
+    current = month_start(today)
+    wanted = [MonthPartition(table, add_months(current, offset)) for offset in range(max(months_ahead, 0) + 1)]
+    return [partition for partition in wanted if partition.start not in have]
+
+
+class PartitionService:
+    """
+    Monthly partitions for the tables converted by `009_partition_messages_audit.sql`. On other
+    databases, or before the migration has run, every table reports unpartitioned and the
+    methods are no-ops, so callers fall back to row deletes.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.settings = get_settings()
+
+    def is_partitioned(self, table: str) -> bool:
+        if self.db.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(
+            self.db.scalar(
+                text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+                    "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table)"
+                ),
+                {"table": table},
+            )
+        )
+
+    def partitions(self, table: str) -> list[MonthPartition]:
+        names = self.db.scalars(
+            text(
+                "SELECT child.relname FROM pg_inherits i "
+                "JOIN pg_class parent ON parent.oid = i.inhparent "
+                "JOIN pg_class child ON child.oid = i.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        ).all()
+        parsed = [parse_partition(table, name) for name in names]
+        return sorted((partition for partition in parsed if partition), key=lambda partition: partition.start)
+
+    def estimated_rows(self, partition: MonthPartition) -> int:
+        # Planner statistics: avoids scanning a partition that is about to be dropped.
+        estimate = self.db.scalar(text("SELECT reltuples FROM pg_class WHERE relname = :name"), {"name": partition.name})
+        return max(int(estimate or 0), 0)
+
+    def has_default(self, table: str) -> bool:
+        return bool(self.db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": f'"{default_partition(table)}"'}))
+
+    def ensure_future(self, months_ahead: int | None = None) -> dict[str, list[str]]:
+        """
+        Create any missing partitions for this month and the next `months_ahead` months, moving
+        rows the DEFAULT partition took for those months into them.
+        """
+        months_ahead = self.settings.db_partition_months_ahead if months_ahead is None else months_ahead
+        created: dict[str, list[str]] = {}
+        today = datetime.now(timezone.utc).date()
+        for table in PARTITIONED_TABLES:
+            if not self.is_partitioned(table):
+                continue
+            missing = months_to_create(table, self.partitions(table), today, months_ahead)
+            has_default = self.has_default(table)
+            for partition in missing:
+                if has_default:
+                    self._split_default(partition)
+                else:
+                    self.db.execute(text(partition.create_sql()))
+            if missing:
+                self.db.commit()
+                logger.info("created partitions %s", [partition.name for partition in missing])
+            created[table] = [partition.name for partition in missing]
+        return created
+
+    def _split_default(self, partition: MonthPartition) -> None:
+        """
+        Create `partition` next to the DEFAULT partition. Postgres refuses the CREATE while the
+        default holds rows in its range, so those rows are moved out with the default detached;
+        the parent's lock holds concurrent inserts until the transaction commits.
+        """
+        default = default_partition(partition.table)
+        if not self.db.scalar(text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {partition.range_sql()})')):
+            self.db.execute(text(partition.create_sql()))
+            return
+        self.db.execute(text(f'ALTER TABLE "{partition.table}" DETACH PARTITION "{default}"'))
+        self.db.execute(text(partition.create_sql()))
+        moved = self.db.execute(
+            text(
+                f'WITH moved AS (DELETE FROM "{default}" WHERE {partition.range_sql()} RETURNING *) '
+                f'INSERT INTO "{partition.table}" SELECT * FROM moved'
+            )
+        ).rowcount
+        self.db.execute(text(f'ALTER TABLE "{partition.table}" ATTACH PARTITION "{default}" DEFAULT'))
+        logger.info("moved %s rows of %s from %s into %s", moved, partition.table, default, partition.name)
+
+    def expire(self, table: str, cutoff: datetime, dry_run: bool = False) -> list[dict]:
+        """
+        Drop (or detach, with DB_PARTITION_EXPIRY=detach) partitions whose whole range is older
+        than `cutoff`. Rows newer than the last expired partition still need a row delete.
+        """
+        mode = self.settings.db_partition_expiry
+        if mode not in EXPIRY_MODES:
+            raise ValueError(f"DB_PARTITION_EXPIRY must be one of {EXPIRY_MODES}, got {mode!r}")
+        expired = [partition for partition in self.partitions(table) if partition.expired(cutoff)]
+        report = [{"partition": partition.name, "estimated_rows": self.estimated_rows(partition)} for partition in expired]
+        if dry_run or not expired:
+            return report
+        for partition in expired:
+            self.db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{partition.name}"'))
+            if mode == "drop":
+                self.db.execute(text(f'DROP TABLE "{partition.name}"'))
+        # Detach/drop lock the parent table; release it before any row deletes run.
+        self.db.commit()
+        logger.info("%s partitions of %s: %s", mode, table, [partition.name for partition in expired])
+        return report
@@ -1,12 +1,12 @@
 import re
 from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
 from app.db.models import BusinessPolicy
+from app.services.policy_snapshot import get_policy_snapshot_cache, parse_business_hours
 
 
 class PolicyService:
@@ -32,6 +32,8 @@ class PolicyService:
             row.effective_to = now
         self.db.add(BusinessPolicy(policy_key=key, policy_value=value, updated_by=updated_by))
         self.db.commit()
+        # The new row's id is the policy version; every worker's snapshot reloads once it sees it.
+        get_policy_snapshot_cache().invalidate(self.db.scalar(select(func.max(BusinessPolicy.id))) or 0)
 
     def deterministic_response(self, query: str, policies: dict[str, str]) -> str | None:
         q = query.lower().strip()
@@ -50,10 +52,7 @@ class PolicyService:
 
         return None
 
-    def is_open_now(self, policies: dict[str, str]) -> bool:
-        # Grounded default schedule from policy assumptions: Mon-Fri 9-4 ET.
-        tz = ZoneInfo(self.settings.timezone)
-        now = datetime.now(tz)
-        if now.weekday() >= 5:
-            return False
-        return 9 <= now.hour < 16
+    def is_open_now(self, policies: dict[str, str], at: datetime | None = None) -> bool:
+        """Against the business_hours policy; the hot path uses the compiled `PolicySnapshot` instead."""
+        schedule = parse_business_hours(policies.get("business_hours", ""), self.settings.timezone)
+        return schedule.is_open(at or datetime.now(schedule.tz))
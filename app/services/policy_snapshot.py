@@ -0,0 +1,277 @@
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from threading import Lock
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.metrics import CACHE_EVENTS
+from app.core.redis_client import get_redis
+from app.db.models import BusinessPolicy
+from app.db.session import get_session_factory
+
+logger = logging.getLogger(__name__)
+
+POLICY_VERSION_CHANNEL = "policy:version"
+
+DAY_NAMES = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tues": 1, "tue": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thurs": 3, "thur": 3, "thu": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}  # fmt: skip
+ZONE_ABBREVIATIONS = {
+    "et": "America/New_York", "est": "America/New_York", "edt": "America/New_York",
+    "ct": "America/Chicago", "cst": "America/Chicago", "cdt": "America/Chicago",
+    "mt": "America/Denver", "mst": "America/Denver", "mdt": "America/Denver",
+    "pt": "America/Los_Angeles", "pst": "America/Los_Angeles", "pdt": "America/Los_Angeles",
+}  # fmt: skip
+# The schedule `is_open_now` assumed before it read the business_hours policy: Mon-Fri 9-4.
+DEFAULT_HOURS = {day: ((9 * 60, 16 * 60),) for day in range(5)}
+
+_DAY = "|".join(sorted(DAY_NAMES, key=len, reverse=True))
+_TIME = r"\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?"
+_RANGE_SEP = r"\s*(?:-|–|—|to|through|thru)\s*"
+_SEGMENT = re.compile(
+    rf"(?P<days>\b(?:{_DAY})\.?(?:(?:{_RANGE_SEP}|\s*(?:,|&|and)\s*)(?:{_DAY})\.?)*)\s*[:,]?\s*"
+    rf"(?P<open>{_TIME}){_RANGE_SEP}(?P<close>{_TIME})",
+    re.IGNORECASE,
+)
+_TIME_PARTS = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*([ap])?", re.IGNORECASE)
+
+
+def _parse_days(spec: str) -> set[int]:
+    days: set[int] = set()
+    for part in re.split(r"\s*(?:,|&|\band\b)\s*", spec.lower()):
+        names = [name.rstrip(".") for name in re.split(_RANGE_SEP, part.strip()) if name.strip()]
+        if not names or any(name not in DAY_NAMES for name in names):
+            continue
+        first, last = DAY_NAMES[names[0]], DAY_NAMES[names[-1]]
+        days.update((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+    return days
+
+
+def _minutes(value: str, meridiem_hint: str | None = None) -> tuple[int, str | None]:
+    match = _TIME_PARTS.match(value.strip())
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or meridiem_hint or "").lower() or None
+    if meridiem == "p" and hour < 12:
+        hour += 12
+    elif meridiem == "a" and hour == 12:
+        hour = 0
+    return hour * 60 + minute, match.group(3)
+
+
+def _interval(open_text: str, close_text: str) -> tuple[int, int] | None:
+    close, close_meridiem = _minutes(close_text)
+    open_, open_meridiem = _minutes(open_text, None)
+    if open_meridiem is None and close_meridiem is not None:
+        # "9-4 PM": the opening time takes the closing meridiem unless that would open after closing.
+        with_hint, _ = _minutes(open_text, close_meridiem)
+        open_ = with_hint if with_hint < close else open_
+    if open_meridiem is None and close_meridiem is None and close <= open_ and close < 12 * 60:
+        close += 12 * 60  # "9-4" reads as 9 AM to 4 PM
+    if close == 0:
+        close = 24 * 60
+    if close <= open_ and close_meridiem is not None:
+        close += 24 * 60  # "6 PM-2 AM" runs past midnight
+    return (open_, close) if close > open_ else None
+
+
+@dataclass(frozen=True)
+class BusinessSchedule:
+    """Weekly opening intervals in minutes after local midnight, per weekday (Monday = 0)."""
+
+    tz: ZoneInfo
+    hours: dict[int, tuple[tuple[int, int], ...]]
+    parsed: bool = True
+
+    def is_open(self, at: datetime) -> bool:
+        local = at.astimezone(self.tz)
+        minute = local.hour * 60 + local.minute
+        return any(start <= minute < end for start, end in self.hours.get(local.weekday(), ()))
+
+    def _boundaries(self, day: date):
+        for start, end in self.hours.get(day.weekday(), ()):
+            midnight = datetime(day.year, day.month, day.day, tzinfo=self.tz)
+            yield midnight + timedelta(minutes=start)
+            yield midnight + timedelta(minutes=end)
+
+    def next_transition(self, at: datetime) -> datetime | None:
+        """The next opening or closing time strictly after `at`; None for a schedule that never opens."""
+        local_day = at.astimezone(self.tz).date()
+        for offset in range(8):
+            upcoming = [moment for moment in self._boundaries(local_day + timedelta(days=offset)) if moment > at]
+            if upcoming:
+                return min(upcoming)
+        return None
+
+
+def parse_business_hours(text: str, default_timezone: str) -> BusinessSchedule:
+    """
+    Read a schedule out of the free-text business_hours policy, e.g. "Monday-Friday 9:00 AM-4:00 PM
+    ET", "Monday through Friday, 8:30 AM to 5 PM" or "Mon-Thu 8am-5pm; Fri 8am-noon; Sat 6 PM-2 AM".
+    Ranges past midnight continue on the next day. Days not mentioned are closed. Text with no
+    recognisable day and time range falls back to the Mon-Fri 9-4 default.
+    """
+    zone = re.search(rf"\b({'|'.join(ZONE_ABBREVIATIONS)})\b", text or "", re.IGNORECASE)
+    tz = ZoneInfo(ZONE_ABBREVIATIONS[zone.group(1).lower()] if zone else default_timezone)
+    hours: dict[int, list[tuple[int, int]]] = {}
+    normalized = re.sub(r"\bnoon\b", "12:00 PM", text or "", flags=re.IGNORECASE)
+    for match in _SEGMENT.finditer(normalized):
+        interval = _interval(match.group("open"), match.group("close"))
+        if interval is None:
+            continue
+        open_, close = interval
+        for day in _parse_days(match.group("days")):
+            hours.setdefault(day, []).append((open_, min(close, 24 * 60)))
+            if close > 24 * 60:
+                hours.setdefault((day + 1) % 7, []).append((0, close - 24 * 60))
+    if not hours:
+        return BusinessSchedule(tz=tz, hours=DEFAULT_HOURS, parsed=False)
+    return BusinessSchedule(tz=tz, hours={day: tuple(sorted(spans)) for day, spans in hours.items()})
+
+
+class PolicySnapshot:
+    """
+    Active policies compiled once per policy version: the key/value map, the parsed business
+    hours, and the open/closed state with the time it next changes. Reading it costs no queries.
+    """
+
+    def __init__(self, version: int, policies: dict[str, str], default_timezone: str) -> None:
+        self.version = version
+        self.policies = policies
+        self.schedule = parse_business_hours(policies.get("business_hours", ""), default_timezone)
+        if not self.schedule.parsed and policies.get("business_hours"):
+            logger.warning("business_hours policy not understood, using Mon-Fri 9-4: %r", policies["business_hours"])
+        self._state = self._compute(datetime.now(self.schedule.tz))
+
+    def _compute(self, now: datetime) -> tuple[bool, datetime | None]:
+        return self.schedule.is_open(now), self.schedule.next_transition(now)
+
+    @property
+    def next_transition(self) -> datetime | None:
+        return self._state[1]
+
+    def is_open_now(self, at: datetime | None = None) -> bool:
+        if at is not None:
+            return self.schedule.is_open(at)
+        state = self._state
+        now = datetime.now(self.schedule.tz)
+        if state[1] is not None and now >= state[1]:
+            # Crossed an open/close boundary: advance (a tuple swap, safe without a lock).
+            state = self._state = self._compute(now)
+        return state[0]
+
+
+def load_snapshot(db: Session) -> PolicySnapshot:
+    # Version first: a concurrent update then at worst makes this snapshot look older than it is.
+    version = db.scalar(select(func.max(BusinessPolicy.id))) or 0
+    rows = db.scalars(select(BusinessPolicy).where(BusinessPolicy.effective_to.is_(None))).all()
+    return PolicySnapshot(version, {row.policy_key: row.policy_value for row in rows}, get_settings().timezone)
+
+
+class PolicySnapshotCache:
+    """
+    Per-process policy snapshot. `update_policy` bumps the version (the newest policy row id) and
+    announces it on the Redis channel `policy:version`; other workers hear it on a listener thread.
+    Without Redis, or while the subscription is down, a worker checks the version in the database
+    at most every `policy_version_poll_seconds`. Each new subscription is followed by one database
+    check, since an update published before it was in place is never heard.
+    """
+
+    def __init__(self, poll_seconds: float) -> None:
+        self.poll_seconds = poll_seconds
+        self._snapshot: PolicySnapshot | None = None
+        self._announced = 0
+        self._checked_at = 0.0
+        self._subscribed = False
+        self._subscribed_at = 0.0
+        self._lock = Lock()
+
+    def get(self, db: Session) -> PolicySnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale(snapshot, db):
+            CACHE_EVENTS.labels("policy", "hit").inc()
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot is snapshot:
+                self._snapshot = load_snapshot(db)
+                self._checked_at = time.monotonic()
+                CACHE_EVENTS.labels("policy", "reload").inc()
+            return self._snapshot
+
+    def _stale(self, snapshot: PolicySnapshot, db: Session) -> bool:
+        if snapshot.version < self._announced:
+            return True
+        if self._subscribed:
+            if self._checked_at > self._subscribed_at:
+                return False
+        elif time.monotonic() - self._checked_at < self.poll_seconds:
+            return False
+        self._checked_at = time.monotonic()
+        return (db.scalar(select(func.max(BusinessPolicy.id))) or 0) != snapshot.version
+
+    def announce(self, version: int) -> None:
+        self._announced = max(self._announced, version)
+
+    def invalidate(self, version: int) -> None:
+        """Called after a policy write commits: reload here and tell the other workers."""
+        self.announce(version)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                redis.publish(POLICY_VERSION_CHANNEL, version)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("policy version publish failed: %s", exc)
+
+    def start_listener(self) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        threading.Thread(target=self._listen, args=(redis,), name="policy-version-listener", daemon=True).start()
+
+    def _listen(self, redis) -> None:
+        try:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(POLICY_VERSION_CHANNEL)
+            self._subscribed_at = time.monotonic()
+            self._subscribed = True
+            for message in pubsub.listen():
+                self.announce(int(message["data"]))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("policy version subscription lost, polling the database instead: %s", exc)
+        finally:
+            self._subscribed = False
+
+
+@lru_cache(maxsize=1)
+def get_policy_snapshot_cache() -> PolicySnapshotCache:
+    cache = PolicySnapshotCache(get_settings().policy_version_poll_seconds)
+    cache.start_listener()
+    return cache
+
+
+def get_policy_snapshot(db: Session | None = None) -> PolicySnapshot:
+    """
+    `db` must be bound to the primary: a lagging replica would keep returning a version below the
+    announced one, so every call would reload and still serve the old policies. Without `db`, a
+    primary session is opened, and it only connects when the snapshot needs a check or a reload.
+    """
+    if db is not None:
+        return get_policy_snapshot_cache().get(db)
+    db = get_session_factory()()
+    try:
+        return get_policy_snapshot_cache().get(db)
+    finally:
+        db.close()
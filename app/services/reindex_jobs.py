@@ -0,0 +1,170 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import AuditLog, KBReindexJob
+from app.db.session import get_session_factory
+from app.services.kb_service import KBService
+
+logger = logging.getLogger(__name__)
+
+KB_REINDEX_LOCK_KEY = "kb"
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class ReindexJobConflict(Exception):
+    def __init__(self, active_job_id: str | None) -> None:
+        super().__init__(f"reindex job already active: {active_job_id}")
+        self.active_job_id = active_job_id
+
+
+class ReindexCancelled(Exception):
+    pass
+
+
+class ReindexAbandoned(Exception):
+    """The job was released as stale while still running; its build must not be published."""
+
+
+class ReindexJobService:
+    """
+    Persisted reindex jobs. Submitting takes the KB lock (a unique `lock_key` on the job row), so a
+    second submit while one is queued or running fails with ReindexJobConflict. Jobs whose heartbeat
+    is older than `kb_reindex_stale_seconds` are treated as abandoned and release the lock.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.settings = get_settings()
+
+    def submit(self, urls: list[str] | None, force: bool, requested_by: str) -> KBReindexJob:
+        self._expire_stale()
+        job = KBReindexJob(lock_key=KB_REINDEX_LOCK_KEY, requested_by=requested_by, urls_json=urls, force=force)
+        self.db.add(job)
+        try:
+            self.db.flush()
+        except IntegrityError:
+            self.db.rollback()
+            active = self.active_job()
+            raise ReindexJobConflict(active.id if active else None) from None
+        self.db.add(AuditLog(actor=requested_by, action="kb_reindex_submitted", payload_json={"job_id": job.id}))
+        self.db.commit()
+        return job
+
+    def get(self, job_id: str) -> KBReindexJob | None:
+        return self.db.get(KBReindexJob, job_id)
+
+    def active_job(self) -> KBReindexJob | None:
+        return self.db.scalar(select(KBReindexJob).where(KBReindexJob.lock_key == KB_REINDEX_LOCK_KEY))
+
+    def cancel(self, job_id: str, requested_by: str) -> KBReindexJob | None:
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job
+        if job.status == "queued":
+            _finish(job, "cancelled")
+        else:
+            # The runner checks this flag after every page and stops at the next one.
+            job.cancel_requested = True
+        self.db.add(AuditLog(actor=requested_by, action="kb_reindex_cancel", payload_json={"job_id": job_id}))
+        self.db.commit()
+        return job
+
+    def _expire_stale(self) -> None:
+        active = self.active_job()
+        if active is None:
+            return
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.settings.kb_reindex_stale_seconds)
+        last_seen = active.heartbeat_at or active.created_at
+        if last_seen.tzinfo is None:
+            last_seen = last_seen.replace(tzinfo=timezone.utc)
+        if last_seen < cutoff:
+            logger.warning("releasing abandoned reindex job %s (last heartbeat %s)", active.id, last_seen)
+            _finish(active, "failed", error="abandoned: no progress heartbeat")
+            self.db.commit()
+
+
+def _finish(job: KBReindexJob, status: str, result: dict | None = None, error: str | None = None) -> None:
+    job.status = status
+    job.lock_key = None
+    job.finished_at = datetime.now(timezone.utc)
+    if result is not None:
+        job.result_json = result
+    if error is not None:
+        job.error = error
+
+
+def serialize_job(job: KBReindexJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "requested_by": job.requested_by,
+        "urls": job.urls_json,
+        "force": job.force,
+        "cancel_requested": job.cancel_requested,
+        "progress": job.progress_json or {},
+        "result": job.result_json,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def run_reindex_job(job_id: str) -> dict:
+    """
+    Execute a queued job. Job state is written through its own session so progress and the cancel
+    flag are visible to pollers while the KB session is mid-run.
+    """
+    session_factory = get_session_factory()
+    control = session_factory()
+    work = session_factory()
+    try:
+        now = datetime.now(timezone.utc)
+        # Conditional claim so a job cancelled while queued (or claimed elsewhere) is never started.
+        claimed = control.execute(
+            update(KBReindexJob)
+            .where(KBReindexJob.id == job_id, KBReindexJob.status == "queued")
+            .values(status="running", started_at=now, heartbeat_at=now)
+        ).rowcount
+        control.commit()
+        job = control.get(KBReindexJob, job_id)
+        if job is None:
+            return {}
+        if not claimed:
+            return serialize_job(job)
+
+        def progress(snapshot: dict) -> None:
+            control.refresh(job)
+            if job.status != "running":
+                raise ReindexAbandoned()
+            job.progress_json = snapshot
+            job.heartbeat_at = datetime.now(timezone.utc)
+            control.commit()
+            if job.cancel_requested:
+                raise ReindexCancelled()
+
+        try:
+            result = KBService(work).reindex(job.urls_json, job.requested_by, force=job.force, progress=progress)
+        except ReindexAbandoned:
+            work.rollback()
+            # Another submit expired this job and may already hold the lock; leave its record alone.
+            logger.warning("reindex job %s was released as stale while running; stopped without publishing", job_id)
+        except ReindexCancelled:
+            work.rollback()
+            _finish(job, "cancelled")
+        except Exception as exc:  # noqa: BLE001
+            work.rollback()
+            logger.exception("reindex job %s failed", job_id)
+            _finish(job, "failed", error=str(exc)[:1000])
+        else:
+            _finish(job, "succeeded", result=result)
+        control.commit()
+        return serialize_job(job)
+    finally:
+        work.close()
+        control.close()
@@ -1,72 +1,352 @@
+import copy
+import json
+import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import and_, delete, exists, func, not_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
-from app.db.models import AuditLog, ConversationMessage, EscalationTicket
+from app.db.models import AuditLog, ConversationMessage, ConversationSession, EscalationTicket, LeadCapture, RetentionRun
+from app.db.session import get_session_factory
+from app.services.metric_counters import LEAD_CAPTURES_TOTAL, MESSAGES_TOTAL, SESSIONS_TOTAL, increment
+from app.services.partitions import PartitionService
+
+logger = logging.getLogger(__name__)
+
+RETENTION_LOCK_KEY = "retention"
+CLOSED_ESCALATION_STATUSES = ("resolved", "closed")
+# Short names used by the response keys (`deleted_messages`, `escalations_to_delete`, ...).
+TABLE_LABELS = {
+    "conversation_messages": "messages",
+    "escalation_tickets": "escalations",
+    "lead_captures": "leads",
+    "conversation_sessions": "sessions",
+    "audit_logs": "audit_logs",
+}
+
+
+class RetentionRunConflict(Exception):
+    def __init__(self, active_run_id: str | None) -> None:
+        super().__init__(f"retention run already active: {active_run_id}")
+        self.active_run_id = active_run_id
+
+
+@dataclass(frozen=True)
+class RetentionStep:
+    table: str
+    model: Any
+    key: Any
+    criterion: Any
+    # Metric counter the step's deletes come off; bulk deletes bypass the flush-time tracking.
+    counter: str | None = None
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _parse(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _explain_sql(query, dialect) -> tuple[str, dict]:
+    # `exec_driver_sql` skips SQLAlchemy's statement processing, so expanding IN parameters
+    # must be rendered at compile time or the POSTCOMPILE placeholders reach Postgres verbatim.
+    compiled = query.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    return f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
 
 
 class RetentionService:
+    """
+    Deletes expired rows table by table in keyset-ordered batches of `retention_batch_size`. Each
+    batch commits together with its checkpoint, with `retention_batch_sleep_seconds` between
+    batches, so no transaction holds row locks for long. Tables run in cascade order: messages,
+    closed escalations, leads, then sessions left with none of those, then audit logs.
+
+    Runs are persisted in `retention_runs`. A run that failed, or stopped sending heartbeats for
+    `retention_stale_seconds`, is resumed with its original cutoffs by the next call.
+    """
+
     def __init__(self, db: Session) -> None:
         self.db = db
         self.settings = get_settings()
+        self.partitions = PartitionService(db)
+
+    def cutoffs(self, now: datetime) -> dict[str, datetime | None]:
+        audit_days = self.settings.retention_days_audit_logs
+        return {
+            "messages": now - timedelta(days=max(self.settings.retention_days_messages, 1)),
+            "escalations": now - timedelta(days=max(self.settings.retention_days_escalations, 1)),
+            "leads": now - timedelta(days=max(self.settings.retention_days_leads, 1)),
+            # 0 keeps audit logs indefinitely.
+            "audit_logs": now - timedelta(days=audit_days) if audit_days > 0 else None,
+        }
+
+    def steps(self, cutoffs: dict[str, datetime | None]) -> list[RetentionStep]:
+        expired_ticket = and_(
+            EscalationTicket.created_at < cutoffs["escalations"],
+            EscalationTicket.status.in_(CLOSED_ESCALATION_STATUSES),
+        )
+        # Phrased over what survives retention, so it holds for dry runs before anything is deleted.
+        orphaned_session = and_(
+            ConversationSession.created_at < cutoffs["messages"],
+            ~exists().where(
+                ConversationMessage.session_id == ConversationSession.id,
+                ConversationMessage.created_at >= cutoffs["messages"],
+            ),
+            ~exists().where(LeadCapture.session_id == ConversationSession.id, LeadCapture.created_at >= cutoffs["leads"]),
+            ~exists().where(EscalationTicket.session_id == ConversationSession.id, not_(expired_ticket)),
+        )
+        steps = [
+            RetentionStep(
+                "conversation_messages",
+                ConversationMessage,
+                ConversationMessage.id,
+                ConversationMessage.created_at < cutoffs["messages"],
+                MESSAGES_TOTAL,
+            ),
+            RetentionStep("escalation_tickets", EscalationTicket, EscalationTicket.id, expired_ticket),
+            RetentionStep(
+                "lead_captures", LeadCapture, LeadCapture.id, LeadCapture.created_at < cutoffs["leads"], LEAD_CAPTURES_TOTAL
+            ),
+            RetentionStep(
+                "conversation_sessions", ConversationSession, ConversationSession.id, orphaned_session, SESSIONS_TOTAL
+            ),
+        ]
+        if cutoffs["audit_logs"] is not None:
+            steps.append(RetentionStep("audit_logs", AuditLog, AuditLog.id, AuditLog.created_at < cutoffs["audit_logs"]))
+        return steps
 
     def run_cleanup(self, updated_by: str, dry_run: bool = False) -> dict:
+        if dry_run:
+            return self._estimate()
+        run, resumed = self.claim(updated_by)
+        return self.execute(run, resumed)
+
+    def execute(self, run: RetentionRun, resumed: bool = False) -> dict:
+        """Work through a claimed run from its checkpoint; see `claim`."""
+        updated_by = run.requested_by
+        cutoffs = {name: _parse(value) for name, value in run.cutoffs_json.items()}
+        checkpoint = copy.deepcopy(run.checkpoint_json or {})
+        stats = copy.deepcopy(run.stats_json or {})
+        try:
+            # Retention runs on a schedule, which also keeps future months created ahead of inserts.
+            self.partitions.ensure_future()
+            for step in self.steps(cutoffs):
+                self._expire_partitions(run, step, cutoffs, checkpoint, stats)
+                self._run_step(run, step, checkpoint, stats)
+        except Exception as exc:
+            self.db.rollback()
+            run.status = "interrupted"
+            run.error = str(exc)[:1000]
+            self.db.commit()
+            logger.exception("retention run %s interrupted; the next run resumes it", run.id)
+            raise
+
+        run.status = "completed"
+        run.lock_key = None
+        run.error = None
+        run.finished_at = datetime.now(timezone.utc)
+        summary = self._summary(run, cutoffs, stats, dry_run=False, resumed=resumed)
+        self.db.add(AuditLog(actor=updated_by, action="retention_cleanup", payload_json=summary))
+        self.db.commit()
+        return summary
+
+    def claim(self, updated_by: str) -> tuple[RetentionRun, bool]:
+        """Take the single active-run slot: a new run, or the interrupted or stale one to resume."""
         now = datetime.now(timezone.utc)
-        message_cutoff = now - timedelta(days=max(self.settings.retention_days_messages, 1))
-        escalation_cutoff = now - timedelta(days=max(self.settings.retention_days_escalations, 1))
-
-        messages_to_delete = self.db.scalar(
-            select(func.count()).select_from(ConversationMessage).where(ConversationMessage.created_at < message_cutoff)
-        ) or 0
-
-        escalations_to_delete = self.db.scalar(
-            select(func.count())
-            .select_from(EscalationTicket)
-            .where(
-                EscalationTicket.created_at < escalation_cutoff,
-                EscalationTicket.status.in_(["resolved", "closed"]),
-            )
-        ) or 0
-
-        deleted_messages = 0
-        deleted_escalations = 0
-        if not dry_run:
-            deleted_messages = (
-                self.db.execute(delete(ConversationMessage).where(ConversationMessage.created_at < message_cutoff))
-                .rowcount
-                or 0
-            )
-            deleted_escalations = (
+        active = self.db.scalar(select(RetentionRun).where(RetentionRun.lock_key == RETENTION_LOCK_KEY))
+        if active is not None:
+            if active.status == "running" and not self._stale(active, now):
+                raise RetentionRunConflict(active.id)
+            logger.info("resuming retention run %s (%s)", active.id, active.status)
+            active.status = "running"
+            active.heartbeat_at = now
+            self.db.commit()
+            return active, True
+
+        run = RetentionRun(
+            lock_key=RETENTION_LOCK_KEY,
+            requested_by=updated_by,
+            cutoffs_json={name: _isoformat(value) for name, value in self.cutoffs(now).items()},
+            checkpoint_json={},
+            stats_json={},
+            heartbeat_at=now,
+        )
+        self.db.add(run)
+        try:
+            self.db.flush()
+        except IntegrityError:
+            self.db.rollback()
+            active = self.db.scalar(select(RetentionRun).where(RetentionRun.lock_key == RETENTION_LOCK_KEY))
+            raise RetentionRunConflict(active.id if active else None) from None
+        self.db.commit()
+        return run, False
+
+    def _stale(self, run: RetentionRun, now: datetime) -> bool:
+        last_seen = run.heartbeat_at or run.created_at
+        if last_seen.tzinfo is None:
+            last_seen = last_seen.replace(tzinfo=timezone.utc)
+        return last_seen < now - timedelta(seconds=self.settings.retention_stale_seconds)
+
+    def _save(self, run: RetentionRun, checkpoint: dict, stats: dict) -> None:
+        # Fresh copies: in-place changes to a JSON column are not detected.
+        run.checkpoint_json = copy.deepcopy(checkpoint)
+        run.stats_json = copy.deepcopy(stats)
+        run.heartbeat_at = datetime.now(timezone.utc)
+        self.db.commit()
+
+    def _expire_partitions(
+        self, run: RetentionRun, step: RetentionStep, cutoffs: dict, checkpoint: dict, stats: dict
+    ) -> None:
+        """Whole months past the cutoff go as a metadata-only drop; the batches only see the rest."""
+        cutoff = cutoffs["messages"] if step.table == "conversation_messages" else cutoffs["audit_logs"]
+        if step.table not in ("conversation_messages", "audit_logs") or cutoff is None:
+            return
+        if checkpoint.get(step.table, {}).get("done") or not self.partitions.is_partitioned(step.table):
+            return
+        dropped = self.partitions.expire(step.table, cutoff)
+        if dropped:
+            table_stats = stats.setdefault(step.table, _empty_stats())
+            table_stats["dropped_partitions"] = table_stats.get("dropped_partitions", []) + dropped
+            if step.counter:
+                # Estimated; the counter reconcile job corrects the remainder.
+                increment(self.db.connection(), {step.counter: -sum(item["estimated_rows"] for item in dropped)})
+            self._save(run, checkpoint, stats)
+
+    def _run_step(self, run: RetentionRun, step: RetentionStep, checkpoint: dict, stats: dict) -> None:
+        state = checkpoint.get(step.table, {})
+        if state.get("done"):
+            return
+        batch_size = max(self.settings.retention_batch_size, 1)
+        table_stats = stats.setdefault(step.table, _empty_stats())
+        last_key = state.get("last_key")
+        while True:
+            started = time.perf_counter()
+            query = select(step.key).where(step.criterion)
+            if last_key is not None:
+                query = query.where(step.key > last_key)
+            keys = self.db.scalars(query.order_by(step.key).limit(batch_size)).all()
+            if not keys:
+                break
+            # The criterion is repeated so a row that stopped qualifying since the select (a session
+            # that just got a message) is left alone.
+            deleted = (
                 self.db.execute(
-                    delete(EscalationTicket).where(
-                        EscalationTicket.created_at < escalation_cutoff,
-                        EscalationTicket.status.in_(["resolved", "closed"]),
-                    )
+                    delete(step.model)
+                    .where(step.key.in_(keys), step.criterion)
+                    .execution_options(synchronize_session=False)
                 ).rowcount
                 or 0
             )
-            self.db.add(
-                AuditLog(
-                    actor=updated_by,
-                    action="retention_cleanup",
-                    payload_json={
-                        "message_cutoff": message_cutoff.isoformat(),
-                        "escalation_cutoff": escalation_cutoff.isoformat(),
-                        "deleted_messages": deleted_messages,
-                        "deleted_escalations": deleted_escalations,
-                    },
-                )
-            )
-            self.db.commit()
+            if step.counter and deleted:
+                increment(self.db.connection(), {step.counter: -deleted})
+            last_key = keys[-1]
+            table_stats["deleted"] += deleted
+            table_stats["batches"] += 1
+            table_stats["seconds"] = round(table_stats["seconds"] + time.perf_counter() - started, 4)
+            checkpoint[step.table] = {"last_key": last_key, "done": False}
+            self._save(run, checkpoint, stats)
+            if len(keys) < batch_size:
+                break
+            time.sleep(self.settings.retention_batch_sleep_seconds)
+        checkpoint[step.table] = {"last_key": last_key, "done": True}
+        self._save(run, checkpoint, stats)
 
-        return {
+    def _estimate(self) -> dict:
+        cutoffs = self.cutoffs(datetime.now(timezone.utc))
+        stats = {}
+        for step in self.steps(cutoffs):
+            table_stats = _empty_stats()
+            table_stats["to_delete"] = self._estimate_rows(select(step.key).where(step.criterion))
+            stats[step.table] = table_stats
+        for table, cutoff in (("conversation_messages", cutoffs["messages"]), ("audit_logs", cutoffs["audit_logs"])):
+            if cutoff is not None and self.partitions.is_partitioned(table):
+                stats[table]["dropped_partitions"] = self.partitions.expire(table, cutoff, dry_run=True)
+        return self._summary(None, cutoffs, stats, dry_run=True, resumed=False)
+
+    def _estimate_rows(self, query) -> int:
+        """Planner row estimate on Postgres (uses the created_at indexes, no scan); exact count elsewhere."""
+        bind = self.db.get_bind()
+        if bind.dialect.name != "postgresql":
+            return int(self.db.scalar(select(func.count()).select_from(query.subquery())) or 0)
+        sql, params = _explain_sql(query, bind.dialect)
+        plan = self.db.connection().exec_driver_sql(sql, params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _summary(self, run: RetentionRun | None, cutoffs: dict, stats: dict, dry_run: bool, resumed: bool) -> dict:
+        tables = {}
+        for table, table_stats in stats.items():
+            table_stats = dict(table_stats)
+            # Rows in dropped partitions are estimated from planner statistics; they are never scanned.
+            partition_rows = sum(item["estimated_rows"] for item in table_stats.get("dropped_partitions", []))
+            if not dry_run:
+                table_stats["to_delete"] = table_stats["deleted"] + partition_rows
+                table_stats["deleted"] += partition_rows
+            else:
+                table_stats["to_delete"] = max(table_stats["to_delete"], partition_rows)
+            seconds = table_stats["seconds"]
+            table_stats["rows_per_second"] = round(table_stats["deleted"] / seconds, 1) if seconds else None
+            tables[table] = table_stats
+
+        summary = {
             "dry_run": dry_run,
-            "message_cutoff": message_cutoff.isoformat(),
-            "escalation_cutoff": escalation_cutoff.isoformat(),
-            "messages_to_delete": int(messages_to_delete),
-            "escalations_to_delete": int(escalations_to_delete),
-            "deleted_messages": int(deleted_messages),
-            "deleted_escalations": int(deleted_escalations),
+            "run_id": run.id if run else None,
+            "resumed": resumed,
+            "estimated": dry_run and self.db.get_bind().dialect.name == "postgresql",
+            "message_cutoff": _isoformat(cutoffs["messages"]),
+            "escalation_cutoff": _isoformat(cutoffs["escalations"]),
+            "lead_cutoff": _isoformat(cutoffs["leads"]),
+            "audit_cutoff": _isoformat(cutoffs["audit_logs"]),
+            "batch_size": self.settings.retention_batch_size,
+            "tables": tables,
         }
+        for table, label in TABLE_LABELS.items():
+            table_stats = tables.get(table, _empty_stats())
+            summary[f"{label}_to_delete"] = int(table_stats.get("to_delete", 0))
+            summary[f"deleted_{label}"] = int(table_stats["deleted"])
+        return summary
+
+
+def _empty_stats() -> dict:
+    return {"deleted": 0, "batches": 0, "seconds": 0.0}
+
+
+def serialize_run(run: RetentionRun) -> dict:
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "requested_by": run.requested_by,
+        "cutoffs": run.cutoffs_json,
+        "checkpoint": run.checkpoint_json or {},
+        "stats": run.stats_json or {},
+        "error": run.error,
+        "created_at": run.created_at.isoformat() if run.created_at else None,
+        "heartbeat_at": run.heartbeat_at.isoformat() if run.heartbeat_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+    }
+
+
+def run_retention_run(run_id: str, resumed: bool = False) -> dict:
+    """Execute a claimed run on its own session; a failure leaves it `interrupted` for the next call."""
+    db = get_session_factory()()
+    try:
+        run = db.get(RetentionRun, run_id)
+        if run is None:
+            return {}
+        try:
+            RetentionService(db).execute(run, resumed)
+        except Exception:  # noqa: BLE001
+            # Already recorded on the run and logged by `execute`.
+            pass
+        db.refresh(run)
+        return serialize_run(run)
+    finally:
+        db.close()
@@ -0,0 +1,121 @@
+import logging
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+from app.core.config import get_settings
+from app.core.metrics import CACHE_EVENTS
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KB_VERSION_KEY = "kb:version"
+
+
+class KBVersionCounter:
+    """
+    Monotonic counter bumped whenever retrievable KB content changes (reindex, approval).
+    Shared through Redis when configured; otherwise scoped to the current process.
+    """
+
+    def __init__(self) -> None:
+        self._local = 0
+        self._lock = Lock()
+
+    def current(self) -> int:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                return int(redis.get(KB_VERSION_KEY) or 0)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("kb version read fallback: %s", exc)
+        return self._local
+
+    def bump(self) -> int:
+        with self._lock:
+            self._local += 1
+            value = self._local
+        redis = get_redis()
+        if redis is not None:
+            try:
+                return int(redis.incr(KB_VERSION_KEY))
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("kb version publish failed: %s", exc)
+        return value
+
+
+class RetrievalCache:
+    """LRU cache of retrieval results keyed by (normalized query, top_k, KB version)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.version = KBVersionCounter()
+        self._entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def make_key(self, query: str, top_k: int, kb_version: int, *scope: object) -> tuple:
+        """`kb_version` is `version.current()`, read by the caller so one search reads it once."""
+        return (self.normalize_query(query), top_k, kb_version, *scope)
+
+    def get(self, key: tuple) -> list[dict] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl_seconds > 0 and now - entry[0] > self.ttl_seconds):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                CACHE_EVENTS.labels("retrieval", "miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_EVENTS.labels("retrieval", "hit").inc()
+            return [dict(item) for item in entry[1]]
+
+    def put(self, key: tuple, results: list[dict]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(item) for item in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                CACHE_EVENTS.labels("retrieval", "eviction").inc()
+
+    def invalidate(self) -> int:
+        """Bump the KB version so every cached entry becomes unreachable, then drop local entries."""
+        version = self.version.bump()
+        with self._lock:
+            self._entries.clear()
+        return version
+
+    def stats(self) -> dict:
+        kb_version = self.version.current()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "kb_version": kb_version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_retrieval_cache() -> RetrievalCache:
+    settings = get_settings()
+    return RetrievalCache(
+        max_entries=settings.retrieval_cache_max_entries,
+        ttl_seconds=settings.retrieval_cache_ttl_seconds,
+    )
@@ -1,18 +1,44 @@
 import math
 import re
 from collections import Counter
+from dataclasses import dataclass
 
-from sqlalchemy import select, text
+from sqlalchemy import bindparam, select, text
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.db.models import KBChunk
+from app.services.embedding_codec import shorten_embedding
+from app.services.kb_versions import VISIBLE_SQL, get_active_version_cache, visible_in
+from app.services.kb_writer import check_vector_dimensions
 from app.services.llm_service import LLMService
+from app.services.retrieval_cache import get_retrieval_cache
+from app.services.vector_index import get_vector_index_cache
+
+# Intents whose answers live on a known kind of page; other intents search the whole KB.
+INTENT_PAGE_TYPES: dict[str, tuple[str, ...]] = {
+    "insurance_financing": ("policy",),
+    "billing_admin": ("policy",),
+    "services_info": ("services",),
+}
+
+
+@dataclass(frozen=True)
+class SearchVersions:
+    """The versions one search runs against, read once so each stage doesn't go back to Redis."""
+
+    # `kb:version` counter: bumped by approvals and publishes, scopes cached results and the index.
+    kb_version: int
+    # Published KB version id: the chunks visible to this search.
+    active_version: int
 
 
 class RetrievalService:
     def __init__(self, db: Session) -> None:
         self.db = db
+        self.settings = get_settings()
         self.llm = LLMService()
+        self._embeddings: dict[str, list[float] | None] = {}
 
     @staticmethod
     def _tokenize(text: str) -> list[str]:
@@ -28,13 +54,95 @@ class RetrievalService:
             return 0.0
         return numerator / (a_mag * b_mag)
 
-    def search(self, query: str, top_k: int = 5) -> list[dict]:
-        if self.db.bind and self.db.bind.dialect.name == "postgresql":
-            pgvector_results = self._search_postgres_pgvector(query, top_k)
+    @staticmethod
+    def page_types_for_intent(intent: str | None) -> tuple[str, ...] | None:
+        if not intent:
+            return None
+        return INTENT_PAGE_TYPES.get(intent)
+
+    def search(self, query: str, top_k: int = 5, intent: str | None = None) -> list[dict]:
+        page_types = self.page_types_for_intent(intent)
+        versions = self._versions()
+        if not self.settings.retrieval_cache_enabled:
+            return self._search_filtered(query, top_k, page_types, versions)
+
+        cache = get_retrieval_cache()
+        # Keyed on the active version too: a publish seen only through polling must not serve old entries.
+        key = cache.make_key(query, top_k, versions.kb_version, page_types, versions.active_version)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        results = self._search_filtered(query, top_k, page_types, versions)
+        cache.put(key, results)
+        return results
+
+    def warm(self) -> bool:
+        """
+        Check the pgvector column dimensions, load the active KB version and build the in-process
+        vector index, if this backend uses one.
+        """
+        check_vector_dimensions(self.db)
+        versions = self._versions()
+        if self._vector_backend() not in {"exact", "ivf"}:
+            return False
+        self._vector_index(versions)
+        return True
+
+    def _search_filtered(
+        self, query: str, top_k: int, page_types: tuple[str, ...] | None, versions: SearchVersions
+    ) -> list[dict]:
+        # Narrow to the intent's page types first; widen to the full KB if that slice has no match.
+        if page_types:
+            results = self._search_uncached(query, top_k, page_types, versions)
+            if results:
+                return results
+        return self._search_uncached(query, top_k, None, versions)
+
+    def _search_uncached(
+        self, query: str, top_k: int, page_types: tuple[str, ...] | None, versions: SearchVersions
+    ) -> list[dict]:
+        configured = self.settings.retrieval_backend.strip().lower()
+        backend = self._vector_backend()
+        if backend == "pgvector":
+            pgvector_results = self._search_postgres_pgvector(query, top_k, page_types, versions)
             if pgvector_results:
                 return pgvector_results
+        # In-process index also covers Postgres deployments without the pgvector extension.
+        if backend in {"exact", "ivf"} or (backend == "pgvector" and configured == "auto"):
+            index_results = self._search_vector_index(query, top_k, page_types, versions)
+            if index_results:
+                return index_results
+        return self._search_lexical(query, top_k, page_types, versions)
+
+    def _vector_backend(self) -> str | None:
+        backend = self.settings.retrieval_backend.strip().lower()
+        if backend == "lexical":
+            return None
+        if backend == "auto":
+            is_postgres = bool(self.db.bind and self.db.bind.dialect.name == "postgresql")
+            return "pgvector" if is_postgres else "exact"
+        return backend
 
-        rows = self.db.scalars(select(KBChunk).where(KBChunk.approved.is_(True))).all()
+    def _query_embedding(self, query: str) -> list[float] | None:
+        # Filtered and widened passes of one search share a single embedding call.
+        if query not in self._embeddings:
+            self._embeddings[query] = self.llm.embed_text(query)
+        return self._embeddings[query]
+
+    def _versions(self) -> SearchVersions:
+        kb_version = get_retrieval_cache().version.current()
+        return SearchVersions(kb_version, get_active_version_cache().get(self.db, kb_version))
+
+    def _vector_index(self, versions: SearchVersions):
+        return get_vector_index_cache().get(self.db, versions.active_version, versions.kb_version)
+
+    def _search_lexical(
+        self, query: str, top_k: int, page_types: tuple[str, ...] | None, versions: SearchVersions
+    ) -> list[dict]:
+        statement = select(KBChunk).where(KBChunk.approved.is_(True), visible_in(versions.active_version))
+        if page_types:
+            statement = statement.where(KBChunk.page_type.in_(page_types))
+        rows = self.db.scalars(statement).all()
         q_count = Counter(self._tokenize(query))
         scored: list[tuple[float, KBChunk]] = []
         for row in rows:
@@ -45,58 +153,117 @@ class RetrievalService:
             scored.append((score, row))
 
         scored.sort(key=lambda item: item[0], reverse=True)
-        output = []
-        for score, row in scored[:top_k]:
-            output.append(
-                {
-                    "source_url": row.source_url,
-                    "title": row.title,
-                    "snippet": row.content[:260],
-                    "score": round(score, 4),
-                }
-            )
-        return output
+        return [self._to_result(row, score) for score, row in scored[:top_k]]
 
-    def _search_postgres_pgvector(self, query: str, top_k: int) -> list[dict]:
+    def _search_vector_index(
+        self, query: str, top_k: int, page_types: tuple[str, ...] | None, versions: SearchVersions
+    ) -> list[dict]:
+        import numpy as np
+
+        query_embedding = self._query_embedding(query)
+        if not query_embedding:
+            return []
+        matches = self._vector_index(versions).search(
+            np.asarray(query_embedding, dtype=np.float32),
+            top_k=top_k,
+            candidates=self.settings.vector_rerank_candidates,
+            page_types=page_types,
+        )
+        if not matches:
+            return []
+        rows = {row.id: row for row in self.db.scalars(select(KBChunk).where(KBChunk.id.in_([m[0] for m in matches])))}
+        return [self._to_result(rows[chunk_pk], score) for chunk_pk, score in matches if chunk_pk in rows]
+
+    def _search_postgres_pgvector(
+        self, query: str, top_k: int, page_types: tuple[str, ...] | None, versions: SearchVersions
+    ) -> list[dict]:
         """
-        pgvector scaffold for production Postgres.
-        Uses SQL fallback if vector column exists; otherwise returns empty and caller falls back to lexical search.
+        pgvector search for production Postgres.
+        With `embedding_short` populated (migration 004 + backfill), an index scan over the short vectors
+        picks `vector_rerank_candidates` rows that are reranked on the full `embedding` column. Chunks
+        without a short vector (mid-backfill, or kept unchanged by a reindex) join the candidates from a
+        scan over the full vectors, so partial coverage never hides them.
+        Falls back to a single-stage scan, then to an empty result so the caller can use lexical search.
+        Both stages only see chunks of the active KB version.
         """
-        query_embedding = self.llm.embed_text(query)
+        query_embedding = self._query_embedding(query)
         vector_literal = self._to_pgvector_literal(query_embedding)
         if not vector_literal:
             return []
 
-        # This assumes a future migration with `embedding vector` column. If missing, the query fails gracefully.
-        statement = text(
-            """
-            SELECT source_url, title, content, 1 - (embedding <=> CAST(:embedding AS vector)) AS score
+        page_type_clause = "AND page_type IN :page_types" if page_types else ""
+        params: dict = {"embedding": vector_literal, "limit": top_k, "kb_version": versions.active_version}
+        if page_types:
+            params["page_types"] = list(page_types)
+
+        short_dims = self.settings.embedding_short_dimensions
+        if 0 < short_dims < len(query_embedding):
+            params["short_embedding"] = self._to_pgvector_literal(shorten_embedding(query_embedding, short_dims).tolist())
+            params["candidates"] = max(self.settings.vector_rerank_candidates, top_k)
+            two_stage = text(
+                f"""
+                WITH candidates AS (
+                    (
+                        SELECT id
+                        FROM kb_chunks
+                        WHERE approved = true AND embedding_short IS NOT NULL AND {VISIBLE_SQL} {page_type_clause}
+                        ORDER BY embedding_short <=> CAST(:short_embedding AS vector)
+                        LIMIT :candidates
+                    )
+                    UNION ALL
+                    (
+                        SELECT id
+                        FROM kb_chunks
+                        WHERE approved = true AND embedding_short IS NULL AND {VISIBLE_SQL} {page_type_clause}
+                        ORDER BY embedding <=> CAST(:embedding AS vector)
+                        LIMIT :candidates
+                    )
+                )
+                SELECT k.source_url, k.title, k.content, k.metadata_json,
+                       1 - (k.embedding <=> CAST(:embedding AS vector)) AS score
+                FROM kb_chunks k
+                JOIN candidates c ON c.id = k.id
+                ORDER BY k.embedding <=> CAST(:embedding AS vector)
+                LIMIT :limit
+                """
+            )
+            rows = self._execute_vector_query(two_stage, params, page_types)
+            if rows:
+                return [self._to_result(row, float(row.score or 0)) for row in rows]
+
+        single_stage = text(
+            f"""
+            SELECT source_url, title, content, metadata_json, 1 - (embedding <=> CAST(:embedding AS vector)) AS score
             FROM kb_chunks
-            WHERE approved = true
+            WHERE approved = true AND {VISIBLE_SQL} {page_type_clause}
             ORDER BY embedding <=> CAST(:embedding AS vector)
             LIMIT :limit
             """
         )
+        rows = self._execute_vector_query(single_stage, params, page_types)
+        return [self._to_result(row, float(row.score or 0)) for row in rows]
+
+    def _execute_vector_query(self, statement, params: dict, page_types: tuple[str, ...] | None) -> list:
+        if page_types:
+            statement = statement.bindparams(bindparam("page_types", expanding=True))
         try:
-            rows = self.db.execute(
-                statement,
-                {
-                    "embedding": vector_literal,
-                    "limit": top_k,
-                },
-            ).all()
+            # Savepoint so a missing vector column doesn't abort the caller's transaction.
+            with self.db.begin_nested():
+                return self.db.execute(statement, params).all()
         except Exception:  # noqa: BLE001
             return []
 
-        return [
-            {
-                "source_url": row.source_url,
-                "title": row.title or "",
-                "snippet": (row.content or "")[:260],
-                "score": round(float(row.score or 0), 4),
-            }
-            for row in rows
-        ]
+    @staticmethod
+    def _to_result(row, score: float) -> dict:
+        content = row.content or ""
+        return {
+            "source_url": row.source_url,
+            "title": row.title or "",
+            "snippet": content[:260],
+            "score": round(score, 4),
+            "content": content,
+            "chunk_index": (row.metadata_json or {}).get("chunk_index"),
+        }
 
     @staticmethod
     def _to_pgvector_literal(embedding: list[float] | None) -> str | None:
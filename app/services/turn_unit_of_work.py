@@ -0,0 +1,80 @@
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import ConversationMessage, ConversationSession, LeadCapture
+from app.services.escalation_service import EscalationNotifier
+from app.services.orchestration import AgentResult
+
+
+class TurnUnitOfWork:
+    """
+    Everything one conversation turn writes (session changes, both messages, lead, escalation
+    ticket) is staged here and committed in a single transaction. Side effects such as the
+    escalation email are queued and only run once that commit has succeeded.
+    """
+
+    def __init__(self, db: AsyncSession, background_tasks: BackgroundTasks) -> None:
+        self.db = db
+        self.background_tasks = background_tasks
+        self._rows: list = []
+        self._after_commit: list[tuple[Callable, tuple]] = []
+
+    async def release_connection(self) -> None:
+        """
+        End the lookup's read transaction before the agent runs so no pooled connection sits idle
+        in a transaction for the length of an LLM call. Loaded rows stay usable (detached).
+        """
+        await self.db.close()
+
+    def stage_session(self, session: ConversationSession) -> None:
+        self.db.add(session)
+
+    def stage_user_message(self, session_id: str, channel: str, text: str) -> None:
+        # Stamped now: the row is only flushed after the agent has answered.
+        self._rows.append(
+            ConversationMessage(
+                session_id=session_id,
+                channel=channel,
+                role="user",
+                text=text,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+
+    def stage_agent_result(self, session_id: str, channel: str, result: AgentResult) -> None:
+        self._rows.append(
+            ConversationMessage(
+                session_id=session_id,
+                channel=channel,
+                role="assistant",
+                text=result.response_text,
+                intent=result.intent,
+                confidence=result.confidence,
+                escalated=result.escalated,
+                references_json=result.references,
+            )
+        )
+        if result.escalation_ticket is not None:
+            self._rows.append(result.escalation_ticket)
+            self.after_commit(EscalationNotifier().notify, result.escalation_ticket)
+
+    def stage_lead(self, lead: LeadCapture) -> None:
+        self._rows.append(lead)
+
+    def after_commit(self, func: Callable, *args) -> None:
+        self._after_commit.append((func, args))
+
+    async def commit(self) -> None:
+        # The models declare no relationships, so the unit of work cannot order a new session
+        # ahead of rows referencing it; flushing the session first keeps the foreign keys
+        # satisfied inside the same transaction.
+        await self.db.flush()
+        self.db.add_all(self._rows)
+        self._rows.clear()
+        await self.db.commit()
+        for func, args in self._after_commit:
+            self.background_tasks.add_task(func, *args)
+        self._after_commit.clear()
@@ -0,0 +1,327 @@
+import hashlib
+import logging
+import math
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only, undefer
+
+from app.core.config import get_settings
+from app.db.models import KBChunk
+from app.services.embedding_codec import SHORT_EMBEDDING_DTYPE, decode_embedding, embedding_view, shorten_embedding
+from app.services.kb_versions import get_active_version_cache, visible_in
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_rows(matrix: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ExactVectorIndex:
+    """
+    In-process cosine search over approved chunk embeddings.
+    With short (Matryoshka) vectors available, a first pass over the short matrix selects
+    `candidates` rows which are then reranked with the full-precision vectors.
+    """
+
+    def __init__(
+        self,
+        ids: "np.ndarray",
+        page_types: "np.ndarray",
+        full: "np.ndarray",
+        short: "np.ndarray | None",
+    ) -> None:
+        self.ids = ids
+        self.page_types = page_types
+        self.full = full
+        self.short = short
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    @classmethod
+    def build(cls, db: Session, active_version: int | None = None) -> "ExactVectorIndex":
+        import numpy as np
+
+        settings = get_settings()
+        if active_version is None:
+            active_version = get_active_version_cache().get(db)
+        short_dims = settings.embedding_short_dimensions
+        rows = db.scalars(
+            select(KBChunk)
+            .options(
+                load_only(KBChunk.id, KBChunk.page_type, KBChunk.embedding_dtype, KBChunk.embedding_scale),
+                undefer(KBChunk.embedding_blob),
+                undefer(KBChunk.embedding_short_blob),
+            )
+            .where(KBChunk.approved.is_(True), KBChunk.embedding_blob.is_not(None), visible_in(active_version))
+            .order_by(KBChunk.id)
+        ).all()
+
+        ids: list[int] = []
+        page_types: list[str] = []
+        full_rows: list[np.ndarray] = []
+        short_rows: list[np.ndarray] = []
+        for row in rows:
+            vector = decode_embedding(row.embedding_blob, row.embedding_dtype, row.embedding_scale)
+            if vector is None or (full_rows and vector.size != full_rows[0].size):
+                continue
+            ids.append(row.id)
+            page_types.append(row.page_type)
+            full_rows.append(vector)
+            if short_dims > 0:
+                if row.embedding_short_blob and len(row.embedding_short_blob) == short_dims * 2:
+                    short_rows.append(embedding_view(row.embedding_short_blob, SHORT_EMBEDDING_DTYPE))
+                else:
+                    short_rows.append(shorten_embedding(vector, short_dims))
+
+        if not ids:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=object), np.empty((0, 0), dtype=np.float32), None)
+
+        two_stage = short_dims > 0 and short_dims < full_rows[0].size
+        full = _normalize_rows(np.vstack(full_rows).astype(np.float32))
+        short = _normalize_rows(np.vstack(short_rows).astype(np.float32)) if two_stage else None
+        # Only reranked rows touch the full matrix on the two-stage path; keep it at half precision.
+        if short is not None:
+            full = full.astype(np.float16)
+        return cls(np.asarray(ids, dtype=np.int64), np.asarray(page_types, dtype=object), full, short)
+
+    def search(
+        self,
+        query: "np.ndarray",
+        top_k: int,
+        candidates: int,
+        page_types: tuple[str, ...] | None = None,
+    ) -> list[tuple[int, float]]:
+        query = self._prepare_query(query)
+        if query is None:
+            return []
+        return self._rank(None, query, top_k, candidates, page_types)
+
+    def _prepare_query(self, query: "np.ndarray") -> "np.ndarray | None":
+        import numpy as np
+
+        if not len(self) or query.size != self.full.shape[1]:
+            return None
+        query = query.astype(np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return None
+        return query / norm
+
+    def _rank(
+        self,
+        positions: "np.ndarray | None",
+        query: "np.ndarray",
+        top_k: int,
+        candidates: int,
+        page_types: tuple[str, ...] | None,
+    ) -> list[tuple[int, float]]:
+        """Score rows at `positions` (None means every row, which avoids copying the matrices)."""
+        import numpy as np
+
+        if page_types:
+            base = np.arange(len(self)) if positions is None else positions
+            positions = base[np.isin(self.page_types[base], list(page_types))]
+        count = len(self) if positions is None else positions.size
+        if count == 0:
+            return []
+
+        if self.short is not None and count > candidates:
+            short_query = shorten_embedding(query, self.short.shape[1])
+            coarse = (self.short if positions is None else self.short[positions]) @ short_query
+            keep = min(max(candidates, top_k), count)
+            shortlist = np.argpartition(-coarse, keep - 1)[:keep]
+            positions = shortlist if positions is None else positions[shortlist]
+            count = positions.size
+
+        matrix = self.full if positions is None else self.full[positions]
+        scores = matrix.astype(np.float32, copy=False) @ query
+        keep = min(top_k, count)
+        best = np.argpartition(-scores, keep - 1)[:keep]
+        best = best[np.argsort(-scores[best])]
+        rows = best if positions is None else positions[best]
+        return [(int(self.ids[row]), float(scores[i])) for row, i in zip(rows, best, strict=True)]
+
+    def training_matrix(self) -> "np.ndarray":
+        """The vectors IVF clusters: the short matrix on the two-stage path, else the full one."""
+        import numpy as np
+
+        return self.short if self.short is not None else self.full.astype(np.float32)
+
+    def fingerprint(self) -> str:
+        # Covers the vectors, not just the ids: a re-embed under the same ids or a new short
+        # dimension must not reuse centroids trained on the old vectors.
+        import numpy as np
+
+        matrix = self.training_matrix()
+        digest = hashlib.sha256(self.ids.tobytes())
+        digest.update(str(matrix.shape).encode("utf-8"))
+        digest.update(np.ascontiguousarray(matrix).tobytes())
+        return digest.hexdigest()[:16]
+
+
+class IVFVectorIndex:
+    """
+    Inverted-file ANN index: spherical k-means partitions the vectors into lists and a query only
+    scores the members of the `probes` nearest lists (then reranks as ExactVectorIndex does).
+    Raising `probes` trades latency for recall. A page-type filter with fewer than `top_k` matches in
+    the probed lists falls back to an exact scan of that page type. Centroids and list assignments are persisted under
+    `vector_index_dir`, keyed by the fingerprint of the indexed vectors, so restarts skip training;
+    files of superseded builds are removed.
+    """
+
+    def __init__(self, base: ExactVectorIndex, centroids: "np.ndarray", assignments: "np.ndarray", probes: int) -> None:
+        import numpy as np
+
+        self.base = base
+        self.centroids = centroids
+        self.probes = max(1, probes)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=centroids.shape[0])
+        self._members = order
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    @classmethod
+    def build(cls, base: ExactVectorIndex, lists: int, probes: int, index_dir: str | None) -> "IVFVectorIndex":
+        import numpy as np
+
+        if not len(base):
+            return cls(base, np.zeros((1, 1), dtype=np.float32), np.zeros(0, dtype=np.int64), probes)
+        lists = lists if lists > 0 else max(1, int(math.sqrt(len(base))))
+        lists = min(lists, len(base))
+        matrix = base.training_matrix()
+        path = Path(index_dir) / f"ivf-{base.fingerprint()}-{lists}.npz" if index_dir else None
+        if path is not None and path.exists():
+            try:
+                stored = np.load(path)
+                centroids, assignments = stored["centroids"], stored["assignments"]
+                if centroids.shape[1] == matrix.shape[1] and assignments.size == len(base):
+                    _prune(path)
+                    return cls(base, centroids, assignments, probes)
+                logger.warning("ignoring ivf index %s built for a different vector shape", path)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("ignoring unreadable ivf index %s: %s", path, exc)
+
+        centroids = _spherical_kmeans(matrix, lists)
+        assignments = _assign(matrix, centroids)
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                np.savez(path, centroids=centroids, assignments=assignments)
+                _prune(path)
+            except OSError as exc:
+                logger.warning("could not persist ivf index %s: %s", path, exc)
+        return cls(base, centroids, assignments, probes)
+
+    def search(
+        self,
+        query: "np.ndarray",
+        top_k: int,
+        candidates: int,
+        page_types: tuple[str, ...] | None = None,
+    ) -> list[tuple[int, float]]:
+        import numpy as np
+
+        query = self.base._prepare_query(query)
+        if query is None:
+            return []
+        probe_query = shorten_embedding(query, self.centroids.shape[1]) if self.base.short is not None else query
+        probes = min(self.probes, self.centroids.shape[0])
+        nearest = np.argpartition(-(self.centroids @ probe_query), probes - 1)[:probes]
+        positions = np.concatenate([self._members[self._offsets[c] : self._offsets[c + 1]] for c in nearest])
+        if page_types:
+            positions = positions[np.isin(self.base.page_types[positions], list(page_types))]
+            if positions.size < top_k:
+                # A sparse page type can be missing from the probed lists; scan its rows exactly rather
+                # than return too few and let the caller widen past the intent's page types.
+                return self.base._rank(None, query, top_k, candidates, page_types)
+        return self.base._rank(positions, query, top_k, candidates, None)
+
+
+def _prune(current: Path) -> None:
+    """Remove persisted IVF files other than `current`; their fingerprints no longer match any build."""
+    for stale in current.parent.glob("ivf-*.npz"):
+        if stale != current:
+            try:
+                stale.unlink()
+            except OSError as exc:
+                logger.warning("could not remove stale ivf index %s: %s", stale, exc)
+
+
+def _spherical_kmeans(matrix: "np.ndarray", k: int, iterations: int = 15, sample_size: int = 50_000) -> "np.ndarray":
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    sample = matrix if matrix.shape[0] <= sample_size else matrix[rng.choice(matrix.shape[0], sample_size, replace=False)]
+    centroids = sample[rng.choice(sample.shape[0], k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=k) == 0
+        # Reseed empty lists from random points so every list stays usable.
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()), replace=False)]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+def _assign(matrix: "np.ndarray", centroids: "np.ndarray", batch: int = 8192) -> "np.ndarray":
+    import numpy as np
+
+    labels = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], batch):
+        labels[start : start + batch] = np.argmax(matrix[start : start + batch] @ centroids.T, axis=1)
+    return labels
+
+
+class VectorIndexCache:
+    """
+    Holds the index built for the active KB version (the database pointer, so a publish by any
+    process is seen) and this process's KB cache version (bumped by in-process approvals). A change
+    in either triggers a rebuild on next use.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._version: tuple[int, int] | None = None
+        self._index: ExactVectorIndex | IVFVectorIndex | None = None
+
+    def get(self, db: Session, active_version: int, kb_version: int) -> ExactVectorIndex | IVFVectorIndex:
+        with self._lock:
+            if self._index is not None and self._version == (active_version, kb_version):
+                return self._index
+            settings = get_settings()
+            index: ExactVectorIndex | IVFVectorIndex = ExactVectorIndex.build(db, active_version)
+            backend = settings.retrieval_backend.strip().lower()
+            if backend == "ivf" or (backend == "auto" and len(index) >= settings.ivf_min_rows):
+                index = IVFVectorIndex.build(
+                    index,
+                    lists=settings.ivf_lists,
+                    probes=settings.ivf_probes,
+                    index_dir=settings.vector_index_dir or None,
+                )
+            logger.info("built %s for kb version %s with %s rows", type(index).__name__, active_version, len(index))
+            self._index = index
+            self._version = (active_version, kb_version)
+            return index
+
+
+@lru_cache(maxsize=1)
+def get_vector_index_cache() -> VectorIndexCache:
+    return VectorIndexCache()
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, ExitStack
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+from app.db.session import get_async_engine, get_engine, get_read_router, get_read_session
+from app.services.orchestration import AgentOrchestrator, get_agent_graph
+from app.services.policy_snapshot import get_policy_snapshot
+from app.services.retrieval_service import RetrievalService
+
+logger = logging.getLogger(__name__)
+
+# First retry delay for a failed warmup step; doubles per attempt up to `warmup_retry_max_seconds`.
+RETRY_INITIAL_SECONDS = 0.5
+
+
+def _pool_capacity(engine: Engine | AsyncEngine, wanted: int) -> int:
+    # Never check out more than the pool keeps idle, or the extra connections are closed on return.
+    size = getattr(engine.pool, "size", None)
+    return min(wanted, size()) if callable(size) else min(wanted, 1)
+
+
+def open_pool(engine: Engine, connections: int) -> int:
+    """Check out `connections` at once and hand them back, leaving them idle in the pool."""
+    connections = _pool_capacity(engine, connections)
+    with ExitStack() as stack:
+        for _ in range(connections):
+            stack.enter_context(engine.connect())
+    return connections
+
+
+async def open_async_pool(engine: AsyncEngine, connections: int) -> int:
+    connections = _pool_capacity(engine, connections)
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            await stack.enter_async_context(engine.connect())
+    return connections
+
+
+def _warm_policies() -> None:
+    get_policy_snapshot()
+
+
+def _warm_orchestrator() -> None:
+    # Imports langgraph and compiles the shared graph, then imports the model client (~0.5 s together).
+    get_agent_graph()
+    db = get_read_session()
+    try:
+        AgentOrchestrator(db)
+    finally:
+        db.close()
+
+
+def _warm_retrieval() -> None:
+    db = get_read_session()
+    try:
+        RetrievalService(db).warm()
+    finally:
+        db.close()
+
+
+def _prime_queries(queries: list[str]) -> int:
+    primed = 0
+    db = get_read_session()
+    try:
+        for query in queries:
+            try:
+                RetrievalService(db).search(query, top_k=5)
+                primed += 1
+            except Exception as exc:  # noqa: BLE001
+                db.rollback()
+                logger.warning("warmup query %r failed: %s", query, exc)
+    finally:
+        db.close()
+    return primed
+
+
+class Warmup:
+    """
+    Startup work done before the worker reports ready: pool connections opened, the policy
+    snapshot loaded, the agent graph compiled, the in-process retrieval index loaded, and the
+    configured common queries searched into the retrieval cache. `/v1/ready` answers 503 until
+    every step has run. A failed step is retried with exponential backoff (capped at
+    `warmup_retry_max_seconds`) and reported in `error` meanwhile. Priming a query is best-effort.
+    """
+
+    def __init__(self) -> None:
+        self.status = "pending"
+        self.steps: dict[str, float] = {}
+        self.primed_queries = 0
+        self.retries = 0
+        self.error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def skip(self) -> None:
+        self.status = "ready"
+
+    async def _step(self, name: str, work, max_delay: float) -> None:
+        delay = RETRY_INITIAL_SECONDS
+        while True:
+            started = time.perf_counter()
+            try:
+                await work()
+            except Exception as exc:  # noqa: BLE001
+                # A database blip at boot must not leave the worker unready for good.
+                self.retries += 1
+                self.error = f"{name}: {exc.__class__.__name__}: {exc}"
+                logger.warning("warmup step %s failed, retrying in %.1fs: %s", name, delay, exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max(max_delay, RETRY_INITIAL_SECONDS))
+                continue
+            self.steps[name] = round((time.perf_counter() - started) * 1000, 1)
+            return
+
+    async def run(self) -> None:
+        settings = get_settings()
+        max_delay = settings.warmup_retry_max_seconds
+        self.status = "warming"
+        started = time.perf_counter()
+        await self._step("db_pools", lambda: self._open_pools(settings.warmup_pool_connections), max_delay)
+        await self._step("policy_snapshot", lambda: run_in_threadpool(_warm_policies), max_delay)
+        await self._step("orchestrator", lambda: run_in_threadpool(_warm_orchestrator), max_delay)
+        await self._step("retrieval_index", lambda: run_in_threadpool(_warm_retrieval), max_delay)
+        if settings.warmup_queries_list:
+            await self._step("queries", lambda: self._prime(settings.warmup_queries_list), max_delay)
+        self.status = "ready"
+        self.error = None
+        logger.info("warmup finished in %.0f ms: %s", (time.perf_counter() - started) * 1000, self.steps)
+
+    async def _open_pools(self, connections: int) -> None:
+        if connections <= 0:
+            return
+        await run_in_threadpool(open_pool, get_engine(), connections)
+        await open_async_pool(get_async_engine(), connections)
+        for target in get_read_router().targets:
+            try:
+                await run_in_threadpool(open_pool, target.engine, connections)
+                await open_async_pool(target.async_engine, connections)
+            except Exception as exc:  # noqa: BLE001
+                # The router skips an unreachable replica; it need not hold up readiness.
+                logger.warning("warmup could not reach replica %s: %s", target.name, exc)
+
+    async def _prime(self, queries: list[str]) -> None:
+        self.primed_queries = await run_in_threadpool(_prime_queries, queries)
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "steps_ms": self.steps,
+            "primed_queries": self.primed_queries,
+            "retries": self.retries,
+            "error": self.error,
+        }
@@ -0,0 +1,80 @@
+"""
+HTML extraction throughput on saved pages: the original BeautifulSoup `stripped_strings` pass versus the
+structure-aware `soup` and `lxml` backends of `app.services.html_extract`.
+
+    python -m benchmarks.html_extract_bench
+    python -m benchmarks.html_extract_bench --fixtures /path/to/saved/pages --repeat 50
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.services.html_extract import get_extractor, lxml_available
+from benchmarks.vector_index_bench import percentile_ms
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+
+def baseline_extract(html: str) -> tuple[str, str]:
+    """The extraction every page went through before the pluggable backends."""
+    soup = BeautifulSoup(html, "html.parser")
+    title = (soup.title.string or "").strip() if soup.title else ""
+    for tag in soup(["script", "style", "noscript"]):
+        tag.extract()
+    return "\n".join(part.strip() for part in soup.stripped_strings if part.strip()), title
+
+
+def _backends() -> dict:
+    backends = {"baseline": lambda html: baseline_extract(html)[0]}
+    for name in ("soup", "lxml"):
+        if name == "lxml" and not lxml_available():
+            continue
+        extractor = get_extractor(name)
+        backends[name] = lambda html, extractor=extractor: extractor.extract(html).text
+    return backends
+
+
+def run(fixtures: Path, repeat: int) -> dict:
+    pages = [path.read_text(encoding="utf-8") for path in sorted(fixtures.glob("*.html"))]
+    if not pages:
+        raise SystemExit(f"no .html fixtures in {fixtures}")
+    corpus_mb = sum(len(page.encode("utf-8")) for page in pages) / 1e6
+    report: dict = {"pages": len(pages), "corpus_mb": round(corpus_mb, 3), "repeat": repeat, "backends": {}}
+    for name, extract in _backends().items():
+        extract(pages[0])  # warm imports and parser state
+        timings = []
+        text_chars = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages:
+                page_started = time.perf_counter()
+                text_chars = len(extract(page))
+                timings.append(time.perf_counter() - page_started)
+        elapsed = time.perf_counter() - started
+        report["backends"][name] = {
+            "pages_per_s": round(len(timings) / elapsed, 1),
+            "mb_per_s": round(corpus_mb * repeat / elapsed, 2),
+            "p50_ms": percentile_ms(timings, 50),
+            "p95_ms": percentile_ms(timings, 95),
+            "last_page_text_chars": text_chars,
+        }
+    baseline = report["backends"]["baseline"]["pages_per_s"]
+    for stats in report["backends"].values():
+        stats["speedup_vs_baseline"] = round(stats["pages_per_s"] / baseline, 2)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.fixtures, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
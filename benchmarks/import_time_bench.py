@@ -0,0 +1,73 @@
+"""
+Cold import time of the ASGI app, as a worker pays it on every boot.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and reports the median
+total, the packages that cost the most (own time summed over their modules) and whether the heavy
+optional stacks were pulled in at import rather than on first use.
+
+    python -m benchmarks.import_time_bench --runs 5 --top 15
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ["langgraph", "openai", "bs4", "lxml", "requests", "redis", "numpy"]
+ROOT = Path(__file__).resolve().parent.parent
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+\d+\s+\|\s*(\S+)$")
+
+
+def sample(target: str) -> tuple[int, dict[str, int], list[str]]:
+    """One cold import: total microseconds, own microseconds per top-level package, heavy modules loaded."""
+    script = f"import sys, {target}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: dict[str, int] = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        own, name = int(match.group(1)), match.group(2)
+        total += own
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + own
+    loaded = [name for name in proc.stdout.strip().split(",") if name]
+    return total, packages, loaded
+
+
+def run(target: str, runs: int, top: int) -> dict:
+    samples = [sample(target) for _ in range(runs)]
+    totals = [total for total, _, _ in samples]
+    _, packages, loaded = samples[totals.index(sorted(totals)[len(totals) // 2])]
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "target": target,
+        "runs": runs,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "min_ms": round(min(totals) / 1000, 1),
+        "slowest_packages_ms": {name: round(micros / 1000, 1) for name, micros in slowest},
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    print(json.dumps(run(args.target, args.runs, args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
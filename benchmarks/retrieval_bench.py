@@ -0,0 +1,273 @@
+"""
+End-to-end RetrievalService benchmark on synthetic KB corpora.
+
+Builds deterministic corpora (clustered fake embeddings plus matching topic text), loads them into
+SQLite and optionally Postgres, then runs every requested backend through `RetrievalService.search`
+over a fixed query set. Reports p50/p95/p99 latency, index build time, peak Python memory and
+recall@k against exact full-precision ground truth.
+
+    python -m benchmarks.retrieval_bench --sizes 1000 10000 --backends lexical exact ivf
+    python -m benchmarks.retrieval_bench --sizes 100000 --backends pgvector ivf --postgres-url postgresql://.../upstate_bench
+
+Loading replaces every row in `kb_chunks`. The Postgres target must be a dedicated bench database
+(its name contains "bench") or schema (`?options=-csearch_path%3Dbench`); anything else needs
+`--allow-destructive`.
+"""
+
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.engine import make_url
+
+from app.core.runtime import reset_runtime_caches
+from benchmarks.vector_index_bench import percentile_ms, synthetic_embeddings
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_BACKENDS = ["lexical", "exact", "ivf", "pgvector"]
+WORDS_PER_CHUNK = 60
+
+
+def is_bench_database(database_url: str) -> bool:
+    """True for a database or search_path schema named for benchmarking, which `load` may wipe."""
+    url = make_url(database_url)
+    database = Path(url.database or "").name.lower()
+    options = str(url.query.get("options", "")).lower()
+    return "bench" in database or ("search_path" in options and "bench" in options)
+
+
+class SyntheticCorpus:
+    """Chunks grouped into topics; each topic has its own vocabulary and embedding cluster."""
+
+    def __init__(self, size: int, dims: int, short_dims: int, seed: int = 0) -> None:
+        self.size = size
+        self.dims = dims
+        self.short_dims = short_dims
+        self.topics = max(10, size // 50)
+        rng = np.random.default_rng(seed)
+        self.vectors = synthetic_embeddings(size, dims, self.topics, seed=seed)
+        self.labels = np.argmax(self.vectors @ self._topic_centers(), axis=1)
+        vocab = [[f"t{topic}w{word}" for word in range(40)] for topic in range(self.topics)]
+        common = [f"common{word}" for word in range(200)]
+        self.contents = []
+        for label in self.labels:
+            words = list(rng.choice(vocab[label], WORDS_PER_CHUNK // 2)) + list(rng.choice(common, WORDS_PER_CHUNK // 2))
+            rng.shuffle(words)
+            self.contents.append(" ".join(words))
+        self.page_types = np.asarray(["policy", "services", "general"], dtype=object)[np.arange(size) % 3]
+
+    def _topic_centers(self) -> np.ndarray:
+        rng = np.random.default_rng(0)
+        spectrum = (1.0 / np.sqrt(1.0 + np.arange(self.dims) / 32.0)).astype(np.float32)
+        centers = rng.normal(size=(self.topics, self.dims)).astype(np.float32) * spectrum
+        return (centers / np.linalg.norm(centers, axis=1, keepdims=True)).T
+
+    def queries(self, count: int, seed: int = 1) -> list[tuple[str, np.ndarray]]:
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(self.size, min(count, self.size), replace=False)
+        output = []
+        for position, pick in enumerate(picks):
+            words = self.contents[pick].split()
+            phrase = " ".join(rng.choice(words, 5, replace=False))
+            vector = self.vectors[pick] + 0.1 * rng.normal(size=self.dims).astype(np.float32)
+            # The leading index keeps query strings unique so embedding lookups stay unambiguous.
+            output.append((f"q{position} {phrase}", vector / np.linalg.norm(vector)))
+        return output
+
+    def ground_truth(self, queries: list[tuple[str, np.ndarray]], top_k: int) -> list[set[str]]:
+        truth = []
+        for _, vector in queries:
+            best = np.argsort(-(self.vectors @ vector))[:top_k]
+            truth.append({self.source_url(int(position)) for position in best})
+        return truth
+
+    @staticmethod
+    def source_url(position: int) -> str:
+        return f"https://bench.example/{position}"
+
+    def load(self, database_url: str, storage_dtype: str, batch_size: int = 2000, allow_destructive: bool = False) -> float:
+        if not allow_destructive and not is_bench_database(database_url):
+            raise RuntimeError(f"refusing to replace kb_chunks in {make_url(database_url).render_as_string()}: not a bench database")
+        from app.db.init_db import init_db
+        from app.db.models import KBChunk
+        from app.db.session import get_session_factory
+        from app.services.embedding_codec import SHORT_EMBEDDING_DTYPE, encode_embedding, shorten_embedding
+
+        os.environ["DATABASE_URL"] = database_url
+        reset_runtime_caches()
+        start = time.perf_counter()
+        session = get_session_factory()()
+        try:
+            init_db(session)
+            session.execute(text("DELETE FROM kb_chunks"))
+            is_postgres = session.bind.dialect.name == "postgresql"
+            for offset in range(0, self.size, batch_size):
+                rows = []
+                vector_rows = []
+                for position in range(offset, min(offset + batch_size, self.size)):
+                    vector = self.vectors[position]
+                    encoded = encode_embedding(vector, storage_dtype)
+                    short = shorten_embedding(vector, self.short_dims) if 0 < self.short_dims < self.dims else None
+                    rows.append(
+                        {
+                            "chunk_id": f"bench-{position}",
+                            "source_url": self.source_url(position),
+                            "title": f"Topic {self.labels[position]}",
+                            "content": self.contents[position],
+                            "metadata_json": {"chunk_index": 0},
+                            "page_type": self.page_types[position],
+                            "embedding_blob": encoded.data,
+                            "embedding_dtype": encoded.dtype,
+                            "embedding_scale": encoded.scale,
+                            "embedding_short_blob": (
+                                encode_embedding(short, SHORT_EMBEDDING_DTYPE).data if short is not None else None
+                            ),
+                            "approved": True,
+                            "version": "bench",
+                        }
+                    )
+                    if is_postgres:
+                        vector_rows.append(
+                            {
+                                "chunk_id": f"bench-{position}",
+                                "embedding": _literal(vector),
+                                "short": _literal(short) if short is not None else None,
+                            }
+                        )
+                session.execute(insert(KBChunk), rows)
+                if vector_rows:
+                    _write_pgvector(session, vector_rows)
+                session.commit()
+            if is_postgres:
+                session.execute(text("ANALYZE kb_chunks"))
+                session.commit()
+        finally:
+            session.close()
+        return round(time.perf_counter() - start, 3)
+
+
+def _literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{value:.7f}" for value in vector.tolist()) + "]"
+
+
+def _write_pgvector(session, vector_rows: list[dict]) -> None:
+    try:
+        with session.begin_nested():
+            session.execute(
+                text(
+                    "UPDATE kb_chunks SET embedding = CAST(:embedding AS vector), "
+                    "embedding_short = CAST(:short AS vector) WHERE chunk_id = :chunk_id"
+                ),
+                vector_rows,
+            )
+    except Exception as exc:  # noqa: BLE001
+        print(f"pgvector columns unavailable, pgvector backend will fall back: {exc.__class__.__name__}")
+
+
+def run_backend(
+    backend: str,
+    corpus: SyntheticCorpus,
+    queries: list[tuple[str, np.ndarray]],
+    truth: list[set[str]],
+    top_k: int,
+) -> dict:
+    os.environ["RETRIEVAL_BACKEND"] = backend
+    os.environ["RETRIEVAL_CACHE_ENABLED"] = "false"
+    reset_runtime_caches()
+
+    from app.db.session import get_session_factory
+    from app.services.llm_service import LLMService
+    from app.services.retrieval_service import RetrievalService
+
+    embeddings = {query: vector.tolist() for query, vector in queries}
+    original_embed = LLMService.embed_text
+    LLMService.embed_text = lambda self, value: embeddings.get(value)  # noqa: ARG005
+    session = get_session_factory()()
+    try:
+        service = RetrievalService(session)
+        tracemalloc.start()
+        build_start = time.perf_counter()
+        service.search(queries[0][0], top_k=top_k)  # first call builds any in-process index
+        build_seconds = time.perf_counter() - build_start
+
+        latencies = []
+        hits = 0
+        for (query, _), expected in zip(queries, truth, strict=True):
+            start = time.perf_counter()
+            results = service.search(query, top_k=top_k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(expected & {item["source_url"] for item in results})
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        session.close()
+        LLMService.embed_text = original_embed
+
+    return {
+        "backend": backend,
+        "first_query_s": round(build_seconds, 3),
+        f"recall@{top_k}": round(hits / (len(truth) * top_k), 4),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "p99_ms": percentile_ms(latencies, 99),
+        "peak_python_mb": round(peak / (1024 * 1024), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backends", nargs="+", default=DEFAULT_BACKENDS, choices=DEFAULT_BACKENDS)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--short-dims", type=int, default=256)
+    parser.add_argument("--storage-dtype", default="float16", choices=["float32", "float16", "int8"])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--postgres-url", default=os.environ.get("BENCH_POSTGRES_URL"))
+    parser.add_argument("--allow-destructive", action="store_true", help="load into a Postgres target not named for benchmarking")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    if args.postgres_url and not args.allow_destructive and not is_bench_database(args.postgres_url):
+        parser.error("--postgres-url is not a bench database or schema; loading deletes all kb_chunks rows (see --allow-destructive)")
+
+    os.environ["OPENAI_API_KEY"] = ""
+    os.environ["EMBEDDING_DIMENSIONS"] = str(args.dims)
+    os.environ["EMBEDDING_SHORT_DIMENSIONS"] = str(args.short_dims)
+    os.environ["EMBEDDING_STORAGE_DTYPE"] = args.storage_dtype
+
+    report: dict = {"top_k": args.top_k, "queries": args.queries, "runs": []}
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["VECTOR_INDEX_DIR"] = str(Path(workdir) / "index")
+        for size in args.sizes:
+            corpus = SyntheticCorpus(size, args.dims, args.short_dims)
+            queries = corpus.queries(args.queries)
+            truth = corpus.ground_truth(queries, args.top_k)
+            targets = [("sqlite", f"sqlite:///{Path(workdir) / f'bench_{size}.db'}")]
+            if args.postgres_url:
+                targets.append(("postgres", args.postgres_url))
+            for database, url in targets:
+                load_seconds = corpus.load(url, args.storage_dtype, allow_destructive=args.allow_destructive)
+                for backend in args.backends:
+                    if backend == "pgvector" and database != "postgres":
+                        continue
+                    result = run_backend(backend, corpus, queries, truth, args.top_k)
+                    result.update({"size": size, "database": database, "load_s": load_seconds})
+                    report["runs"].append(result)
+                    print(json.dumps(result))
+
+    report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(rendered, encoding="utf-8")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main()
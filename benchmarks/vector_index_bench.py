@@ -0,0 +1,110 @@
+"""
+Exact vs IVF in-process vector search on synthetic clustered embeddings.
+
+    python -m benchmarks.vector_index_bench --rows 100000 --probes 4 8 16
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.embedding_codec import shorten_embedding
+from app.services.vector_index import ExactVectorIndex, IVFVectorIndex
+
+
+def synthetic_embeddings(rows: int, dims: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """
+    Unit vectors scattered around `clusters` topic centers, like chunks of a multi-page site.
+    Per-dimension variance decays with position to mimic Matryoshka-trained embeddings, where
+    the leading components carry most of the signal.
+    """
+    rng = np.random.default_rng(seed)
+    spectrum = (1.0 / np.sqrt(1.0 + np.arange(dims) / 32.0)).astype(np.float32)
+    centers = rng.normal(size=(clusters, dims)).astype(np.float32) * spectrum
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(rows, dims)).astype(np.float32) * spectrum
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_exact(vectors: np.ndarray, short_dims: int) -> ExactVectorIndex:
+    short = None
+    full = vectors.astype(np.float32)
+    if 0 < short_dims < vectors.shape[1]:
+        short = np.vstack([shorten_embedding(row, short_dims) for row in vectors])
+        full = full.astype(np.float16)
+    ids = np.arange(1, vectors.shape[0] + 1, dtype=np.int64)
+    page_types = np.full(vectors.shape[0], "general", dtype=object)
+    return ExactVectorIndex(ids, page_types, full, short)
+
+
+def percentile_ms(samples: list[float], pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 3)
+
+
+def run(rows: int, dims: int, short_dims: int, clusters: int, queries: int, top_k: int, probes: list[int]) -> dict:
+    vectors = synthetic_embeddings(rows, dims, clusters)
+    rng = np.random.default_rng(1)
+    query_vectors = vectors[rng.choice(rows, queries, replace=False)] + 0.1 * rng.normal(size=(queries, dims))
+
+    # Ground truth is full-precision brute force, independent of the index implementations.
+    truth = []
+    for query in query_vectors:
+        scores = vectors @ (query / np.linalg.norm(query))
+        truth.append(set((np.argsort(-scores)[:top_k] + 1).tolist()))
+
+    exact = build_exact(vectors, short_dims)
+    report = {"rows": rows, "dims": dims, "short_dims": short_dims, "top_k": top_k, "backends": []}
+
+    def measure(name: str, index, **extra) -> None:
+        latencies = []
+        hits = 0
+        for query, expected in zip(query_vectors, truth, strict=True):
+            start = time.perf_counter()
+            results = index.search(query, top_k=top_k, candidates=max(50, top_k))
+            latencies.append(time.perf_counter() - start)
+            hits += len(expected & {chunk_id for chunk_id, _ in results})
+        report["backends"].append(
+            {
+                "backend": name,
+                **extra,
+                f"recall@{top_k}": round(hits / (len(truth) * top_k), 4),
+                "p50_ms": percentile_ms(latencies, 50),
+                "p95_ms": percentile_ms(latencies, 95),
+                "p99_ms": percentile_ms(latencies, 99),
+            }
+        )
+
+    measure("exact-full", build_exact(vectors, 0))
+    measure("exact-two-stage", exact)
+    with tempfile.TemporaryDirectory() as index_dir:
+        for probe_count in probes:
+            start = time.perf_counter()
+            ivf = IVFVectorIndex.build(exact, lists=0, probes=probe_count, index_dir=index_dir)
+            build_seconds = round(time.perf_counter() - start, 3)
+            measure("ivf", ivf, probes=probe_count, lists=int(ivf.centroids.shape[0]), build_s=build_seconds)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--short-dims", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            run(args.rows, args.dims, args.short_dims, args.clusters, args.queries, args.top_k, args.probes),
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
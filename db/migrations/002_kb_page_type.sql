@@ -0,0 +1,18 @@
+-- Promote kb_chunks page_type from metadata_json to an indexed column for intent-filtered retrieval.
+ALTER TABLE IF EXISTS kb_chunks
+  ADD COLUMN IF NOT EXISTS page_type VARCHAR(32) NOT NULL DEFAULT 'general';
+
+UPDATE kb_chunks
+SET page_type = COALESCE(metadata_json ->> 'page_type', 'general')
+WHERE page_type = 'general'
+  AND metadata_json ->> 'page_type' IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_kb_chunks_page_type
+  ON kb_chunks (page_type);
+
+-- Partial index matching the retrieval predicate (approved chunks filtered by page type).
+CREATE INDEX IF NOT EXISTS kb_chunks_approved_page_type_idx
+  ON kb_chunks (page_type)
+  WHERE approved = true;
+
+ANALYZE kb_chunks;
@@ -0,0 +1,10 @@
+-- Compact binary embedding storage for kb_chunks.
+-- After applying, run `python -m app.jobs.migrate_embeddings` to convert embedding_json rows in batches.
+ALTER TABLE IF EXISTS kb_chunks
+  ADD COLUMN IF NOT EXISTS embedding_blob BYTEA,
+  ADD COLUMN IF NOT EXISTS embedding_dtype VARCHAR(16),
+  ADD COLUMN IF NOT EXISTS embedding_scale DOUBLE PRECISION;
+
+-- Embedding bytes are already dense; skip TOAST compression attempts.
+ALTER TABLE IF EXISTS kb_chunks
+  ALTER COLUMN embedding_blob SET STORAGE EXTERNAL;
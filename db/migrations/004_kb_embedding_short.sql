@@ -0,0 +1,17 @@
+-- Shortened (Matryoshka) embeddings for two-stage vector search.
+-- The dimension must match EMBEDDING_SHORT_DIMENSIONS (default 256), and the full `embedding`
+-- column from 001 must match EMBEDDING_DIMENSIONS. `python -m app.jobs.migrate`, reindex writes and
+-- startup warmup refuse to run on a mismatch. To change a dimension:
+--   ALTER TABLE kb_chunks ALTER COLUMN embedding_short TYPE vector(<dims>) USING NULL;
+-- then reindex (or run the backfill below).
+ALTER TABLE IF EXISTS kb_chunks
+  ADD COLUMN IF NOT EXISTS embedding_short vector(256);
+
+-- First-pass index lives on the short vectors. The full-vector index from 001 stays: the
+-- single-stage search orders by `embedding` whenever short vectors are missing (before the
+-- backfill, or for chunks written without them).
+CREATE INDEX IF NOT EXISTS kb_chunks_embedding_short_idx
+  ON kb_chunks USING hnsw (embedding_short vector_cosine_ops);
+
+-- Populate with: python -m app.jobs.backfill_short_embeddings
+ANALYZE kb_chunks;
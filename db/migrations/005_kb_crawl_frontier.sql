@@ -0,0 +1,18 @@
+-- Discover-mode crawling (KB_CRAWL_MODE=discover): cached outgoing links per page and the persisted frontier.
+ALTER TABLE IF EXISTS kb_source_pages
+  ADD COLUMN IF NOT EXISTS links_json JSON;
+
+CREATE TABLE IF NOT EXISTS kb_crawl_frontier (
+  id SERIAL PRIMARY KEY,
+  crawl_id VARCHAR(32) NOT NULL,
+  url VARCHAR(512) NOT NULL,
+  depth INTEGER NOT NULL DEFAULT 0,
+  priority INTEGER NOT NULL DEFAULT 1,
+  lastmod VARCHAR(64),
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  CONSTRAINT uq_kb_crawl_frontier_crawl_url UNIQUE (crawl_id, url)
+);
+
+CREATE INDEX IF NOT EXISTS ix_kb_crawl_frontier_crawl_id ON kb_crawl_frontier (crawl_id);
+CREATE INDEX IF NOT EXISTS ix_kb_crawl_frontier_status ON kb_crawl_frontier (status);
@@ -0,0 +1,31 @@
+-- Blue/green KB versions: chunk visibility intervals plus the active-version pointer.
+-- Existing chunks get introduced_version_id = 0, which stays visible until a published build retires them.
+ALTER TABLE IF EXISTS kb_chunks
+  ADD COLUMN IF NOT EXISTS introduced_version_id INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS retired_version_id INTEGER,
+  ADD COLUMN IF NOT EXISTS built_version_id INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS ix_kb_chunks_introduced_version_id ON kb_chunks (introduced_version_id);
+CREATE INDEX IF NOT EXISTS ix_kb_chunks_retired_version_id ON kb_chunks (retired_version_id);
+CREATE INDEX IF NOT EXISTS ix_kb_chunks_built_version_id ON kb_chunks (built_version_id);
+
+CREATE TABLE IF NOT EXISTS kb_versions (
+  id SERIAL PRIMARY KEY,
+  label VARCHAR(64) NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'building',
+  crawl_id VARCHAR(32),
+  summary_json JSON,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  activated_at TIMESTAMPTZ,
+  superseded_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_kb_versions_label ON kb_versions (label);
+CREATE INDEX IF NOT EXISTS ix_kb_versions_status ON kb_versions (status);
+CREATE INDEX IF NOT EXISTS ix_kb_versions_crawl_id ON kb_versions (crawl_id);
+
+CREATE TABLE IF NOT EXISTS kb_active_version (
+  name VARCHAR(32) PRIMARY KEY,
+  version_id INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
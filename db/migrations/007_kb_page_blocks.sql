@@ -0,0 +1,3 @@
+-- Boilerplate detection: per-page block fingerprints ([simhash, text] pairs) from the last full fetch.
+ALTER TABLE IF EXISTS kb_source_pages
+  ADD COLUMN IF NOT EXISTS blocks_json JSON;
@@ -0,0 +1,5 @@
+-- Retention and metrics filter on created_at. CONCURRENTLY avoids blocking writes on large tables;
+-- run this file outside a transaction (plain `psql -f`, not `-1`).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversation_messages_created_at ON conversation_messages (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_escalation_tickets_created_at ON escalation_tickets (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_audit_logs_created_at ON audit_logs (created_at);
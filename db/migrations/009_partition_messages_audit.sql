@@ -0,0 +1,60 @@
+-- Optional: monthly range partitions on created_at for conversation_messages and audit_logs, so
+-- retention drops whole expired months instead of deleting rows. Existing rows are copied into the
+-- new partitioned tables, so run it in a maintenance window. Afterwards `python -m app.jobs.partitions`
+-- (and every retention run) creates partitions DB_PARTITION_MONTHS_AHEAD months ahead. Rows for a
+-- month with no partition land in the `<table>_default` partition, which the job splits into the
+-- month's partition once it creates it; schedule the job at least monthly.
+-- Safe to re-run: tables that are already partitioned are skipped, and only gain a missing DEFAULT partition.
+DO $$
+DECLARE
+  tbl TEXT;
+  part_month DATE;
+  last_month DATE := (date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '4 months')::date;
+BEGIN
+  FOREACH tbl IN ARRAY ARRAY['conversation_messages', 'audit_logs'] LOOP
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = tbl) THEN
+      EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);
+      CONTINUE;
+    END IF;
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, tbl || '_unpartitioned');
+    -- Keep the id sequence alive when the old table is dropped.
+    EXECUTE format('ALTER SEQUENCE %I OWNED BY NONE', tbl || '_id_seq');
+    EXECUTE format('UPDATE %I SET created_at = now() WHERE created_at IS NULL', tbl || '_unpartitioned');
+    EXECUTE format(
+      'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)',
+      tbl, tbl || '_unpartitioned'
+    );
+
+    EXECUTE format(
+      'SELECT date_trunc(''month'', COALESCE(min(created_at), now()) AT TIME ZONE ''UTC'')::date FROM %I',
+      tbl || '_unpartitioned'
+    ) INTO part_month;
+    WHILE part_month < last_month LOOP
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        tbl || '_p' || to_char(part_month, 'YYYY_MM'),
+        tbl,
+        to_char(part_month, 'YYYY-MM-DD') || ' 00:00:00+00',
+        to_char(part_month + INTERVAL '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+      );
+      part_month := (part_month + INTERVAL '1 month')::date;
+    END LOOP;
+    -- Catches inserts past the last monthly partition if partition maintenance lapses.
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, tbl || '_unpartitioned');
+    EXECUTE format('DROP TABLE %I', tbl || '_unpartitioned');
+    EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.id', tbl || '_id_seq', tbl);
+    -- A primary key on a partitioned table must include the partition key.
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, created_at)', tbl);
+    EXECUTE format('CREATE INDEX %I ON %I (created_at)', 'ix_' || tbl || '_created_at', tbl);
+
+    IF tbl = 'conversation_messages' THEN
+      CREATE INDEX ix_conversation_messages_session_id ON conversation_messages (session_id);
+      ALTER TABLE conversation_messages
+        ADD CONSTRAINT conversation_messages_session_id_fkey
+        FOREIGN KEY (session_id) REFERENCES conversation_sessions (id);
+    END IF;
+  END LOOP;
+END $$;
@@ -0,0 +1,19 @@
+-- Batched retention: one row per run with its cutoffs and per-table checkpoints, so an
+-- interrupted run resumes where it stopped. The CONCURRENTLY indexes need a run outside a transaction, as for 008.
+CREATE TABLE IF NOT EXISTS retention_runs (
+  id VARCHAR(36) PRIMARY KEY,
+  status VARCHAR(16) NOT NULL DEFAULT 'running',
+  lock_key VARCHAR(32) UNIQUE,
+  requested_by VARCHAR(128) NOT NULL DEFAULT 'admin',
+  cutoffs_json JSON NOT NULL,
+  checkpoint_json JSON,
+  stats_json JSON,
+  error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  heartbeat_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_retention_runs_status ON retention_runs (status);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_lead_captures_created_at ON lead_captures (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversation_sessions_created_at ON conversation_sessions (created_at);
@@ -0,0 +1,9 @@
+-- Incrementally maintained /v1/metrics counters. After applying, seed them with
+-- `python -m app.jobs.reconcile_counters` (schedule it daily to correct drift).
+CREATE TABLE IF NOT EXISTS metric_counters (
+  name VARCHAR(64) NOT NULL,
+  shard INTEGER NOT NULL DEFAULT 0,
+  value BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (name, shard)
+);
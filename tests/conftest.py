@@ -4,9 +4,21 @@ from pathlib import Path
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core.runtime import reset_runtime_caches
+
 
 @pytest.fixture()
-def client(tmp_path: Path):
+def reset_runtime():
+    """
+    Clears the cached settings, engines and per-process caches; call it after changing the
+    environment. Runs again at teardown so no test inherits another's state.
+    """
+    yield reset_runtime_caches
+    reset_runtime_caches()
+
+
+@pytest.fixture()
+def client(tmp_path: Path, reset_runtime):
     db_path = tmp_path / "test_upstate_agent.db"
     os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
     os.environ["ADMIN_API_KEY"] = "test-admin-key"
@@ -16,12 +28,7 @@ def client(tmp_path: Path):
     os.environ["TWILIO_VALIDATE_SIGNATURES"] = "false"
     os.environ["TWILIO_AUTH_TOKEN"] = "test-token"
 
-    from app.core.config import get_settings
-    from app.db.session import get_engine, get_session_factory
-
-    get_settings.cache_clear()
-    get_engine.cache_clear()
-    get_session_factory.cache_clear()
+    reset_runtime()
 
     from app.main import create_app
 
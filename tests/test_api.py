@@ -250,7 +250,327 @@ def test_retention_run_endpoint_dry_run_and_execute(client):
         headers={"X-Admin-Key": "test-admin-key"},
         json={"dry_run": False, "updated_by": "test"},
     )
-    assert run.status_code == 200
+    assert run.status_code == 202
     run_body = run.json()
-    assert run_body["deleted_messages"] >= 1
-    assert run_body["deleted_escalations"] >= 1
+    assert run_body["status"] == "running"
+    assert run_body["poll_url"] == f"/v1/admin/privacy/retention-runs/{run_body['run_id']}"
+
+    # The test client runs background tasks before returning, so the run has finished by now.
+    status = client.get(run_body["poll_url"], headers={"X-Admin-Key": "test-admin-key"})
+    assert status.status_code == 200
+    status_body = status.json()
+    assert status_body["status"] == "completed"
+    assert status_body["stats"]["conversation_messages"]["deleted"] >= 1
+    assert status_body["stats"]["escalation_tickets"]["deleted"] >= 1
+
+    missing = client.get("/v1/admin/privacy/retention-runs/missing", headers={"X-Admin-Key": "test-admin-key"})
+    assert missing.status_code == 404
+
+
+def test_retention_run_endpoint_rejects_second_active_run(client):
+    from app.db.session import get_session_factory
+    from app.services.retention_service import RetentionService
+
+    db = get_session_factory()()
+    try:
+        active_id = RetentionService(db).claim("other-admin")[0].id
+    finally:
+        db.close()
+
+    response = client.post(
+        "/v1/admin/privacy/retention-run",
+        headers={"X-Admin-Key": "test-admin-key"},
+        json={"dry_run": False, "updated_by": "test"},
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"]["run_id"] == active_id
+
+
+def test_kb_reindex_runs_as_job_with_single_active_lock(client, monkeypatch):
+    import requests
+
+    from app.db.models import KBReindexJob
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.llm_service import LLMService
+
+    def fake_request(self, url, headers):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"<html><title>Services</title><body>Hearing tests.</body></html>"
+        response.encoding = "utf-8"
+        return response
+
+    monkeypatch.setattr(Crawler, "_request", fake_request)
+    monkeypatch.setattr(LLMService, "embed_text", lambda self, text: None)
+    headers = {"X-Admin-Key": "test-admin-key"}
+
+    submitted = client.post("/v1/admin/kb/reindex", headers=headers, json={"urls": ["https://example.com/services"]})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+
+    job = client.get(f"/v1/admin/kb/jobs/{job_id}", headers=headers).json()
+    assert job["status"] == "succeeded"
+    assert job["progress"]["urls_done"] == 1
+    assert job["progress"]["chunks_embedded"] == 1
+    assert set(job["progress"]["timings_ms"]) == {"fetch_ms", "parse_ms", "embed_write_ms"}
+
+    session = get_session_factory()()
+    try:
+        session.add(KBReindexJob(id="held", lock_key="kb", status="running"))
+        session.commit()
+    finally:
+        session.close()
+    conflict = client.post("/v1/admin/kb/reindex", headers=headers, json={})
+    assert conflict.status_code == 409
+    assert conflict.json()["detail"]["job_id"] == "held"
+
+    cancel = client.post("/v1/admin/kb/jobs/held/cancel", headers=headers)
+    assert cancel.json()["cancel_requested"] is True
+    assert client.get("/v1/admin/kb/jobs/missing", headers=headers).status_code == 404
+
+
+def test_async_database_url_uses_asyncio_drivers():
+    from app.db.session import async_database_url
+
+    assert async_database_url("sqlite:///./upstate_agent.db") == "sqlite+aiosqlite:///./upstate_agent.db"
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("postgresql+asyncpg://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_metrics_counts_through_async_session(client):
+    session = client.post("/v1/chat/session", json={"channel": "web"}).json()
+    client.post("/v1/chat/message", json={"session_id": session["session_id"], "channel": "web", "text": "What are your hours?"})
+
+    metrics = client.get("/v1/metrics").json()
+    assert metrics["sessions_total"] == 1
+    assert metrics["messages_total"] == 2
+
+
+def test_chat_turn_commits_once_and_emails_after_commit(client, monkeypatch):
+    from sqlalchemy import event, select
+
+    from app.db.models import ConversationMessage, EscalationTicket
+    from app.db.session import get_async_engine, get_session_factory
+    from app.integrations.email_client import EmailClient
+
+    emailed = []
+
+    def fake_send(self, subject, body):
+        # Runs after the response: the ticket must already be visible to another connection.
+        with get_session_factory()() as other:
+            emailed.append(other.scalars(select(EscalationTicket.id)).all())
+
+    monkeypatch.setattr(EmailClient, "send", fake_send)
+    session = client.post("/v1/chat/session", json={"channel": "web"}).json()
+
+    commits = []
+    event.listen(get_async_engine().sync_engine, "commit", lambda conn: commits.append(1))
+    response = client.post(
+        "/v1/chat/message",
+        json={"session_id": session["session_id"], "channel": "web", "text": "Tell me your latest cortical adaptation index"},
+    )
+    assert response.json()["escalated"] is True
+    assert len(commits) == 1
+    assert len(emailed) == 1 and len(emailed[0]) == 1
+
+    commits.clear()
+    client.post("/v1/sms/webhook/twilio", data={"From": "+18645550000", "Body": "What are your hours?"})
+    assert len(commits) == 1
+    with get_session_factory()() as other:
+        roles = other.scalars(select(ConversationMessage.role).where(ConversationMessage.channel == "sms")).all()
+    assert sorted(roles) == ["assistant", "user"]
+
+
+def test_metrics_counters_track_writes_and_reconcile_drift(client):
+    from sqlalchemy import update
+
+    from app.db.models import MetricCounter
+    from app.db.session import get_session_factory
+    from app.jobs.reconcile_counters import run_reconcile_counters
+
+    session = client.post("/v1/chat/session", json={"channel": "web"}).json()
+    client.post(
+        "/v1/chat/message",
+        json={"session_id": session["session_id"], "channel": "web", "text": "Tell me your latest cortical adaptation index"},
+    )
+    metrics = client.get("/v1/metrics").json()
+    assert (metrics["sessions_total"], metrics["messages_total"], metrics["escalations_open"]) == (1, 2, 1)
+
+    with get_session_factory()() as db:
+        drifted = update(MetricCounter).where(MetricCounter.name == "messages_total", MetricCounter.shard == 0)
+        db.execute(drifted.values(value=MetricCounter.value + 5))
+        db.commit()
+    assert client.get("/v1/metrics").json()["messages_total"] == 7
+
+    report = run_reconcile_counters()
+    assert report["messages_total"] == {"counted": 2, "stored": 7, "drift": -5}
+    assert client.get("/v1/metrics").json()["messages_total"] == 2
+
+
+def test_prometheus_exposition_has_route_and_dependency_histograms(client):
+    session = client.post("/v1/chat/session", json={"channel": "web"}).json()
+    client.post("/v1/chat/message", json={"session_id": session["session_id"], "channel": "web", "text": "What are your hours?"})
+
+    response = client.get("/v1/metrics/prometheus")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'upstate_http_request_duration_seconds_bucket{le="0.005",method="POST",route="/v1/chat/message",status="200"}' in body
+    assert 'upstate_dependency_duration_seconds_count{outcome="ok",target="db"}' in body
+    assert "upstate_http_requests_in_flight" in body
+
+
+def test_scrape_drops_in_flight_gauges_of_dead_workers(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    from app.core.metrics import mark_dead_workers
+
+    worker = subprocess.Popen([sys.executable, "-c", "pass"])
+    worker.wait()
+    for name in (f"gauge_livesum_{worker.pid}.db", f"counter_{worker.pid}.db", f"gauge_livesum_{os.getpid()}.db"):
+        (tmp_path / name).write_bytes(b"")
+
+    assert mark_dead_workers(str(tmp_path)) == [worker.pid]
+    # Only live gauges are dropped; the dead worker's counters still count toward totals.
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([f"counter_{worker.pid}.db", f"gauge_livesum_{os.getpid()}.db"])
+
+
+def test_app_import_defers_heavy_dependencies():
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    heavy = ["langgraph", "openai", "bs4", "lxml", "requests", "redis", "numpy"]
+    script = f"import sys, app.main; print([m for m in {heavy!r} if m in sys.modules])"
+    proc = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert proc.stdout.strip() == "[]"
+
+
+def test_auto_migrate_defaults_off_in_production():
+    from app.core.config import Settings
+
+    assert Settings(app_env="development").auto_migrate_enabled
+    assert not Settings(app_env="production").auto_migrate_enabled
+    assert Settings(app_env="production", auto_migrate=True).auto_migrate_enabled
+
+
+def _wait_ready(client, until=lambda body: body["status"] == "ready", timeout: float = 10.0):
+    import time
+
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/v1/ready")
+        if until(response.json()) or time.monotonic() > deadline:
+            return response
+        time.sleep(0.05)
+
+
+def test_ready_reports_after_warmup_steps(client):
+    response = _wait_ready(client)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert set(body["steps_ms"]) == {"db_pools", "policy_snapshot", "orchestrator", "retrieval_index"}
+    assert client.get("/v1/health").status_code == 200
+
+
+def test_warmup_retries_a_failed_step_until_it_succeeds(client, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app.services.warmup as warmup_module
+    from app.main import create_app
+
+    attempts = []
+    original = warmup_module._warm_policies
+
+    _wait_ready(client)  # the fixture app's own warmup must not consume the patched step
+
+    def flaky_policies():
+        attempts.append(1)
+        if len(attempts) <= 2:
+            raise RuntimeError("database unreachable")
+        original()
+
+    monkeypatch.setattr(warmup_module, "RETRY_INITIAL_SECONDS", 0.01)
+    monkeypatch.setattr(warmup_module, "_warm_policies", flaky_policies)
+    with TestClient(create_app()) as cold_client:
+        response = _wait_ready(cold_client)
+    assert response.status_code == 200
+    assert response.json()["retries"] == 2
+    assert response.json()["error"] is None
+
+
+def test_ready_stays_unavailable_while_a_step_keeps_failing(client, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app.services.warmup as warmup_module
+    from app.main import create_app
+
+    _wait_ready(client)  # the fixture app's own warmup must not consume the patched step
+
+    def broken_policies():
+        raise RuntimeError("database unreachable")
+
+    monkeypatch.setattr(warmup_module, "RETRY_INITIAL_SECONDS", 0.01)
+    monkeypatch.setattr(warmup_module, "_warm_policies", broken_policies)
+    with TestClient(create_app()) as cold_client:
+        response = _wait_ready(cold_client, until=lambda body: body["retries"] >= 2)
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming"
+    assert "database unreachable" in response.json()["error"]
+
+
+def test_agent_graph_is_compiled_once_and_shared_across_turns(client):
+    from app.services.orchestration import get_agent_graph
+
+    _wait_ready(client)
+    compiled = get_agent_graph()
+    for text in ("What are your hours?", "Can you help with my hearing aid?"):
+        session_id = client.post("/v1/chat/session", json={"channel": "web", "consent_to_contact": False}).json()["session_id"]
+        assert client.post("/v1/chat/message", json={"session_id": session_id, "channel": "web", "text": text}).status_code == 200
+    assert get_agent_graph() is compiled
+    assert get_agent_graph.cache_info().currsize == 1
+
+
+def test_warmup_primes_configured_queries(client, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.core.config import get_settings
+    from app.main import create_app
+    from app.services.retrieval_cache import get_retrieval_cache
+
+    monkeypatch.setenv("WARMUP_QUERIES", "Do you take insurance?,hearing aid cleaning")
+    get_settings.cache_clear()
+    entries_before = get_retrieval_cache().stats()["entries"]
+    with TestClient(create_app()) as warm_client:
+        body = _wait_ready(warm_client).json()
+    assert body["status"] == "ready"
+    assert body["primed_queries"] == 2
+    assert get_retrieval_cache().stats()["entries"] >= entries_before + 2
+
+
+def test_threadpool_size_setting_caps_worker_threads(client, monkeypatch):
+    import anyio.to_thread
+    from fastapi.testclient import TestClient
+
+    from app.core.config import get_settings
+    from app.main import create_app
+
+    monkeypatch.setenv("THREADPOOL_SIZE", "7")
+    get_settings.cache_clear()
+
+    async def thread_tokens():
+        return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+    with TestClient(create_app()) as sized_client:
+        assert sized_client.portal.call(thread_tokens) == 7
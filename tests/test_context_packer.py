@@ -0,0 +1,43 @@
+def _hit(source_url, chunk_index, content, score):
+    return {
+        "source_url": source_url,
+        "title": "Services",
+        "snippet": content[:260],
+        "score": score,
+        "content": content,
+        "chunk_index": chunk_index,
+    }
+
+
+def test_pack_stitches_adjacent_chunks_and_drops_duplicates():
+    from app.services.context_packer import ContextPacker
+
+    page = " ".join(f"sentence {i} about hearing aid fittings and balance care." for i in range(40))
+    chunks = [page[0:400], page[280:680]]
+    hits = [
+        _hit("https://example.com/services", 0, chunks[0], 0.9),
+        _hit("https://example.com/services", 1, chunks[1], 0.7),
+        _hit("https://example.com/services-copy", 0, chunks[0], 0.5),
+    ]
+
+    packed = ContextPacker(token_budget=10_000, dedupe_threshold=0.8).pack(hits)
+
+    assert len(packed) == 1
+    assert packed[0]["source_url"] == "https://example.com/services"
+    assert packed[0]["score"] == 0.9
+    assert packed[0]["snippet"] == page[: len(chunks[0]) + len(chunks[1]) - 120]
+
+
+def test_pack_respects_token_budget_in_score_order():
+    from app.services.context_packer import ContextPacker
+
+    hits = [
+        _hit("https://example.com/a", 0, "alpha " * 100, 0.2),
+        _hit("https://example.com/b", 0, "bravo " * 100, 0.8),
+    ]
+
+    packed = ContextPacker(token_budget=160, dedupe_threshold=0.8).pack(hits)
+
+    assert [item["source_url"] for item in packed] == ["https://example.com/b", "https://example.com/a"]
+    assert packed[0]["snippet"] == ("bravo " * 100)
+    assert sum(ContextPacker.estimate_tokens(item["snippet"]) for item in packed) <= 160
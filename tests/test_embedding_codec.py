@@ -0,0 +1,64 @@
+import os
+
+
+def test_encode_decode_roundtrip_per_dtype():
+    import numpy as np
+
+    from app.services.embedding_codec import decode_embedding, encode_embedding
+
+    rng = np.random.default_rng(7)
+    values = rng.normal(size=1536).astype(np.float32).tolist()
+
+    f32 = encode_embedding(values, "float32")
+    f16 = encode_embedding(values, "float16")
+    i8 = encode_embedding(values, "int8")
+
+    assert len(f32.data) == 1536 * 4
+    assert len(f16.data) == 1536 * 2
+    assert len(i8.data) == 1536
+    assert i8.scale and i8.scale > 0
+
+    original = np.asarray(values, dtype=np.float32)
+    assert np.allclose(decode_embedding(f32.data, "float32"), original)
+    assert np.allclose(decode_embedding(f16.data, "float16"), original, atol=1e-2)
+    assert np.allclose(decode_embedding(i8.data, "int8", i8.scale), original, atol=i8.scale)
+
+    view = decode_embedding(f32.data, "float32")
+    assert view.base is not None
+    assert not view.flags.writeable
+
+
+def test_migrate_embeddings_converts_json_rows(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'embedding_migration.db'}"
+    monkeypatch.setenv("EMBEDDING_STORAGE_DTYPE", "int8")
+    reset_runtime()
+
+    import numpy as np
+
+    from app.db.init_db import init_db
+    from app.db.models import KBChunk
+    from app.db.session import get_session_factory
+    from app.jobs.migrate_embeddings import run_migrate_embeddings
+    from app.services.embedding_codec import decode_embedding
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        db.add(KBChunk(chunk_id="c1", source_url="u", content="x", embedding_json=[0.5, -1.0, 0.25], version="v1"))
+        db.add(KBChunk(chunk_id="c2", source_url="u", content="y", version="v1"))
+        db.commit()
+    finally:
+        db.close()
+
+    summary = run_migrate_embeddings(batch_size=1)
+    assert summary["converted"] == 1
+
+    db = get_session_factory()()
+    try:
+        row = db.query(KBChunk).filter(KBChunk.chunk_id == "c1").one()
+        assert row.embedding_json is None
+        assert row.embedding_dtype == "int8"
+        vector = decode_embedding(row.embedding_blob, row.embedding_dtype, row.embedding_scale)
+        assert np.allclose(vector, [0.5, -1.0, 0.25], atol=row.embedding_scale)
+    finally:
+        db.close()
@@ -1,19 +1,10 @@
 import os
 
 
-def _reset_runtime():
-    from app.core.config import get_settings
-    from app.db.session import get_engine, get_session_factory
-
-    get_settings.cache_clear()
-    get_engine.cache_clear()
-    get_session_factory.cache_clear()
-
-
-def test_escalation_email_omits_excerpt_by_default(tmp_path, monkeypatch):
+def test_escalation_email_omits_excerpt_by_default(tmp_path, monkeypatch, reset_runtime):
     os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'escalation_email_default.db'}"
     os.environ["ESCALATION_EMAIL_INCLUDE_EXCERPT"] = "false"
-    _reset_runtime()
+    reset_runtime()
 
     sent: dict[str, str] = {}
 
@@ -51,11 +42,11 @@ def test_escalation_email_omits_excerpt_by_default(tmp_path, monkeypatch):
     assert "[REDACTED_EMAIL]" in stored.conversation_excerpt
 
 
-def test_escalation_email_optional_excerpt_is_redacted_and_truncated(tmp_path, monkeypatch):
+def test_escalation_email_optional_excerpt_is_redacted_and_truncated(tmp_path, monkeypatch, reset_runtime):
     os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'escalation_email_enabled.db'}"
     os.environ["ESCALATION_EMAIL_INCLUDE_EXCERPT"] = "true"
     os.environ["ESCALATION_EMAIL_EXCERPT_MAX_CHARS"] = "40"
-    _reset_runtime()
+    reset_runtime()
 
     sent: dict[str, str] = {}
 
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.html_extract import get_extractor, lxml_available
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "html"
+
+PAGE = """<!doctype html><html><head><title> Hearing  Aids </title><script>var x = 1;</script></head><body>
+<header><a href="/">Upstate Hearing</a></header>
+<nav><a href="/services">Services</a></nav><!-- promo -->
+<main><article><header><h1>Hearing <em>aids</em></h1></header><p>We fit <b>all</b> brands.<br>Call us today.</p>
+<h2>Prices</h2><ul><li>Basic $900</li><li>Premium</li></ul><div role="navigation">Next page</div>Ask about financing.</article></main>
+<footer><a href="/privacy">Privacy</a></footer></body></html>"""
+
+BACKENDS = ["soup", pytest.param("lxml", marks=pytest.mark.skipif(not lxml_available(), reason="lxml not installed"))]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_extracts_main_content_as_heading_sections(backend):
+    page = get_extractor(backend).extract(PAGE)
+
+    assert page.title == "Hearing Aids"
+    assert page.links == ["/", "/services", "/privacy"]
+    assert page.sections == [
+        ("Hearing aids", ["We fit all brands.", "Call us today."]),
+        ("Prices", ["Basic $900", "Premium", "Ask about financing."]),
+    ]
+    assert page.text.splitlines()[0] == "Hearing aids"
+
+
+@pytest.mark.skipif(not lxml_available(), reason="lxml not installed")
+def test_backends_agree_on_saved_fixtures():
+    soup, lxml = get_extractor("soup"), get_extractor("lxml")
+    for path in sorted(FIXTURES.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        assert lxml.extract(html) == soup.extract(html), path.name
@@ -114,18 +114,13 @@ def test_sms_non_phi_handoff_template(client):
     assert "do not share health details by text" in response.text.lower()
 
 
-def test_rate_limit_enforced_for_non_exempt_path(tmp_path):
+def test_rate_limit_enforced_for_non_exempt_path(tmp_path, reset_runtime):
     os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'rate_limit.db'}"
     os.environ["RATE_LIMIT_ENABLED"] = "true"
     os.environ["RATE_LIMIT_REQUESTS_PER_MINUTE"] = "2"
     os.environ["RATE_LIMIT_EXEMPT_PATHS"] = "/v1/health,/v1/metrics"
 
-    from app.core.config import get_settings
-    from app.db.session import get_engine, get_session_factory
-
-    get_settings.cache_clear()
-    get_engine.cache_clear()
-    get_session_factory.cache_clear()
+    reset_runtime()
 
     from app.main import create_app
 
@@ -140,17 +135,12 @@ def test_rate_limit_enforced_for_non_exempt_path(tmp_path):
     assert third.status_code == 429
 
 
-def test_cors_allowlist_applies_in_production(tmp_path):
+def test_cors_allowlist_applies_in_production(tmp_path, reset_runtime):
     os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'cors.db'}"
     os.environ["APP_ENV"] = "production"
     os.environ["CORS_ORIGINS"] = "https://www.upstatehearingandbalance.com"
 
-    from app.core.config import get_settings
-    from app.db.session import get_engine, get_session_factory
-
-    get_settings.cache_clear()
-    get_engine.cache_clear()
-    get_session_factory.cache_clear()
+    reset_runtime()
 
     from app.main import create_app
 
@@ -168,19 +158,14 @@ def test_cors_allowlist_applies_in_production(tmp_path):
     assert response.headers.get("access-control-allow-origin") == "https://www.upstatehearingandbalance.com"
 
 
-def test_create_app_rejects_unsafe_prod_defaults(tmp_path):
+def test_create_app_rejects_unsafe_prod_defaults(tmp_path, reset_runtime):
     os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'prod_safety.db'}"
     os.environ["APP_ENV"] = "production"
     os.environ["ADMIN_API_KEY"] = "change-me"
     os.environ["ESCALATION_API_KEY"] = "change-me-escalation"
     os.environ["CORS_ORIGINS"] = "https://www.upstatehearingandbalance.com"
 
-    from app.core.config import get_settings
-    from app.db.session import get_engine, get_session_factory
-
-    get_settings.cache_clear()
-    get_engine.cache_clear()
-    get_session_factory.cache_clear()
+    reset_runtime()
 
     from app.main import create_app
 
@@ -189,3 +174,43 @@ def test_create_app_rejects_unsafe_prod_defaults(tmp_path):
         raise AssertionError("Expected production safety validation to fail")
     except ValueError as exc:
         assert "Unsafe admin API key" in str(exc) or "Unsafe escalation API key" in str(exc)
+
+
+def test_agent_reads_route_to_replica_and_fall_back_when_lagging(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'primary.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setenv("REPLICA_LAG_CHECK_SECONDS", "0")
+
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_read_router, get_session_factory
+    from app.services.orchestration import run_agent_turn
+    from app.services.policy_service import PolicyService
+    from app.services.policy_snapshot import get_policy_snapshot
+
+    router = get_read_router()
+    for session in (get_session_factory()(), get_session_factory()(bind=router.targets[0].engine)):
+        init_db(session)
+        session.close()
+    # The replica has not caught up with this policy change yet.
+    primary = get_session_factory()()
+    PolicyService(primary).update_policy("business_hours", "Saturdays 8-12.", updated_by="test")
+    primary.close()
+
+    # Turns read from the replica, but policies always come from the primary: the announced update
+    # is served at once, and the snapshot loads once rather than on every turn while the replica lags.
+    replica_answer = run_agent_turn("session-r", "web", "What are your business hours?")
+    assert "Saturdays 8-12." in replica_answer.response_text
+    assert router.targets[0].routed == 1
+    snapshot = get_policy_snapshot()
+    run_agent_turn("session-r", "web", "What are your business hours?")
+    assert get_policy_snapshot() is snapshot
+
+    monkeypatch.setattr(type(router), "_measure", lambda self, target: target.record_lag(60.0))
+    primary_answer = run_agent_turn("session-r", "web", "What are your business hours?")
+    assert "Saturdays 8-12." in primary_answer.response_text
+    stats = router.stats()
+    assert stats["replica_fallbacks"] == 1
+    assert stats["replicas"][router.targets[0].name]["lag_seconds"] == 60.0
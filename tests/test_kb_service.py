@@ -0,0 +1,585 @@
+import os
+
+
+def _response(status_code, body="", headers=None):
+    import requests
+
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body.encode("utf-8")
+    response.encoding = "utf-8"
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSite:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def __call__(self, url, headers):
+        self.requests.append((url, dict(headers)))
+        if url not in self.pages:
+            return _response(404)
+        html, etag = self.pages[url]
+        if etag and headers.get("If-None-Match") == etag:
+            return _response(304)
+        return _response(200, html, {"ETag": etag})
+
+
+def test_reindex_uses_conditional_get_and_skips_unchanged_pages(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_conditional.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import KBChunk, KBSourcePage
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.kb_service import KBService
+    from app.services.llm_service import LLMService
+
+    site = FakeSite(
+        {
+            "https://example.com/services": ("<html><title>Services</title><body>Hearing tests.</body></html>", '"v1"'),
+            "https://example.com/": ("<html><title>Home</title><body>Welcome.</body></html>", '"h1"'),
+        }
+    )
+    embedded: list[str] = []
+    monkeypatch.setattr(Crawler, "_request", site)
+    monkeypatch.setattr(LLMService, "embed_text", lambda self, text: embedded.append(text) or None)
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        service = KBService(db)
+        urls = list(site.pages)
+
+        first = service.reindex(urls, updated_by="test")
+        assert first["pages"]["fetched"] == 2
+        assert first["upserted_chunks"] == 2
+        assert len(embedded) == 2
+
+        second = service.reindex(urls, updated_by="test")
+        assert second["pages"]["not_modified"] == 2
+        assert second["upserted_chunks"] == 0
+        assert len(embedded) == 2
+        assert all(headers.get("If-None-Match") for _, headers in site.requests[2:])
+
+        site.pages["https://example.com/"] = ("<html><title>Home</title><body>Now open Saturdays.</body></html>", '"h2"')
+        third = service.reindex(urls, updated_by="test")
+        assert third["pages"] == {"fetched": 1, "not_modified": 1, "unchanged": 0, "errors": 0}
+        assert embedded[-1] == "Now open Saturdays."
+
+        stored = db.query(KBSourcePage).filter(KBSourcePage.url == "https://example.com/").one()
+        assert stored.etag == '"h2"'
+        assert db.query(KBChunk).count() == 3
+    finally:
+        db.close()
+
+
+def test_discover_crawl_follows_sitemap_and_links_and_resumes(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_discover.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    monkeypatch.setenv("KB_CRAWL_MODE", "discover")
+    monkeypatch.setenv("KB_CRAWL_MAX_DEPTH", "1")
+    monkeypatch.setenv("KB_FETCH_CONCURRENCY", "1")
+    monkeypatch.setenv("KB_SOURCE_URLS", "https://Example.com/")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import KBCrawlFrontier
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler, canonicalize_url
+    from app.services.kb_service import KBService
+    from app.services.llm_service import LLMService
+
+    assert canonicalize_url("HTTPS://Example.com:443/services/?utm=1#top") == "https://example.com/services"
+
+    def page(title, body, links=()):
+        anchors = "".join(f'<a href="{href}">{href}</a>' for href in links)
+        return f"<html><title>{title}</title><body>{body}{anchors}</body></html>"
+
+    sitemap = (
+        '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<url><loc>https://example.com/services/</loc><lastmod>2026-01-01</lastmod></url>"
+        "<url><loc>https://example.com/about</loc><lastmod>2026-01-02</lastmod></url>"
+        "<url><loc>https://example.com/insurance</loc></url>"
+        "</urlset>"
+    )
+    home_links = ["/services?utm=x", "/services#top", "contact", "/private/notes", "https://other.com/x", "/a.pdf", "mailto:x@y"]
+    site = FakeSite(
+        {
+            "https://example.com/robots.txt": ("User-agent: *\nDisallow: /private\n", None),
+            "https://example.com/sitemap.xml": (sitemap, None),
+            "https://example.com/": (page("Home", "Welcome.", home_links), '"h"'),
+            "https://example.com/services": (page("Services", "Hearing tests."), '"s"'),
+            "https://example.com/about": (page("About", "Our team."), '"a"'),
+            "https://example.com/insurance": (page("Insurance", "We accept most plans."), '"i"'),
+            "https://example.com/contact": (page("Contact", "Call us.", ["/contact/deep"]), '"c"'),
+            "https://example.com/contact/deep": (page("Deep", "Too deep."), '"d"'),
+        }
+    )
+    failures = {"Call us": 1}
+
+    def embed(self, text):
+        for marker, remaining in failures.items():
+            if marker in text and remaining:
+                failures[marker] -= 1
+                raise RuntimeError("worker killed")
+        return None
+
+    monkeypatch.setattr(Crawler, "_request", site)
+    monkeypatch.setattr(LLMService, "embed_text", embed)
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        service = KBService(db)
+        try:
+            service.reindex(None, updated_by="test")
+        except RuntimeError:
+            db.rollback()
+        fetched_first = {url for url, _ in site.requests}
+        assert "https://example.com/private/notes" not in fetched_first
+        assert "https://other.com/x" not in fetched_first
+
+        site.requests.clear()
+        resumed = service.reindex(None, updated_by="test")
+        assert resumed["crawl"]["resumed"] is True
+        assert [url for url, _ in site.requests] == ["https://example.com/contact"]
+        assert resumed["crawl"]["frontier"] == {"done": 5}
+        urls = {row.url for row in db.query(KBCrawlFrontier).all()}
+        assert urls == {
+            "https://example.com/",
+            "https://example.com/services",
+            "https://example.com/about",
+            "https://example.com/insurance",
+            "https://example.com/contact",
+        }
+
+        fresh = service.reindex(None, updated_by="test")
+        assert fresh["crawl"]["resumed"] is False
+        assert fresh["pages"]["not_modified"] == 5
+        # Links of 304 pages come from the stored link list, so the crawl still reaches /contact.
+        assert fresh["crawl"]["frontier"] == {"done": 5}
+    finally:
+        db.close()
+
+
+def test_discover_crawl_budget_keeps_sitemap_pages_with_newer_lastmod(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_budget.db'}"
+    monkeypatch.setenv("KB_CRAWL_RESPECT_ROBOTS", "false")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_session_factory
+    from app.services.crawl_frontier import CrawlFrontier
+    from app.services.crawler import Crawler
+
+    sitemap = (
+        '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<url><loc>https://example.com/stale-1</loc></url>"
+        "<url><loc>https://example.com/stale-2</loc></url>"
+        "<url><loc>https://example.com/updated</loc><lastmod>2026-03-01</lastmod></url>"
+        "</urlset>"
+    )
+    monkeypatch.setattr(Crawler, "_request", FakeSite({"https://example.com/sitemap.xml": (sitemap, None)}))
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        frontier = CrawlFrontier(db, Crawler(), max_pages=2)
+        frontier.start(["https://example.com/"])
+        assert frontier.urls() == {"https://example.com/", "https://example.com/updated"}
+        assert frontier.counts["over_budget"] == 2
+    finally:
+        db.close()
+
+
+def test_chunk_writer_upserts_a_page_in_one_statement(tmp_path, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_writer.db'}"
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import KBChunk
+    from app.db.session import get_session_factory
+    from app.services.kb_writer import KBChunkWriter
+
+    def row(chunk_id, content):
+        return {
+            "chunk_id": chunk_id,
+            "source_url": "https://example.com/",
+            "title": "Home",
+            "content": content,
+            "page_type": "general",
+            "metadata_json": {"chunk_index": 0},
+            "approved": True,
+            "version": "v1",
+            "embedding": "[0.1,0.2]",
+        }
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        writer = KBChunkWriter(db)
+        for index in range(3):
+            writer.stage(row(f"c{index}", f"first {index}"))
+        assert writer.flush() == 3
+        db.commit()
+        original_id = db.query(KBChunk).filter(KBChunk.chunk_id == "c1").one().id
+
+        writer.stage(row("c1", "second"))
+        writer.stage(row("c1", "third"))
+        assert writer.flush() == 1
+        db.commit()
+        db.expire_all()
+
+        updated = db.query(KBChunk).filter(KBChunk.chunk_id == "c1").one()
+        assert (updated.id, updated.content) == (original_id, "third")
+        assert db.query(KBChunk).count() == 3
+        assert writer.stats()["statements"] == 2
+    finally:
+        db.close()
+
+
+def test_reindex_job_stops_at_next_page_after_cancel(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_job.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    monkeypatch.setenv("KB_FETCH_CONCURRENCY", "1")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.llm_service import LLMService
+    from app.services.reindex_jobs import ReindexJobConflict, ReindexJobService, run_reindex_job
+
+    urls = [f"https://example.com/page{index}" for index in range(3)]
+    site = FakeSite({url: (f"<html><body>Page {url}</body></html>", f'"{url}"') for url in urls})
+    monkeypatch.setattr(Crawler, "_request", site)
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        service = ReindexJobService(db)
+        job = service.submit(urls, force=False, requested_by="test")
+        try:
+            service.submit(None, force=False, requested_by="test")
+            raise AssertionError("second submit should conflict")
+        except ReindexJobConflict as exc:
+            assert exc.active_job_id == job.id
+
+        def embed_and_cancel(self, text):
+            cancel_db = get_session_factory()()
+            try:
+                ReindexJobService(cancel_db).cancel(job.id, requested_by="test")
+            finally:
+                cancel_db.close()
+
+        monkeypatch.setattr(LLMService, "embed_text", embed_and_cancel)
+        result = run_reindex_job(job.id)
+        assert result["status"] == "cancelled"
+        assert result["progress"]["urls_done"] == 1
+        # The lock is released, so a new job can be submitted.
+        assert service.submit(None, force=False, requested_by="test").status == "queued"
+    finally:
+        db.close()
+
+
+def test_reindex_publishes_versions_atomically_and_collects_garbage(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_versions.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "lexical")
+    monkeypatch.setenv("RETRIEVAL_CACHE_ENABLED", "false")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import KBChunk, KBVersion
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.kb_service import KBService
+    from app.services.kb_versions import KBVersionService
+    from app.services.llm_service import LLMService
+    from app.services.retrieval_service import RetrievalService
+
+    site = FakeSite(
+        {
+            "https://example.com/hours": ("<html><body>Open weekdays until five.</body></html>", '"h1"'),
+            "https://example.com/parking": ("<html><body>Free parking behind the clinic.</body></html>", '"p1"'),
+        }
+    )
+    urls = list(site.pages)
+    monkeypatch.setattr(Crawler, "_request", site)
+
+    def served(query):
+        reader = get_session_factory()()
+        try:
+            return [hit["content"] for hit in RetrievalService(reader).search(query)]
+        finally:
+            reader.close()
+
+    seen_during_build: list[list[str]] = []
+
+    def embed(self, text):
+        if "Saturdays" in text:
+            seen_during_build.append(served("open weekdays saturdays"))
+        if "garage" in text:
+            raise RuntimeError("embedding service down")
+        return None
+
+    monkeypatch.setattr(LLMService, "embed_text", embed)
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        service = KBService(db)
+        first = service.reindex(urls, updated_by="test")
+        assert served("open weekdays") == ["Open weekdays until five."]
+
+        site.pages["https://example.com/hours"] = ("<html><body>Open weekdays and Saturdays.</body></html>", '"h2"')
+        second = service.reindex(urls, updated_by="test")
+        # While version 2 was building, readers still got version 1.
+        assert seen_during_build == [["Open weekdays until five."]]
+        assert second["retired_chunks"] == 1
+        assert served("open weekdays saturdays") == ["Open weekdays and Saturdays."]
+
+        site.pages["https://example.com/parking"] = ("<html><body>Parking moved to the garage.</body></html>", '"p2"')
+        try:
+            service.reindex(urls, updated_by="test")
+            raise AssertionError("build should fail")
+        except RuntimeError:
+            pass
+        assert KBVersionService(db).active_version_id() == second["version_id"]
+        assert served("parking") == ["Free parking behind the clinic."]
+        assert db.query(KBVersion).filter(KBVersion.status == "failed").count() == 1
+
+        gc = KBVersionService(db).collect_garbage(grace_seconds=0)
+        assert gc["deleted_chunks"] == 1
+        assert db.query(KBChunk).count() == 2
+        assert first["version_id"] < second["version_id"]
+    finally:
+        db.close()
+
+
+def test_reindex_moves_site_wide_boilerplate_into_one_shared_page(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_boilerplate.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "lexical")
+    monkeypatch.setenv("RETRIEVAL_CACHE_ENABLED", "false")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import KBChunk
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.kb_service import KBService
+    from app.services.llm_service import LLMService
+    from app.services.retrieval_service import RetrievalService
+
+    # No <nav>/<footer>/<main> markup, so extraction alone cannot tell the chrome from the content.
+    def page(body, year="2024"):
+        return (
+            "<html><body><div class='menu'><a href='/'>Home</a> <a href='/contact'>Contact us</a></div>"
+            f"<div class='content'><p>{body}</p></div>"
+            f"<div class='site-info'>Upstate Hearing, 12 Main Street, Albany. Call 555-0100 for appointments. (c) {year}</div>"
+            "</body></html>"
+        )
+
+    bodies = {
+        "hours": "Open weekdays until five.",
+        "parking": "Free parking behind the clinic.",
+        "insurance": "Most major insurance plans are accepted.",
+        "aids": "We fit behind-the-ear and in-canal hearing aids.",
+    }
+    site = FakeSite({f"https://example.com/{slug}": (page(body), f'"{slug}"') for slug, body in bodies.items()})
+    # One page carries a slightly different footer; it still counts as the same block.
+    site.pages["https://example.com/aids"] = (page(bodies["aids"], year="2025"), '"aids"')
+    urls = list(site.pages)
+    embedded: list[str] = []
+    monkeypatch.setattr(Crawler, "_request", site)
+    monkeypatch.setattr(LLMService, "embed_text", lambda self, text: embedded.append(text) or None)
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        summary = KBService(db).reindex(urls, updated_by="test")
+        assert summary["boilerplate"]["blocks_dropped"] == 8
+        assert summary["boilerplate"]["shared_chunks"] == 1
+
+        contents = {row.source_url: row.content for row in db.query(KBChunk).all()}
+        assert contents["https://example.com/hours"] == "Open weekdays until five."
+        assert contents["https://example.com/#site-wide"].count("Main Street") == 1
+        hits = RetrievalService(db).search("main street albany")
+        assert hits[0]["source_url"] == "https://example.com/#site-wide"
+
+        calls = len(embedded)
+        again = KBService(db).reindex(urls, updated_by="test", force=True)
+        assert again["boilerplate"]["shared_chunks"] == 1
+        assert len(embedded) == calls + 5
+    finally:
+        db.close()
+
+
+def test_content_defined_chunks_only_reembed_what_an_edit_touched(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_churn.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.kb_service import KBService
+    from app.services.llm_service import LLMService
+
+    topics = ["hearing tests", "hearing aid fittings", "tinnitus care", "balance exams", "ear wax removal"]
+    sentences = [f"Our clinic offers {topic} on visit {i}, with results explained the same day." for i in range(12) for topic in topics]
+
+    def page(lines):
+        return "<html><body>" + "".join(f"<p>{line}</p>" for line in lines) + "</body></html>"
+
+    url = "https://example.com/services"
+    site = FakeSite({url: (page(sentences), '"v1"')})
+    embedded: list[str] = []
+    monkeypatch.setattr(Crawler, "_request", site)
+    monkeypatch.setattr(LLMService, "embed_text", lambda self, text: embedded.append(text) or None)
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        first = KBService(db).reindex([url], updated_by="test")
+        total = first["churn"]["added"]
+        assert total >= 5
+
+        site.pages[url] = (page(sentences[:2] + ["New: we now open on Saturdays for walk-in hearing checks."] + sentences[2:]), '"v2"')
+        embedded.clear()
+        second = KBService(db).reindex([url], updated_by="test")
+        churn = second["churn"]["pages"][url]
+        assert churn["added"] <= 2
+        assert churn["kept"] >= total - 2
+        assert churn["removed"] == churn["added"]
+        assert len(embedded) == churn["added"]
+        assert any("Saturdays" in text for text in embedded)
+        assert second["retired_chunks"] == churn["removed"]
+    finally:
+        db.close()
+
+
+def test_retrieval_follows_a_version_published_by_another_process(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_poll.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "lexical")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.kb_service import KBService
+    from app.services.kb_versions import get_active_version_cache
+    from app.services.retrieval_cache import RetrievalCache
+    from app.services.retrieval_service import RetrievalService
+
+    site = FakeSite({"https://example.com/hours": ("<html><body>Open weekdays until five.</body></html>", '"h1"')})
+    monkeypatch.setattr(Crawler, "_request", site)
+
+    def served(query):
+        reader = get_session_factory()()
+        try:
+            return [hit["content"] for hit in RetrievalService(reader).search(query)]
+        finally:
+            reader.close()
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        KBService(db).reindex(list(site.pages), updated_by="test")
+    finally:
+        db.close()
+    assert served("open weekdays") == ["Open weekdays until five."]
+
+    # Another worker or a CLI reindex publishes: this process's KB cache version does not move.
+    monkeypatch.setattr(RetrievalCache, "invalidate", lambda self: 0)
+    site.pages["https://example.com/hours"] = ("<html><body>Open weekdays and Saturdays.</body></html>", '"h2"')
+    other = get_session_factory()()
+    try:
+        KBService(other).reindex(list(site.pages), updated_by="cli")
+    finally:
+        other.close()
+
+    cache = get_active_version_cache()
+    cache.poll_seconds = 3600
+    assert served("open weekdays") == ["Open weekdays until five."]
+    cache.poll_seconds = 0
+    assert served("open weekdays") == ["Open weekdays and Saturdays."]
+
+
+def test_reindex_job_heartbeats_while_fetching_and_stops_once_released(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'kb_job_stale.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    monkeypatch.setenv("KB_FETCH_CONCURRENCY", "1")
+    monkeypatch.setenv("KB_REINDEX_STALE_SECONDS", "0")
+    reset_runtime()
+
+    import app.services.kb_service as kb_service_module
+    from app.db.init_db import init_db
+    from app.db.models import KBReindexJob
+    from app.db.session import get_session_factory
+    from app.services.crawler import Crawler
+    from app.services.kb_service import KBService
+    from app.services.kb_versions import KBVersionService
+    from app.services.llm_service import LLMService
+    from app.services.reindex_jobs import ReindexJobService, run_reindex_job
+
+    urls = [f"https://example.com/page{index}" for index in range(3)]
+    site = FakeSite({url: (f"<html><body>Page {url}</body></html>", f'"{url}"') for url in urls})
+    monkeypatch.setattr(Crawler, "_request", site)
+    monkeypatch.setattr(kb_service_module, "FETCH_HEARTBEAT_SECONDS", 0.0)
+    snapshots = []
+    original_snapshot = KBService._progress_snapshot
+
+    def recorded_snapshot(run):
+        snapshots.append(original_snapshot(run))
+        return snapshots[-1]
+
+    monkeypatch.setattr(KBService, "_progress_snapshot", staticmethod(recorded_snapshot))
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        job = ReindexJobService(db).submit(urls, force=False, requested_by="test")
+        successor = {}
+
+        def embed_while_another_submit_expires_the_job(self, text):
+            if not successor:
+                other = get_session_factory()()
+                try:
+                    successor["id"] = ReindexJobService(other).submit(None, force=False, requested_by="cron").id
+                finally:
+                    other.close()
+            return None
+
+        monkeypatch.setattr(LLMService, "embed_text", embed_while_another_submit_expires_the_job)
+        run_reindex_job(job.id)
+
+        # Heartbeats went out while the batch was still being fetched, before any page was indexed.
+        assert any(snapshot["urls_fetched"] and not snapshot["urls_done"] for snapshot in snapshots)
+        db.expire_all()
+        assert db.get(KBReindexJob, job.id).status == "failed"
+        assert db.get(KBReindexJob, successor["id"]).status == "queued"
+        assert KBVersionService(db).active_version_id() == 0
+    finally:
+        db.close()
+
+
+def test_vector_dimension_check_flags_columns_that_disagree_with_settings():
+    from app.core.config import Settings
+    from app.services.kb_writer import vector_dimension_mismatches
+
+    settings = Settings(embedding_dimensions=1536, embedding_short_dimensions=128)
+
+    assert vector_dimension_mismatches({"embedding": 1536, "embedding_short": 256}, settings) == [
+        "kb_chunks.embedding_short is vector(256) but EMBEDDING_SHORT_DIMENSIONS=128"
+    ]
+    assert vector_dimension_mismatches({"embedding": 1536, "embedding_short": 128}, settings) == []
+    # Short vectors switched off: the column is never written, so its size does not matter.
+    assert vector_dimension_mismatches({"embedding_short": 256}, Settings(embedding_short_dimensions=0)) == []
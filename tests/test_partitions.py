@@ -0,0 +1,41 @@
+from datetime import date, datetime, timezone
+
+from app.services.partitions import (
+    MonthPartition,
+    add_months,
+    default_partition,
+    month_start,
+    months_to_create,
+    parse_partition,
+)
+
+
+def test_month_arithmetic_wraps_years():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert month_start(datetime(2026, 3, 31, 23, 30, tzinfo=timezone.utc)) == date(2026, 3, 1)
+
+
+def test_partition_naming_and_bounds():
+    partition = MonthPartition("conversation_messages", date(2026, 12, 1))
+    assert partition.name == "conversation_messages_p2026_12"
+    assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in partition.create_sql()
+    assert parse_partition("conversation_messages", partition.name) == partition
+    assert parse_partition("audit_logs", partition.name) is None
+    assert parse_partition("audit_logs", "audit_logs_default") is None
+    assert parse_partition("audit_logs", default_partition("audit_logs")) is None
+    # Rows the DEFAULT partition took for a month are moved by the same bounds the partition uses.
+    assert partition.range_sql() == "created_at >= '2026-12-01 00:00:00+00' AND created_at < '2027-01-01 00:00:00+00'"
+
+
+def test_only_fully_expired_months_are_dropped():
+    cutoff = datetime(2026, 10, 15, tzinfo=timezone.utc)
+    assert MonthPartition("audit_logs", date(2026, 9, 1)).expired(cutoff)
+    # October still holds rows newer than the cutoff; those go through the row delete.
+    assert not MonthPartition("audit_logs", date(2026, 10, 1)).expired(cutoff)
+
+
+def test_months_to_create_fills_gaps_through_horizon():
+    existing = [MonthPartition("audit_logs", date(2026, 10, 1)), MonthPartition("audit_logs", date(2026, 12, 1))]
+    missing = months_to_create("audit_logs", existing, date(2026, 10, 19), months_ahead=3)
+    assert [partition.name for partition in missing] == ["audit_logs_p2026_11", "audit_logs_p2027_01"]
@@ -0,0 +1,118 @@
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.services.policy_snapshot import parse_business_hours
+
+ET = ZoneInfo("America/New_York")
+
+
+def test_business_hours_policy_text_is_parsed():
+    schedule = parse_business_hours(
+        "Monday-Friday 9:00 AM-4:00 PM ET. Appointments available by request outside these hours.", "UTC"
+    )
+    assert schedule.parsed and schedule.tz == ET
+    assert schedule.is_open(datetime(2026, 10, 19, 9, 0, tzinfo=ET))
+    assert not schedule.is_open(datetime(2026, 10, 19, 16, 0, tzinfo=ET))
+    assert not schedule.is_open(datetime(2026, 10, 24, 11, 0, tzinfo=ET))
+    # Friday evening: the next change is Monday's opening.
+    assert schedule.next_transition(datetime(2026, 10, 23, 17, 0, tzinfo=ET)) == datetime(2026, 10, 26, 9, 0, tzinfo=ET)
+
+    split = parse_business_hours("Mon-Thu 8am-5pm; Fri 8am-noon; Saturday 9-1", "America/New_York")
+    assert split.hours[4] == ((8 * 60, 12 * 60),)
+    assert split.hours[5] == ((9 * 60, 13 * 60),)
+    assert 6 not in split.hours
+
+    comma = parse_business_hours("Monday through Friday, 8:30 AM to 5 PM", "America/New_York")
+    assert comma.parsed
+    assert comma.hours == {day: ((8 * 60 + 30, 17 * 60),) for day in range(5)}
+
+    overnight = parse_business_hours("Fri-Sat 6 PM - 2 AM", "America/New_York")
+    assert overnight.hours[4] == ((18 * 60, 24 * 60),)
+    assert overnight.hours[6] == ((0, 2 * 60),)
+    # Saturday 1 AM is still Friday night's range.
+    assert overnight.is_open(datetime(2026, 10, 24, 1, 0, tzinfo=ET))
+    assert not overnight.is_open(datetime(2026, 10, 24, 12, 0, tzinfo=ET))
+
+    fallback = parse_business_hours("By appointment only", "America/New_York")
+    assert not fallback.parsed and fallback.is_open(datetime(2026, 10, 20, 10, 0, tzinfo=ET))
+
+
+def test_snapshot_serves_without_queries_and_reloads_after_update(tmp_path, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'policy_snapshot.db'}"
+    reset_runtime()
+
+    from sqlalchemy import event
+
+    from app.db.init_db import init_db
+    from app.db.session import get_engine, get_session_factory
+    from app.services.policy_service import PolicyService
+    from app.services.policy_snapshot import get_policy_snapshot
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        first = get_policy_snapshot(db)
+
+        statements = []
+        event.listen(get_engine(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+        for _ in range(50):
+            assert get_policy_snapshot(db) is first
+            first.is_open_now()
+        assert statements == []
+
+        PolicyService(db).update_policy("business_hours", "Saturday 9 AM-5 PM ET", "test")
+        updated = get_policy_snapshot(db)
+        assert updated.version > first.version
+        assert updated.policies["business_hours"] == "Saturday 9 AM-5 PM ET"
+        assert updated.is_open_now(datetime(2026, 10, 24, 12, 0, tzinfo=ET))
+        assert not updated.is_open_now(datetime(2026, 10, 19, 12, 0, tzinfo=ET))
+    finally:
+        db.close()
+
+
+def test_snapshot_rechecks_the_database_once_after_subscribing(tmp_path, reset_runtime):
+    import threading
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'policy_listener.db'}"
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import BusinessPolicy
+    from app.db.session import get_session_factory
+    from app.services.policy_snapshot import PolicySnapshotCache
+
+    subscribed, release = threading.Event(), threading.Event()
+
+    class FakePubSub:
+        def subscribe(self, _channel):
+            pass
+
+        def listen(self):
+            subscribed.set()
+            release.wait(5)
+            return iter(())
+
+    class FakeRedis:
+        def pubsub(self, ignore_subscribe_messages):
+            return FakePubSub()
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        cache = PolicySnapshotCache(poll_seconds=3600)
+        first = cache.get(db)
+        # An update announced before this worker's subscription exists is never delivered to it.
+        db.add(BusinessPolicy(policy_key="business_hours", policy_value="Saturday 9 AM-5 PM ET", updated_by="test"))
+        db.commit()
+
+        listener = threading.Thread(target=cache._listen, args=(FakeRedis(),), daemon=True)
+        listener.start()
+        assert subscribed.wait(5)
+        updated = cache.get(db)
+        assert updated.version > first.version
+        assert cache.get(db) is updated
+        release.set()
+        listener.join(5)
+    finally:
+        db.close()
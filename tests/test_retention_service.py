@@ -2,20 +2,11 @@ import os
 from datetime import datetime, timedelta, timezone
 
 
-def _reset_runtime():
-    from app.core.config import get_settings
-    from app.db.session import get_engine, get_session_factory
-
-    get_settings.cache_clear()
-    get_engine.cache_clear()
-    get_session_factory.cache_clear()
-
-
-def test_retention_service_dry_run_and_execute(tmp_path):
+def test_retention_service_dry_run_and_execute(tmp_path, reset_runtime):
     os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retention_unit.db'}"
     os.environ["RETENTION_DAYS_MESSAGES"] = "30"
     os.environ["RETENTION_DAYS_ESCALATIONS"] = "90"
-    _reset_runtime()
+    reset_runtime()
 
     from app.db.init_db import init_db
     from app.db.models import ConversationMessage, ConversationSession, EscalationTicket
@@ -56,3 +47,103 @@ def test_retention_service_dry_run_and_execute(tmp_path):
         assert run["deleted_escalations"] >= 1
     finally:
         db.close()
+
+
+def test_retention_deletes_audit_logs_only_when_configured(tmp_path, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retention_audit.db'}"
+    os.environ["RETENTION_DAYS_AUDIT_LOGS"] = "0"
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import AuditLog
+    from app.db.session import get_session_factory
+    from app.services.retention_service import RetentionService
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        db.add(AuditLog(action="old", created_at=datetime.now(timezone.utc) - timedelta(days=800)))
+        db.commit()
+
+        kept = RetentionService(db).run_cleanup(updated_by="unit-test")
+        assert kept["audit_cutoff"] is None
+        assert kept["deleted_audit_logs"] == 0
+        assert "audit_logs" not in kept["tables"]
+
+        os.environ["RETENTION_DAYS_AUDIT_LOGS"] = "365"
+        reset_runtime()
+        run = RetentionService(db).run_cleanup(updated_by="unit-test")
+        assert run["audit_logs_to_delete"] == 1
+        assert run["deleted_audit_logs"] == 1
+    finally:
+        os.environ.pop("RETENTION_DAYS_AUDIT_LOGS", None)
+        db.close()
+
+
+def test_retention_batches_resume_and_cascade_to_sessions_and_leads(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retention_batches.db'}"
+    os.environ["RETENTION_BATCH_SIZE"] = "2"
+    os.environ["RETENTION_BATCH_SLEEP_SECONDS"] = "0"
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import ConversationMessage, ConversationSession, LeadCapture, RetentionRun
+    from app.db.session import get_session_factory
+    from app.services import retention_service
+    from app.services.retention_service import RetentionService
+
+    old_ts = datetime.now(timezone.utc) - timedelta(days=365)
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        db.add_all([ConversationSession(id="expired", created_at=old_ts), ConversationSession(id="active", created_at=old_ts)])
+        db.add_all(
+            [ConversationMessage(session_id="expired", role="user", text=f"old {i}", created_at=old_ts) for i in range(3)]
+        )
+        db.add(ConversationMessage(session_id="active", role="user", text="recent"))
+        db.add(LeadCapture(session_id="expired", phone="555", created_at=old_ts))
+        db.commit()
+
+        dry = RetentionService(db).run_cleanup(updated_by="unit-test", dry_run=True)
+        assert (dry["messages_to_delete"], dry["sessions_to_delete"], dry["leads_to_delete"]) == (3, 1, 1)
+
+        def interrupt(_seconds):
+            raise RuntimeError("worker restarted")
+
+        monkeypatch.setattr(retention_service.time, "sleep", interrupt)
+        try:
+            RetentionService(db).run_cleanup(updated_by="unit-test")
+        except RuntimeError:
+            pass
+        interrupted = db.query(RetentionRun).one()
+        assert interrupted.status == "interrupted"
+        assert interrupted.checkpoint_json["conversation_messages"]["done"] is False
+        assert db.query(ConversationMessage).count() == 2
+
+        monkeypatch.setattr(retention_service.time, "sleep", lambda _seconds: None)
+        run = RetentionService(db).run_cleanup(updated_by="unit-test")
+        assert run["resumed"] is True and run["run_id"] == interrupted.id
+        assert run["tables"]["conversation_messages"]["batches"] == 2
+        assert (run["deleted_messages"], run["deleted_leads"], run["deleted_sessions"]) == (3, 1, 1)
+        assert [session.id for session in db.query(ConversationSession).all()] == ["active"]
+        assert db.query(RetentionRun).one().status == "completed"
+    finally:
+        os.environ.pop("RETENTION_BATCH_SIZE", None)
+        os.environ.pop("RETENTION_BATCH_SLEEP_SECONDS", None)
+        db.close()
+
+
+def test_retention_dry_run_explain_renders_expanding_parameters():
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+
+    from app.services.retention_service import RetentionService, _explain_sql
+
+    service = RetentionService(db=None)
+    cutoffs = {name: datetime(2024, 1, 1, tzinfo=timezone.utc) for name in ("messages", "escalations", "leads", "audit_logs")}
+    for step in service.steps(cutoffs):
+        sql, params = _explain_sql(select(step.key).where(step.criterion), postgresql.psycopg2.dialect())
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "POSTCOMPILE" not in sql
+        if step.table in ("escalation_tickets", "conversation_sessions"):
+            assert "resolved" in params.values() and "closed" in params.values()
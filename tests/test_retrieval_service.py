@@ -0,0 +1,242 @@
+import os
+
+
+def _seed_chunks(db, chunks):
+    from app.db.models import KBChunk
+
+    for chunk_id, source_url, content, approved, *page_type in chunks:
+        db.add(
+            KBChunk(
+                chunk_id=chunk_id,
+                source_url=source_url,
+                title="Upstate Hearing",
+                content=content,
+                metadata_json={},
+                page_type=page_type[0] if page_type else "general",
+                approved=approved,
+                version="v1",
+            )
+        )
+    db.commit()
+
+
+def test_retrieval_cache_hits_and_invalidates_on_approval(tmp_path, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retrieval_cache.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_session_factory
+    from app.services.kb_service import KBService
+    from app.services.retrieval_cache import get_retrieval_cache
+    from app.services.retrieval_service import RetrievalService
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        _seed_chunks(
+            db,
+            [
+                ("c1", "https://example.com/services", "We offer hearing aid fittings and balance testing.", True),
+                ("c2", "https://example.com/insurance", "We accept Medicare and offer financing plans.", False),
+            ],
+        )
+        service = RetrievalService(db)
+        cache = get_retrieval_cache()
+
+        first = service.search("Medicare   financing", top_k=3)
+        second = service.search("medicare financing", top_k=3)
+        assert first == second == []
+        assert cache.stats()["hits"] == 1
+
+        KBService(db).approve_chunks(["c2"], approved=True, updated_by="test")
+        after = service.search("medicare financing", top_k=3)
+        assert [item["source_url"] for item in after] == ["https://example.com/insurance"]
+        assert cache.stats()["kb_version"] == 1
+    finally:
+        db.close()
+
+
+def test_search_reads_the_kb_version_counter_once(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retrieval_version_reads.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_session_factory
+    from app.services.retrieval_cache import KBVersionCounter
+    from app.services.retrieval_service import RetrievalService
+
+    reads = []
+    current = KBVersionCounter.current
+    monkeypatch.setattr(KBVersionCounter, "current", lambda self: reads.append(1) or current(self))
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        _seed_chunks(db, [("c1", "https://example.com/services", "We offer hearing aid fittings.", True)])
+        service = RetrievalService(db)
+
+        # A miss that narrows to the intent's page types, then widens and falls back to lexical.
+        reads.clear()
+        assert service.search("hearing aid fittings", top_k=3, intent="insurance_financing")
+        assert len(reads) == 1
+        reads.clear()
+        assert service.search("hearing aid fittings", top_k=3, intent="insurance_financing")
+        assert len(reads) == 1
+    finally:
+        db.close()
+
+
+def test_retrieval_cache_evicts_least_recently_used():
+    from app.services.retrieval_cache import RetrievalCache
+
+    cache = RetrievalCache(max_entries=2, ttl_seconds=0)
+    cache.put(("a",), [{"snippet": "a"}])
+    cache.put(("b",), [{"snippet": "b"}])
+    assert cache.get(("a",)) is not None
+    cache.put(("c",), [{"snippet": "c"}])
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == [{"snippet": "a"}]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_search_filters_candidates_by_intent_page_type(tmp_path, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retrieval_intent.db'}"
+    os.environ["OPENAI_API_KEY"] = ""
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.session import get_session_factory
+    from app.services.retrieval_service import RetrievalService
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        _seed_chunks(
+            db,
+            [
+                ("p1", "https://example.com/insurance", "Insurance plans and payment options we accept.", True, "policy"),
+                ("s1", "https://example.com/services", "Balance testing options and hearing aid plans.", True, "services"),
+                ("g1", "https://example.com/", "Welcome to our clinic.", True, "general"),
+            ],
+        )
+        service = RetrievalService(db)
+
+        unfiltered = service.search("plans and options", top_k=5)
+        assert {item["source_url"] for item in unfiltered} == {
+            "https://example.com/insurance",
+            "https://example.com/services",
+        }
+
+        policy_only = service.search("plans and options", top_k=5, intent="insurance_financing")
+        assert [item["source_url"] for item in policy_only] == ["https://example.com/insurance"]
+
+        # No match inside the intent's slice widens back to the full KB.
+        widened = service.search("welcome clinic", top_k=5, intent="services_info")
+        assert [item["source_url"] for item in widened] == ["https://example.com/"]
+    finally:
+        db.close()
+
+
+def _fake_embedding(seed: int, dims: int = 64):
+    import numpy as np
+
+    vector = np.random.default_rng(seed).normal(size=dims).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def test_two_stage_vector_search_uses_backfilled_short_vectors(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retrieval_vectors.db'}"
+    monkeypatch.setenv("EMBEDDING_SHORT_DIMENSIONS", "16")
+    monkeypatch.setenv("VECTOR_RERANK_CANDIDATES", "4")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import KBChunk
+    from app.db.session import get_session_factory
+    from app.jobs.backfill_short_embeddings import run_backfill_short_embeddings
+    from app.services.embedding_codec import encode_embedding
+    from app.services.llm_service import LLMService
+    from app.services.retrieval_service import RetrievalService
+
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        for seed in range(20):
+            encoded = encode_embedding(_fake_embedding(seed), "float32")
+            db.add(
+                KBChunk(
+                    chunk_id=f"c{seed}",
+                    source_url=f"https://example.com/{seed}",
+                    content=f"chunk {seed}",
+                    embedding_blob=encoded.data,
+                    embedding_dtype=encoded.dtype,
+                    version="v1",
+                )
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    assert run_backfill_short_embeddings(batch_size=7)["backfilled"] == 20
+
+    monkeypatch.setattr(LLMService, "embed_text", lambda self, text: _fake_embedding(int(text)))
+    db = get_session_factory()()
+    try:
+        assert all(row.embedding_short_blob for row in db.query(KBChunk).all())
+        results = RetrievalService(db).search("13", top_k=3)
+        assert results[0]["source_url"] == "https://example.com/13"
+        assert results[0]["score"] == 1.0
+        assert len(results) == 3
+    finally:
+        db.close()
+
+
+def test_vector_index_rebuilds_for_a_version_published_elsewhere(tmp_path, monkeypatch, reset_runtime):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path / 'retrieval_index_version.db'}"
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "exact")
+    monkeypatch.setenv("RETRIEVAL_CACHE_ENABLED", "false")
+    monkeypatch.setenv("KB_VERSION_POLL_SECONDS", "0")
+    reset_runtime()
+
+    from app.db.init_db import init_db
+    from app.db.models import KBActiveVersion, KBChunk
+    from app.db.session import get_session_factory
+    from app.services.embedding_codec import encode_embedding
+    from app.services.llm_service import LLMService
+    from app.services.retrieval_service import RetrievalService
+
+    def chunk(seed, **versions):
+        encoded = encode_embedding(_fake_embedding(seed), "float32")
+        return KBChunk(
+            chunk_id=f"c{seed}",
+            source_url=f"https://example.com/{seed}",
+            content=f"chunk {seed}",
+            embedding_blob=encoded.data,
+            embedding_dtype=encoded.dtype,
+            version="v1",
+            **versions,
+        )
+
+    monkeypatch.setattr(LLMService, "embed_text", lambda self, text: _fake_embedding(int(text)))
+    db = get_session_factory()()
+    try:
+        init_db(db)
+        db.add_all([chunk(seed) for seed in range(5)])
+        db.commit()
+        assert RetrievalService(db).search("3", top_k=1)[0]["source_url"] == "https://example.com/3"
+
+        # Another process publishes version 1, replacing chunk 3 with chunk 7; this process's cache counter is unchanged.
+        other = get_session_factory()()
+        other.query(KBChunk).filter(KBChunk.chunk_id == "c3").update({"retired_version_id": 1})
+        other.add(chunk(7, introduced_version_id=1))
+        other.add(KBActiveVersion(name="kb", version_id=1))
+        other.commit()
+        other.close()
+
+        assert "https://example.com/3" not in {hit["source_url"] for hit in RetrievalService(db).search("3", top_k=5)}
+        assert RetrievalService(db).search("7", top_k=1)[0]["source_url"] == "https://example.com/7"
+    finally:
+        db.close()
@@ -0,0 +1,87 @@
+def _clustered(rows, dims, clusters, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dims)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=rows)] + 0.3 * rng.normal(size=(rows, dims)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _exact_index(vectors, page_types=None):
+    import numpy as np
+
+    from app.services.vector_index import ExactVectorIndex
+
+    ids = np.arange(1, vectors.shape[0] + 1, dtype=np.int64)
+    types = np.asarray(page_types or ["general"] * vectors.shape[0], dtype=object)
+    return ExactVectorIndex(ids, types, vectors.astype(np.float32), None)
+
+
+def test_ivf_recall_matches_exact_search_and_persists_training(tmp_path):
+    from app.services.vector_index import IVFVectorIndex
+
+    vectors = _clustered(2000, 32, clusters=20)
+    exact = _exact_index(vectors)
+    ivf = IVFVectorIndex.build(exact, lists=20, probes=4, index_dir=str(tmp_path))
+
+    hits = 0
+    for query in vectors[:50]:
+        expected = {chunk_id for chunk_id, _ in exact.search(query, top_k=5, candidates=50)}
+        found = {chunk_id for chunk_id, _ in ivf.search(query, top_k=5, candidates=50)}
+        hits += len(expected & found)
+    assert hits / 250 >= 0.9
+
+    persisted = list(tmp_path.glob("ivf-*.npz"))
+    assert len(persisted) == 1
+    reloaded = IVFVectorIndex.build(exact, lists=20, probes=4, index_dir=str(tmp_path))
+    assert (reloaded.centroids == ivf.centroids).all()
+
+
+def test_exact_search_respects_page_type_filter():
+    vectors = _clustered(10, 8, clusters=2)
+    index = _exact_index(vectors, page_types=["policy"] * 5 + ["services"] * 5)
+
+    results = index.search(vectors[0], top_k=3, candidates=10, page_types=("services",))
+
+    assert len(results) == 3
+    assert all(chunk_id > 5 for chunk_id, _ in results)
+
+
+def test_ivf_filtered_search_finds_sparse_page_type_outside_probed_lists():
+    from app.services.vector_index import IVFVectorIndex
+
+    vectors = _clustered(600, 16, clusters=6)
+    exact = _exact_index(vectors)
+    ivf = IVFVectorIndex.build(exact, lists=6, probes=1, index_dir=None)
+    query = vectors[0]
+    # Tag a few rows that are least similar to the query, so none sit in its nearest list.
+    far = (vectors @ query).argsort()[:3]
+    exact.page_types[far] = "policy"
+
+    results = ivf.search(query, top_k=5, candidates=50, page_types=("policy",))
+
+    assert sorted(chunk_id for chunk_id, _ in results) == sorted(int(row) + 1 for row in far)
+    assert results == exact.search(query, top_k=5, candidates=50, page_types=("policy",))
+
+
+def test_ivf_retrains_when_vectors_change_and_prunes_superseded_files(tmp_path):
+    import numpy as np
+
+    from app.services.vector_index import IVFVectorIndex
+
+    first = _exact_index(_clustered(300, 16, clusters=4, seed=1))
+    IVFVectorIndex.build(first, lists=4, probes=2, index_dir=str(tmp_path))
+    # Same ids, re-embedded with a different model.
+    second = _exact_index(_clustered(300, 16, clusters=4, seed=2))
+    rebuilt = IVFVectorIndex.build(second, lists=4, probes=2, index_dir=str(tmp_path))
+
+    assert first.fingerprint() != second.fingerprint()
+    assert [path.name for path in tmp_path.glob("ivf-*.npz")] == [f"ivf-{second.fingerprint()}-4.npz"]
+    assert rebuilt.search(second.full[0], top_k=1, candidates=10)[0][0] == 1
+
+    # A file whose centroids don't match the training width is retrained, not used.
+    path = tmp_path / f"ivf-{second.fingerprint()}-4.npz"
+    np.savez(path, centroids=np.ones((4, 8), dtype=np.float32), assignments=np.zeros(300, dtype=np.int64))
+    recovered = IVFVectorIndex.build(second, lists=4, probes=2, index_dir=str(tmp_path))
+    assert recovered.centroids.shape == (4, 16)
+    assert recovered.search(second.full[0], top_k=1, candidates=10)[0][0] == 1